@@ -0,0 +1,253 @@
+"""baseline schema
+
+Revision ID: 0b5e3f1a7c64
+Revises:
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b5e3f1a7c64'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблицы, которые до появления миграций создавал только create_all при старте.
+    # На базах, поднятых приложением, они уже есть и пропускаются
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_name', sa.String(length=255), nullable=False),
+        sa.Column('first_name', sa.String(length=255)),
+        sa.Column('last_name', sa.String(length=255)),
+        sa.Column('email', sa.String(length=255)),
+        sa.Column('balance', sa.Float(), nullable=False),
+        sa.Column('language', sa.String(length=50)),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.Column('discount_rate', sa.Float(), nullable=False),
+        sa.Column('api_key', sa.String(length=255)),
+        sa.Column('is_admin', sa.Boolean(), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        if_not_exists=True
+    )
+    op.create_index('ix_users_id', 'users', ['id'], if_not_exists=True)
+    op.create_index('ix_users_user_name', 'users', ['user_name'], if_not_exists=True)
+    op.create_index('ix_users_email', 'users', ['email'], if_not_exists=True)
+    op.create_index('ix_users_api_key', 'users', ['api_key'], if_not_exists=True)
+
+    op.create_table(
+        'status_types',
+        sa.Column('id', sa.SmallInteger(), primary_key=True, autoincrement=True),
+        sa.Column('code', sa.String(length=30), nullable=False, unique=True),
+        sa.Column('name_en', sa.String(length=50), nullable=False),
+        sa.Column('name_ru', sa.String(length=50)),
+        sa.Column('description', sa.Text()),
+        sa.Column('is_final', sa.Boolean()),
+        sa.Column('is_error', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime(timezone=False), server_default=sa.func.now()),
+        if_not_exists=True
+    )
+
+    op.create_table(
+        'providers',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('name', sa.String(length=50), nullable=False, unique=True),
+        sa.Column('adapter_class', sa.String(length=100), nullable=False),
+        sa.Column('config', postgresql.JSONB(), nullable=False),
+        sa.Column('is_active', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('display_name', sa.String(length=255)),
+        sa.Column('api_url', sa.String(length=500)),
+        sa.Column('api_key', sa.String(length=500)),
+        sa.Column('priority', sa.Integer()),
+        sa.Column('max_requests_per_second', sa.Integer()),
+        sa.Column('timeout_seconds', sa.Integer()),
+        sa.Column('adapter_type', sa.String(length=50)),
+        sa.Column('mapping_type', sa.String(length=50)),
+        sa.Column('max_requests_per_minute', sa.Integer()),
+        if_not_exists=True
+    )
+    op.create_index('ix_providers_id', 'providers', ['id'], if_not_exists=True)
+
+    op.create_table(
+        'history',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('number', sa.String(length=255)),
+        sa.Column('activ_id', sa.String(length=255)),
+        sa.Column('code', sa.String(length=255)),
+        sa.Column('service', sa.String(length=255)),
+        sa.Column('price', sa.Float()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('country_code', sa.String(length=10)),
+        sa.Column('provider_cost_price', sa.Float()),
+        sa.Column('status_id', sa.SmallInteger(), sa.ForeignKey('status_types.id'), nullable=False),
+        sa.Column('provider_id', sa.Integer(), sa.ForeignKey('providers.id')),
+        sa.Column('client_ip', postgresql.INET()),
+        if_not_exists=True
+    )
+    op.create_index('ix_history_id', 'history', ['id'], if_not_exists=True)
+    op.create_index('ix_history_created_at', 'history', ['created_at'], if_not_exists=True)
+    op.create_index('ix_history_user_id', 'history', ['user_id'], if_not_exists=True)
+    op.create_index('ix_history_provider_id', 'history', ['provider_id'], if_not_exists=True)
+
+    op.create_table(
+        'payment_history',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('amount', sa.Float()),
+        sa.Column('cash_register', sa.String(length=255)),
+        sa.Column('invoice_id', sa.String(length=255), unique=True),
+        sa.Column('status', sa.String(length=50)),
+        sa.Column('transaction_hash', sa.String(length=255)),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        if_not_exists=True
+    )
+
+    op.create_table(
+        'service_reference',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('code', sa.String(length=10), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('category', sa.String(length=100)),
+        sa.Column('icon', sa.String(length=10)),
+        sa.Column('is_popular', sa.Boolean(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.Column('sort_order', sa.Integer()),
+        if_not_exists=True
+    )
+    op.create_index('ix_service_reference_code', 'service_reference', ['code'], unique=True, if_not_exists=True)
+
+    op.create_table(
+        'country_reference',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('code', sa.String(length=10), nullable=False),
+        sa.Column('name_ru', sa.String(length=255), nullable=False),
+        sa.Column('name_en', sa.String(length=255)),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('iso_code', sa.String(length=3)),
+        sa.Column('region', sa.String(length=100)),
+        sa.Column('is_popular', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.Column('sort_order', sa.Integer()),
+        if_not_exists=True
+    )
+    op.create_index('ix_country_reference_code', 'country_reference', ['code'], unique=True, if_not_exists=True)
+
+    op.create_table(
+        'provider_routes',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('provider_id', sa.Integer(), sa.ForeignKey('providers.id'), nullable=False),
+        sa.Column('country_code', sa.String(length=10), nullable=False),
+        sa.Column('service_code', sa.String(length=50), nullable=False),
+        sa.Column('provider_country_code', sa.String(length=50), nullable=False),
+        sa.Column('provider_service_code', sa.String(length=100), nullable=False),
+        sa.Column('external_product_id', sa.String(length=100)),
+        sa.Column('cost_price', sa.Numeric(10, 4), nullable=False),
+        sa.Column('client_price', sa.Numeric(10, 4), nullable=False),
+        sa.Column('vip_client_price', sa.Numeric(10, 4), nullable=False),
+        sa.Column('min_margin_percent', sa.Numeric(5, 2)),
+        sa.Column('available_count', sa.Integer(), nullable=False),
+        sa.Column('max_daily_limit', sa.Integer()),
+        sa.Column('booking_duration_hours', sa.Integer()),
+        sa.Column('priority', sa.SmallInteger()),
+        sa.Column('rating_score', sa.Float(24)),
+        sa.Column('success_rate', sa.Float(24)),
+        sa.Column('avg_response_time_ms', sa.Integer()),
+        sa.Column('total_attempts', sa.Integer()),
+        sa.Column('successful_attempts', sa.Integer()),
+        sa.Column('consecutive_failures', sa.Integer()),
+        sa.Column('last_success_at', sa.DateTime(timezone=True)),
+        sa.Column('last_failure_at', sa.DateTime(timezone=True)),
+        sa.Column('is_active', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('last_price_update', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('provider_specific_data', postgresql.JSONB()),
+        sa.Column('notes', sa.Text()),
+        if_not_exists=True
+    )
+    op.create_index('ix_provider_routes_id', 'provider_routes', ['id'], if_not_exists=True)
+
+    op.create_table(
+        'provider_balance_snapshots',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('snapshot_datetime', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('balance', sa.Float(), nullable=False),
+        sa.Column('provider_id', sa.Integer(), sa.ForeignKey('providers.id')),
+        if_not_exists=True
+    )
+
+    op.create_table(
+        'provider_route_stats',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('provider_id', sa.Integer(), sa.ForeignKey('providers.id'), nullable=False),
+        sa.Column('country_code', sa.String(length=10), nullable=False),
+        sa.Column('service_code', sa.String(length=50), nullable=False),
+        sa.Column('rating_score', sa.Float(53), nullable=False),
+        sa.Column('success_rate', sa.Float(53), nullable=False),
+        sa.Column('consecutive_failures', sa.Integer(), nullable=False),
+        sa.Column('disabled_until', sa.DateTime(timezone=True)),
+        sa.Column('attempts_count', sa.Integer()),
+        sa.Column('success_count', sa.Integer()),
+        sa.Column('consecutive_no_numbers', sa.Integer()),
+        sa.Column('total_requests', sa.Integer()),
+        sa.Column('successful_activations', sa.Integer()),
+        sa.Column('failed_activations', sa.Integer()),
+        sa.Column('hanging_activations', sa.Integer()),
+        sa.Column('manual_rating', sa.Integer()),
+        sa.Column('disabled_reason', sa.String(length=255)),
+        sa.Column('last_success_at', sa.DateTime(timezone=True)),
+        sa.Column('last_failure_at', sa.DateTime(timezone=True)),
+        sa.Column('last_no_numbers_at', sa.DateTime(timezone=True)),
+        sa.Column('last_stats_reset', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        if_not_exists=True
+    )
+
+    op.create_table(
+        'system_config',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('key', sa.String(length=100), nullable=False),
+        sa.Column('value', postgresql.JSONB(), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('category', sa.String(length=50)),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in (
+            'system_config',
+            'provider_route_stats',
+            'provider_balance_snapshots',
+            'provider_routes',
+            'country_reference',
+            'service_reference',
+            'payment_history',
+            'history',
+            'providers',
+            'status_types',
+            'users',
+    ):
+        op.drop_table(table, if_exists=True)
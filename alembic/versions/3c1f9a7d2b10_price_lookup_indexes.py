@@ -0,0 +1,68 @@
+"""price lookup indexes
+
+Revision ID: 3c1f9a7d2b10
+Revises: 5d1c8a2f6e93
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9a7d2b10'
+down_revision: Union[str, Sequence[str], None] = '5d1c8a2f6e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не работает внутри транзакции, а provider_routes большая и горячая
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_provider_routes_country_service_active_price',
+            'provider_routes',
+            ['country_code', 'service_code', 'is_active', 'client_price'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_provider_routes_service_country_active_price',
+            'provider_routes',
+            ['service_code', 'country_code', 'is_active', 'client_price'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_route_summary_country_service',
+            'route_summary',
+            ['country_code', 'service_code'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_route_summary_country_service',
+            table_name='route_summary',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+        op.drop_index(
+            'ix_provider_routes_service_country_active_price',
+            table_name='provider_routes',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+        op.drop_index(
+            'ix_provider_routes_country_service_active_price',
+            table_name='provider_routes',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
@@ -0,0 +1,265 @@
+"""route summary change version
+
+Revision ID: 8e52d0c4a9f3
+Revises: 3c1f9a7d2b10
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e52d0c4a9f3'
+down_revision: Union[str, Sequence[str], None] = '3c1f9a7d2b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQL зафиксирован в том виде, в каком он был на этой ревизии: код приложения
+# с тех пор менялся, а миграция должна устанавливать ровно эти функции и триггеры
+ROUTE_SUMMARY_DDL_LOCK = "SELECT pg_advisory_xact_lock(724301)"
+
+# change_version растёт только при изменении цены, VIP-цены или доступности ключа.
+# Ключи без активных маршрутов не удаляются, а остаются "надгробиями" с пустой ценой,
+# чтобы лента изменений могла сообщить клиентам об их исчезновении.
+ROUTE_SUMMARY_CHANGE_VERSION = [
+    "CREATE SEQUENCE IF NOT EXISTS route_summary_change_seq",
+    "ALTER TABLE route_summary ADD COLUMN IF NOT EXISTS change_version BIGINT NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS ix_route_summary_change_version ON route_summary (change_version)",
+]
+
+ROUTE_SUMMARY_RECOMPUTE_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_summary_recompute(p_service_codes text[], p_country_codes text[])
+RETURNS void AS $$
+BEGIN
+    -- Сериализуем пересчёт одного ключа между конкурентными транзакциями
+    PERFORM pg_advisory_xact_lock(hashtext(k.service_code || '|' || k.country_code))
+    FROM (
+        SELECT DISTINCT u.service_code, u.country_code
+        FROM unnest(p_service_codes, p_country_codes) AS u(service_code, country_code)
+        ORDER BY 1, 2
+    ) k;
+
+    INSERT INTO route_summary AS rs (
+        service_code, country_code, min_price, min_vip_price,
+        max_available, is_available, routes_count, updated_at, change_version
+    )
+    SELECT
+        pr.service_code,
+        pr.country_code,
+        min(pr.client_price),
+        min(pr.vip_client_price),
+        max(pr.available_count),
+        bool_or(pr.available_count > 0),
+        count(*),
+        now(),
+        nextval('route_summary_change_seq')
+    FROM provider_routes pr
+    JOIN unnest(p_service_codes, p_country_codes) AS k(service_code, country_code)
+        ON pr.service_code = k.service_code AND pr.country_code = k.country_code
+    WHERE pr.is_active
+    GROUP BY pr.service_code, pr.country_code
+    ON CONFLICT (service_code, country_code) DO UPDATE SET
+        min_price = EXCLUDED.min_price,
+        min_vip_price = EXCLUDED.min_vip_price,
+        max_available = EXCLUDED.max_available,
+        is_available = EXCLUDED.is_available,
+        routes_count = EXCLUDED.routes_count,
+        updated_at = EXCLUDED.updated_at,
+        change_version = CASE
+            WHEN (rs.min_price, rs.min_vip_price, rs.is_available)
+                IS DISTINCT FROM (EXCLUDED.min_price, EXCLUDED.min_vip_price, EXCLUDED.is_available)
+            THEN EXCLUDED.change_version
+            ELSE rs.change_version
+        END
+    WHERE (rs.min_price, rs.min_vip_price, rs.max_available, rs.is_available, rs.routes_count)
+        IS DISTINCT FROM (EXCLUDED.min_price, EXCLUDED.min_vip_price, EXCLUDED.max_available,
+                          EXCLUDED.is_available, EXCLUDED.routes_count);
+
+    UPDATE route_summary rs SET
+        min_price = NULL,
+        min_vip_price = NULL,
+        max_available = 0,
+        is_available = false,
+        routes_count = 0,
+        updated_at = now(),
+        change_version = nextval('route_summary_change_seq')
+    FROM unnest(p_service_codes, p_country_codes) AS k(service_code, country_code)
+    WHERE rs.service_code = k.service_code
+      AND rs.country_code = k.country_code
+      AND rs.routes_count > 0
+      AND NOT EXISTS (
+          SELECT 1 FROM provider_routes pr
+          WHERE pr.service_code = k.service_code
+            AND pr.country_code = k.country_code
+            AND pr.is_active
+      );
+END;
+$$ LANGUAGE plpgsql
+"""
+
+ROUTE_SUMMARY_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_summary_on_routes_change()
+RETURNS trigger AS $$
+DECLARE
+    v_service_codes text[];
+    v_country_codes text[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(k.service_code), array_agg(k.country_code)
+        INTO v_service_codes, v_country_codes
+        FROM (SELECT DISTINCT service_code, country_code FROM new_routes) k;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(k.service_code), array_agg(k.country_code)
+        INTO v_service_codes, v_country_codes
+        FROM (SELECT DISTINCT service_code, country_code FROM old_routes) k;
+    ELSE
+        -- Обновления статистики (rating_score, attempts и т.п.) агрегат не меняют
+        SELECT array_agg(k.service_code), array_agg(k.country_code)
+        INTO v_service_codes, v_country_codes
+        FROM (
+            SELECT n.service_code, n.country_code
+            FROM new_routes n JOIN old_routes o ON o.id = n.id
+            WHERE (n.service_code, n.country_code, n.client_price, n.vip_client_price,
+                   n.available_count, n.is_active)
+                IS DISTINCT FROM
+                  (o.service_code, o.country_code, o.client_price, o.vip_client_price,
+                   o.available_count, o.is_active)
+            UNION
+            SELECT o.service_code, o.country_code
+            FROM new_routes n JOIN old_routes o ON o.id = n.id
+            WHERE (n.service_code, n.country_code) IS DISTINCT FROM (o.service_code, o.country_code)
+        ) k;
+    END IF;
+
+    IF v_service_codes IS NOT NULL THEN
+        PERFORM route_summary_recompute(v_service_codes, v_country_codes);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+ROUTE_SUMMARY_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS route_summary_after_insert ON provider_routes",
+    """
+    CREATE TRIGGER route_summary_after_insert
+    AFTER INSERT ON provider_routes
+    REFERENCING NEW TABLE AS new_routes
+    FOR EACH STATEMENT EXECUTE FUNCTION route_summary_on_routes_change()
+    """,
+    "DROP TRIGGER IF EXISTS route_summary_after_update ON provider_routes",
+    """
+    CREATE TRIGGER route_summary_after_update
+    AFTER UPDATE ON provider_routes
+    REFERENCING OLD TABLE AS old_routes NEW TABLE AS new_routes
+    FOR EACH STATEMENT EXECUTE FUNCTION route_summary_on_routes_change()
+    """,
+    "DROP TRIGGER IF EXISTS route_summary_after_delete ON provider_routes",
+    """
+    CREATE TRIGGER route_summary_after_delete
+    AFTER DELETE ON provider_routes
+    REFERENCING OLD TABLE AS old_routes
+    FOR EACH STATEMENT EXECUTE FUNCTION route_summary_on_routes_change()
+    """,
+]
+
+# Первичное заполнение, только если таблица только что создана и пуста
+ROUTE_SUMMARY_BACKFILL = """
+INSERT INTO route_summary (
+    service_code, country_code, min_price, min_vip_price,
+    max_available, is_available, routes_count, updated_at, change_version
+)
+SELECT
+    service_code,
+    country_code,
+    min(client_price),
+    min(vip_client_price),
+    max(available_count),
+    bool_or(available_count > 0),
+    count(*),
+    now(),
+    nextval('route_summary_change_seq')
+FROM provider_routes
+WHERE is_active AND NOT EXISTS (SELECT 1 FROM route_summary)
+GROUP BY service_code, country_code
+"""
+
+ROUTE_SUMMARY_DDL = [
+    ROUTE_SUMMARY_DDL_LOCK,
+    *ROUTE_SUMMARY_CHANGE_VERSION,
+    ROUTE_SUMMARY_RECOMPUTE_FUNCTION,
+    ROUTE_SUMMARY_TRIGGER_FUNCTION,
+    *ROUTE_SUMMARY_TRIGGERS,
+    ROUTE_SUMMARY_BACKFILL,
+]
+
+# Функция пересчёта предыдущей ревизии, без change_version: её возвращает downgrade
+PREVIOUS_RECOMPUTE_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_summary_recompute(p_service_codes text[], p_country_codes text[])
+RETURNS void AS $$
+BEGIN
+    -- Сериализуем пересчёт одного ключа между конкурентными транзакциями
+    PERFORM pg_advisory_xact_lock(hashtext(k.service_code || '|' || k.country_code))
+    FROM (
+        SELECT DISTINCT u.service_code, u.country_code
+        FROM unnest(p_service_codes, p_country_codes) AS u(service_code, country_code)
+        ORDER BY 1, 2
+    ) k;
+
+    INSERT INTO route_summary AS rs (
+        service_code, country_code, min_price, min_vip_price,
+        max_available, is_available, routes_count, updated_at
+    )
+    SELECT
+        pr.service_code,
+        pr.country_code,
+        min(pr.client_price),
+        min(pr.vip_client_price),
+        max(pr.available_count),
+        bool_or(pr.available_count > 0),
+        count(*),
+        now()
+    FROM provider_routes pr
+    JOIN unnest(p_service_codes, p_country_codes) AS k(service_code, country_code)
+        ON pr.service_code = k.service_code AND pr.country_code = k.country_code
+    WHERE pr.is_active
+    GROUP BY pr.service_code, pr.country_code
+    ON CONFLICT (service_code, country_code) DO UPDATE SET
+        min_price = EXCLUDED.min_price,
+        min_vip_price = EXCLUDED.min_vip_price,
+        max_available = EXCLUDED.max_available,
+        is_available = EXCLUDED.is_available,
+        routes_count = EXCLUDED.routes_count,
+        updated_at = EXCLUDED.updated_at;
+
+    DELETE FROM route_summary rs
+    USING unnest(p_service_codes, p_country_codes) AS k(service_code, country_code)
+    WHERE rs.service_code = k.service_code
+      AND rs.country_code = k.country_code
+      AND NOT EXISTS (
+          SELECT 1 FROM provider_routes pr
+          WHERE pr.service_code = k.service_code
+            AND pr.country_code = k.country_code
+            AND pr.is_active
+      );
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Колонка change_version, её последовательность и новые версии триггерных функций
+    for statement in ROUTE_SUMMARY_DDL:
+        op.execute(sa.text(statement))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.text(PREVIOUS_RECOMPUTE_FUNCTION))
+    op.execute("DROP INDEX IF EXISTS ix_route_summary_change_version")
+    op.execute("ALTER TABLE route_summary DROP COLUMN IF EXISTS change_version")
+    op.execute("DROP SEQUENCE IF EXISTS route_summary_change_seq")
@@ -0,0 +1,49 @@
+"""history keyset indexes
+
+Revision ID: a4c7e2d9b613
+Revises: f3b8a5e2c917
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c7e2d9b613'
+down_revision: Union[str, Sequence[str], None] = 'f3b8a5e2c917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_history_user_created_id', ['user_id', 'created_at', 'id']),
+    ('ix_history_status_created_id', ['status_id', 'created_at', 'id']),
+    ('ix_history_created_id', ['created_at', 'id']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # history большая и пишется постоянно: строим индексы без блокировки записи
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name,
+                'history',
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(
+                name,
+                table_name='history',
+                postgresql_concurrently=True,
+                if_exists=True
+            )
@@ -0,0 +1,75 @@
+"""provider routes touch trigger
+
+Revision ID: b7d4e1f20c58
+Revises: 8e52d0c4a9f3
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4e1f20c58'
+down_revision: Union[str, Sequence[str], None] = '8e52d0c4a9f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQL зафиксирован в том виде, в каком он был на этой ревизии: код приложения
+# может меняться, а миграция должна устанавливать ровно эту функцию и триггер
+PROVIDER_ROUTES_TOUCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION provider_routes_touch()
+RETURNS trigger AS $$
+BEGIN
+    IF (NEW.service_code, NEW.country_code, NEW.client_price, NEW.vip_client_price,
+        NEW.available_count, NEW.rating_score, NEW.is_active)
+        IS DISTINCT FROM
+       (OLD.service_code, OLD.country_code, OLD.client_price, OLD.vip_client_price,
+        OLD.available_count, OLD.rating_score, OLD.is_active)
+    THEN
+        NEW.updated_at = now();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+PROVIDER_ROUTES_TOUCH_TRIGGER = [
+    "DROP TRIGGER IF EXISTS provider_routes_touch_before_update ON provider_routes",
+    """
+    CREATE TRIGGER provider_routes_touch_before_update
+    BEFORE UPDATE ON provider_routes
+    FOR EACH ROW EXECUTE FUNCTION provider_routes_touch()
+    """,
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.text(PROVIDER_ROUTES_TOUCH_FUNCTION))
+    for statement in PROVIDER_ROUTES_TOUCH_TRIGGER:
+        op.execute(sa.text(statement))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_provider_routes_updated_at',
+            'provider_routes',
+            ['updated_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_provider_routes_updated_at',
+            table_name='provider_routes',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+    op.execute("DROP TRIGGER IF EXISTS provider_routes_touch_before_update ON provider_routes")
+    op.execute("DROP FUNCTION IF EXISTS provider_routes_touch()")
@@ -0,0 +1,183 @@
+"""route summary xid versions
+
+Revision ID: c8e1f4a7b2d5
+Revises: a4c7e2d9b613
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e1f4a7b2d5'
+down_revision: Union[str, Sequence[str], None] = 'a4c7e2d9b613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# change_version — номер транзакции, записавшей изменение, вместо значения последовательности.
+# SQL зафиксирован в том виде, в каком он был на этой ревизии
+ROUTE_SUMMARY_RECOMPUTE_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_summary_recompute(p_service_codes text[], p_country_codes text[])
+RETURNS void AS $$
+DECLARE
+    v_version bigint := pg_current_xact_id()::text::bigint;
+BEGIN
+    -- Сериализуем пересчёт одного ключа между конкурентными транзакциями
+    PERFORM pg_advisory_xact_lock(hashtext(k.service_code || '|' || k.country_code))
+    FROM (
+        SELECT DISTINCT u.service_code, u.country_code
+        FROM unnest(p_service_codes, p_country_codes) AS u(service_code, country_code)
+        ORDER BY 1, 2
+    ) k;
+
+    INSERT INTO route_summary AS rs (
+        service_code, country_code, min_price, min_vip_price,
+        max_available, is_available, routes_count, updated_at, change_version
+    )
+    SELECT
+        pr.service_code,
+        pr.country_code,
+        min(pr.client_price),
+        min(pr.vip_client_price),
+        max(pr.available_count),
+        bool_or(pr.available_count > 0),
+        count(*),
+        now(),
+        v_version
+    FROM provider_routes pr
+    JOIN unnest(p_service_codes, p_country_codes) AS k(service_code, country_code)
+        ON pr.service_code = k.service_code AND pr.country_code = k.country_code
+    WHERE pr.is_active
+    GROUP BY pr.service_code, pr.country_code
+    ON CONFLICT (service_code, country_code) DO UPDATE SET
+        min_price = EXCLUDED.min_price,
+        min_vip_price = EXCLUDED.min_vip_price,
+        max_available = EXCLUDED.max_available,
+        is_available = EXCLUDED.is_available,
+        routes_count = EXCLUDED.routes_count,
+        updated_at = EXCLUDED.updated_at,
+        change_version = CASE
+            WHEN (rs.min_price, rs.min_vip_price, rs.is_available)
+                IS DISTINCT FROM (EXCLUDED.min_price, EXCLUDED.min_vip_price, EXCLUDED.is_available)
+            THEN EXCLUDED.change_version
+            ELSE rs.change_version
+        END
+    WHERE (rs.min_price, rs.min_vip_price, rs.max_available, rs.is_available, rs.routes_count)
+        IS DISTINCT FROM (EXCLUDED.min_price, EXCLUDED.min_vip_price, EXCLUDED.max_available,
+                          EXCLUDED.is_available, EXCLUDED.routes_count);
+
+    UPDATE route_summary rs SET
+        min_price = NULL,
+        min_vip_price = NULL,
+        max_available = 0,
+        is_available = false,
+        routes_count = 0,
+        updated_at = now(),
+        change_version = v_version
+    FROM unnest(p_service_codes, p_country_codes) AS k(service_code, country_code)
+    WHERE rs.service_code = k.service_code
+      AND rs.country_code = k.country_code
+      AND rs.routes_count > 0
+      AND NOT EXISTS (
+          SELECT 1 FROM provider_routes pr
+          WHERE pr.service_code = k.service_code
+            AND pr.country_code = k.country_code
+            AND pr.is_active
+      );
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Функция пересчёта на последовательности, которую возвращает downgrade
+PREVIOUS_RECOMPUTE_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_summary_recompute(p_service_codes text[], p_country_codes text[])
+RETURNS void AS $$
+BEGIN
+    -- Сериализуем пересчёт одного ключа между конкурентными транзакциями
+    PERFORM pg_advisory_xact_lock(hashtext(k.service_code || '|' || k.country_code))
+    FROM (
+        SELECT DISTINCT u.service_code, u.country_code
+        FROM unnest(p_service_codes, p_country_codes) AS u(service_code, country_code)
+        ORDER BY 1, 2
+    ) k;
+
+    INSERT INTO route_summary AS rs (
+        service_code, country_code, min_price, min_vip_price,
+        max_available, is_available, routes_count, updated_at, change_version
+    )
+    SELECT
+        pr.service_code,
+        pr.country_code,
+        min(pr.client_price),
+        min(pr.vip_client_price),
+        max(pr.available_count),
+        bool_or(pr.available_count > 0),
+        count(*),
+        now(),
+        nextval('route_summary_change_seq')
+    FROM provider_routes pr
+    JOIN unnest(p_service_codes, p_country_codes) AS k(service_code, country_code)
+        ON pr.service_code = k.service_code AND pr.country_code = k.country_code
+    WHERE pr.is_active
+    GROUP BY pr.service_code, pr.country_code
+    ON CONFLICT (service_code, country_code) DO UPDATE SET
+        min_price = EXCLUDED.min_price,
+        min_vip_price = EXCLUDED.min_vip_price,
+        max_available = EXCLUDED.max_available,
+        is_available = EXCLUDED.is_available,
+        routes_count = EXCLUDED.routes_count,
+        updated_at = EXCLUDED.updated_at,
+        change_version = CASE
+            WHEN (rs.min_price, rs.min_vip_price, rs.is_available)
+                IS DISTINCT FROM (EXCLUDED.min_price, EXCLUDED.min_vip_price, EXCLUDED.is_available)
+            THEN EXCLUDED.change_version
+            ELSE rs.change_version
+        END
+    WHERE (rs.min_price, rs.min_vip_price, rs.max_available, rs.is_available, rs.routes_count)
+        IS DISTINCT FROM (EXCLUDED.min_price, EXCLUDED.min_vip_price, EXCLUDED.max_available,
+                          EXCLUDED.is_available, EXCLUDED.routes_count);
+
+    UPDATE route_summary rs SET
+        min_price = NULL,
+        min_vip_price = NULL,
+        max_available = 0,
+        is_available = false,
+        routes_count = 0,
+        updated_at = now(),
+        change_version = nextval('route_summary_change_seq')
+    FROM unnest(p_service_codes, p_country_codes) AS k(service_code, country_code)
+    WHERE rs.service_code = k.service_code
+      AND rs.country_code = k.country_code
+      AND rs.routes_count > 0
+      AND NOT EXISTS (
+          SELECT 1 FROM provider_routes pr
+          WHERE pr.service_code = k.service_code
+            AND pr.country_code = k.country_code
+            AND pr.is_active
+      );
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("SELECT pg_advisory_xact_lock(724301)")
+    op.execute(sa.text(ROUTE_SUMMARY_RECOMPUTE_FUNCTION))
+    # Старые версии из последовательности несравнимы с номерами транзакций:
+    # все ключи получают версию этой миграции, клиенты со старой версией получат ресинхронизацию
+    op.execute("UPDATE route_summary SET change_version = pg_current_xact_id()::text::bigint")
+    op.execute("DROP SEQUENCE IF EXISTS route_summary_change_seq")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("CREATE SEQUENCE IF NOT EXISTS route_summary_change_seq")
+    op.execute(
+        "SELECT setval('route_summary_change_seq', "
+        "greatest((SELECT max(change_version) FROM route_summary), 0) + 1, false)"
+    )
+    op.execute(sa.text(PREVIOUS_RECOMPUTE_FUNCTION))
@@ -0,0 +1,53 @@
+"""provider routes unique key
+
+Revision ID: d2a9c6e81f47
+Revises: b7d4e1f20c58
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a9c6e81f47'
+down_revision: Union[str, Sequence[str], None] = 'b7d4e1f20c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Ключ ON CONFLICT для импорта прайс-листов. Дубликаты маршрутов поставщика
+    # сводим к одному, оставляя самый свежий: иначе уникальный индекс не построится
+    op.execute("""
+        DELETE FROM provider_routes pr
+        USING provider_routes newer
+        WHERE pr.provider_id = newer.provider_id
+          AND pr.country_code = newer.country_code
+          AND pr.service_code = newer.service_code
+          AND pr.id < newer.id
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_provider_routes_provider_country_service',
+            'provider_routes',
+            ['provider_id', 'country_code', 'service_code'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'uq_provider_routes_provider_country_service',
+            table_name='provider_routes',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
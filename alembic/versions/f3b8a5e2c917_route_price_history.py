@@ -0,0 +1,196 @@
+"""route price history
+
+Revision ID: f3b8a5e2c917
+Revises: d2a9c6e81f47
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8a5e2c917'
+down_revision: Union[str, Sequence[str], None] = 'd2a9c6e81f47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQL зафиксирован в том виде, в каком он был на этой ревизии: код приложения
+# может меняться, а миграция должна устанавливать ровно эти функции и триггеры
+PRICE_HISTORY_DDL_LOCK = "SELECT pg_advisory_xact_lock(724302)"
+
+PRICE_ROLLUP_ADD_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_price_rollup_add(p_ids bigint[])
+RETURNS void AS $$
+    INSERT INTO route_price_rollup AS r (
+        service_code, country_code, provider_id, resolution, bucket,
+        cost_min, cost_max, cost_last, client_min, client_max, client_last, samples, last_at
+    )
+    SELECT
+        h.service_code,
+        h.country_code,
+        h.provider_id,
+        res.resolution,
+        date_trunc(res.resolution, h.recorded_at),
+        h.cost_price, h.cost_price, h.cost_price,
+        h.client_price, h.client_price, h.client_price,
+        1,
+        h.recorded_at
+    FROM route_price_history h
+    CROSS JOIN (VALUES ('hour'), ('day')) AS res(resolution)
+    WHERE h.id = ANY(p_ids)
+    ON CONFLICT (service_code, country_code, provider_id, resolution, bucket) DO UPDATE SET
+        cost_min = LEAST(r.cost_min, EXCLUDED.cost_min),
+        cost_max = GREATEST(r.cost_max, EXCLUDED.cost_max),
+        client_min = LEAST(r.client_min, EXCLUDED.client_min),
+        client_max = GREATEST(r.client_max, EXCLUDED.client_max),
+        -- Конкурентные транзакции могут закоммититься не по порядку, last — по времени точки
+        cost_last = CASE WHEN EXCLUDED.last_at >= r.last_at THEN EXCLUDED.cost_last ELSE r.cost_last END,
+        client_last = CASE WHEN EXCLUDED.last_at >= r.last_at THEN EXCLUDED.client_last ELSE r.client_last END,
+        last_at = GREATEST(r.last_at, EXCLUDED.last_at),
+        samples = r.samples + EXCLUDED.samples
+$$ LANGUAGE sql
+"""
+
+PRICE_HISTORY_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_price_history_on_routes_change()
+RETURNS trigger AS $$
+DECLARE
+    v_ids bigint[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        WITH inserted AS (
+            INSERT INTO route_price_history (
+                provider_id, service_code, country_code, cost_price, client_price, vip_client_price, recorded_at
+            )
+            SELECT n.provider_id, n.service_code, n.country_code,
+                   n.cost_price, n.client_price, n.vip_client_price, now()
+            FROM new_routes n
+            RETURNING id
+        )
+        SELECT array_agg(id) INTO v_ids FROM inserted;
+    ELSE
+        -- Остатки, рейтинг и статистика попыток историю цен не пополняют
+        WITH inserted AS (
+            INSERT INTO route_price_history (
+                provider_id, service_code, country_code, cost_price, client_price, vip_client_price, recorded_at
+            )
+            SELECT n.provider_id, n.service_code, n.country_code,
+                   n.cost_price, n.client_price, n.vip_client_price, now()
+            FROM new_routes n JOIN old_routes o ON o.id = n.id
+            WHERE (n.cost_price, n.client_price, n.vip_client_price)
+                IS DISTINCT FROM (o.cost_price, o.client_price, o.vip_client_price)
+            RETURNING id
+        )
+        SELECT array_agg(id) INTO v_ids FROM inserted;
+    END IF;
+
+    IF v_ids IS NOT NULL THEN
+        PERFORM route_price_rollup_add(v_ids);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+PRICE_HISTORY_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS route_price_history_after_insert ON provider_routes",
+    """
+    CREATE TRIGGER route_price_history_after_insert
+    AFTER INSERT ON provider_routes
+    REFERENCING NEW TABLE AS new_routes
+    FOR EACH STATEMENT EXECUTE FUNCTION route_price_history_on_routes_change()
+    """,
+    "DROP TRIGGER IF EXISTS route_price_history_after_update ON provider_routes",
+    """
+    CREATE TRIGGER route_price_history_after_update
+    AFTER UPDATE ON provider_routes
+    REFERENCING OLD TABLE AS old_routes NEW TABLE AS new_routes
+    FOR EACH STATEMENT EXECUTE FUNCTION route_price_history_on_routes_change()
+    """,
+]
+
+# Начальная точка для каждого маршрута, только если история только что создана и пуста
+PRICE_HISTORY_BACKFILL = """
+WITH inserted AS (
+    INSERT INTO route_price_history (
+        provider_id, service_code, country_code, cost_price, client_price, vip_client_price, recorded_at
+    )
+    SELECT provider_id, service_code, country_code, cost_price, client_price, vip_client_price, now()
+    FROM provider_routes
+    WHERE NOT EXISTS (SELECT 1 FROM route_price_history)
+    RETURNING id
+)
+SELECT route_price_rollup_add(array_agg(id)) FROM inserted
+"""
+
+PRICE_HISTORY_DDL = [
+    PRICE_HISTORY_DDL_LOCK,
+    PRICE_ROLLUP_ADD_FUNCTION,
+    PRICE_HISTORY_TRIGGER_FUNCTION,
+    *PRICE_HISTORY_TRIGGERS,
+    PRICE_HISTORY_BACKFILL,
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'route_price_history',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('provider_id', sa.Integer(), nullable=False),
+        sa.Column('service_code', sa.String(length=50), nullable=False),
+        sa.Column('country_code', sa.String(length=10), nullable=False),
+        sa.Column('cost_price', sa.Numeric(10, 4), nullable=False),
+        sa.Column('client_price', sa.Numeric(10, 4), nullable=False),
+        sa.Column('vip_client_price', sa.Numeric(10, 4)),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_route_price_history_route_recorded',
+        'route_price_history',
+        ['service_code', 'country_code', 'provider_id', 'recorded_at'],
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_route_price_history_recorded_at',
+        'route_price_history',
+        ['recorded_at'],
+        postgresql_using='brin',
+        if_not_exists=True
+    )
+
+    op.create_table(
+        'route_price_rollup',
+        sa.Column('service_code', sa.String(length=50), primary_key=True),
+        sa.Column('country_code', sa.String(length=10), primary_key=True),
+        sa.Column('provider_id', sa.Integer(), primary_key=True),
+        sa.Column('resolution', sa.String(length=8), primary_key=True),
+        sa.Column('bucket', sa.DateTime(timezone=True), primary_key=True),
+        sa.Column('cost_min', sa.Numeric(10, 4), nullable=False),
+        sa.Column('cost_max', sa.Numeric(10, 4), nullable=False),
+        sa.Column('cost_last', sa.Numeric(10, 4), nullable=False),
+        sa.Column('client_min', sa.Numeric(10, 4), nullable=False),
+        sa.Column('client_max', sa.Numeric(10, 4), nullable=False),
+        sa.Column('client_last', sa.Numeric(10, 4), nullable=False),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.Column('last_at', sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True
+    )
+
+    # Функции, триггеры и начальная точка истории
+    for statement in PRICE_HISTORY_DDL:
+        op.execute(sa.text(statement))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS route_price_history_after_insert ON provider_routes")
+    op.execute("DROP TRIGGER IF EXISTS route_price_history_after_update ON provider_routes")
+    op.execute("DROP FUNCTION IF EXISTS route_price_history_on_routes_change()")
+    op.execute("DROP FUNCTION IF EXISTS route_price_rollup_add(bigint[])")
+    op.drop_table('route_price_rollup', if_exists=True)
+    op.drop_table('route_price_history', if_exists=True)
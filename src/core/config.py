@@ -10,6 +10,16 @@ JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRATION = os.getenv("JWT_EXPIRATION", "4000")
 
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "30"))
+CATALOG_CHANGES_LIMIT = int(os.getenv("CATALOG_CHANGES_LIMIT", "5000"))
+CATALOG_STREAM_POLL_INTERVAL = float(os.getenv("CATALOG_STREAM_POLL_INTERVAL", "2"))
+PRICE_BATCH_MAX_PAIRS = int(os.getenv("PRICE_BATCH_MAX_PAIRS", "200"))
+BEST_ROUTE_SYNC_INTERVAL = float(os.getenv("BEST_ROUTE_SYNC_INTERVAL", "5"))
+BEST_ROUTE_RELOAD_INTERVAL = float(os.getenv("BEST_ROUTE_RELOAD_INTERVAL", "600"))
+PRICE_HISTORY_RAW_RETENTION_DAYS = int(os.getenv("PRICE_HISTORY_RAW_RETENTION_DAYS", "30"))
+PRICE_HISTORY_HOURLY_RETENTION_DAYS = int(os.getenv("PRICE_HISTORY_HOURLY_RETENTION_DAYS", "365"))
+PRICE_HISTORY_PRUNE_INTERVAL = float(os.getenv("PRICE_HISTORY_PRUNE_INTERVAL", "3600"))
+
 from dataclasses import dataclass
 
 @dataclass
@@ -1,9 +1,11 @@
 from src.core.di.service import *
 from src.core.di.repository import *
 from src.core.domain.entity.user import User
-from fastapi import Depends, HTTPException, Header
+from typing import Optional
+from fastapi import Depends, HTTPException, Header, Query
 from src.services.user_service import UserService
 from src.services.JWT_service import JWTService
+from src.services.price_catalog import DEFAULT_LOCALE, match_locale, negotiate_locale
 from src.core.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -51,4 +53,33 @@ async def get_current_user(
         raise
     except Exception as e:
         logger.error(f"Unexpected error in get_current_user: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+async def get_locale(
+        lang: Optional[str] = Query(None, max_length=35),
+        accept_language: Optional[str] = Header(None, alias="Accept-Language"),
+        authorization: Optional[str] = Header(None, alias="Authorization"),
+        jwt_service: JWTService = Depends(get_jwt_service),
+) -> str:
+    """
+    Язык ответа: явный параметр lang, затем язык пользователя из токена, затем Accept-Language.
+    Пользователь не читается из БД, язык берётся из claim lang, выданного при входе.
+    """
+    locale = match_locale(lang)
+    if locale:
+        return locale
+
+    if authorization and authorization.startswith("Bearer "):
+        locale = match_locale(jwt_service.get_language_from_token(authorization[7:]))
+        if locale:
+            return locale
+
+    return negotiate_locale(accept_language) or DEFAULT_LOCALE
+
+
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    if not current_user.is_admin:
+        logger.warning(f"User {current_user.id} tried to access admin endpoint")
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
@@ -10,9 +10,11 @@ from src.infrastructure.repository.service_repository import ServiceRepository
 from src.infrastructure.repository.country_repository import CountryRepository
 from src.infrastructure.repository.provider_route_repository import ProviderRouteRepository
 from src.infrastructure.repository.price_repository import PriceRepository
-from src.infrastructure.database.connection import get_db_session
+from src.infrastructure.database.connection import get_db_session, AsyncSessionLocal
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 
 def get_user_repo(session: AsyncSession = Depends(get_db_session)) -> IUserRepository:
@@ -51,6 +53,20 @@ def get_price_repo(session: AsyncSession = Depends(get_db_session)) -> IPriceRep
     return PriceRepository(session=session)
 
 
+@asynccontextmanager
+async def price_repo_scope() -> AsyncIterator[IPriceRepository]:
+    """Репозиторий цен с собственной сессией для фоновых задач вне запроса"""
+    async with AsyncSessionLocal() as session:
+        yield PriceRepository(session=session)
+
+
+@asynccontextmanager
+async def provider_route_repo_scope() -> AsyncIterator[IProviderRouteRepository]:
+    """Репозиторий маршрутов с собственной сессией: каждый импорт прайс-листа — отдельная транзакция"""
+    async with AsyncSessionLocal() as session:
+        yield ProviderRouteRepository(session=session)
+
+
 __all__ = [
     "get_user_repo",
     "get_provider_repo",
@@ -60,5 +76,7 @@ __all__ = [
     "get_service_repo",
     "get_country_repo",
     "get_provider_route_repo",
-    "get_price_repo"
+    "get_price_repo",
+    "price_repo_scope",
+    "provider_route_repo_scope"
 ]
@@ -7,10 +7,42 @@ from src.services.payment_service import PaymentService
 from src.core.di.repository import get_payment_repo
 from src.core.di.repository import get_price_repo
 from src.core.di.repository import get_order_repo
+from src.core.di.repository import price_repo_scope
+from src.core.di.repository import provider_route_repo_scope
+from src.core.config import CATALOG_REFRESH_INTERVAL, BEST_ROUTE_SYNC_INTERVAL, BEST_ROUTE_RELOAD_INTERVAL
+from src.core.config import CATALOG_STREAM_POLL_INTERVAL
+from src.core.config import (
+    PRICE_HISTORY_RAW_RETENTION_DAYS, PRICE_HISTORY_HOURLY_RETENTION_DAYS, PRICE_HISTORY_PRUNE_INTERVAL
+)
+from src.services.price_catalog import PriceCatalogCache
+from src.services.best_route_index import BestRouteIndex
+from src.services.single_flight import SingleFlight
 from src.services.price_service import PriceService
 from src.services.order_service import OrderService
+from src.services.route_import_service import RouteImportService
+from src.services.price_history_service import PriceHistoryService
+from src.services.repricing_service import RepricingService
+from datetime import timedelta
 from fastapi import Depends
 
+price_catalog = PriceCatalogCache(
+    repo_scope=price_repo_scope,
+    refresh_interval=CATALOG_REFRESH_INTERVAL,
+    stream_poll_interval=CATALOG_STREAM_POLL_INTERVAL
+)
+price_flights = SingleFlight()
+best_route_index = BestRouteIndex(
+    repo_scope=price_repo_scope,
+    sync_interval=BEST_ROUTE_SYNC_INTERVAL,
+    reload_interval=BEST_ROUTE_RELOAD_INTERVAL
+)
+price_history_service = PriceHistoryService(
+    repo_scope=provider_route_repo_scope,
+    raw_retention=timedelta(days=PRICE_HISTORY_RAW_RETENTION_DAYS),
+    hourly_retention=timedelta(days=PRICE_HISTORY_HOURLY_RETENTION_DAYS),
+    prune_interval=PRICE_HISTORY_PRUNE_INTERVAL
+)
+
 
 def get_user_service(user_repo=Depends(get_user_repo)) -> UserService:
     return UserService(user_repo=user_repo)
@@ -29,11 +61,29 @@ def get_heleket_service() -> HeleketService:
 def get_payment_service(payment_repo=Depends(get_payment_repo)) -> PaymentService:
     return PaymentService(payment_repo)
 
-def get_price_service(price_repo=Depends(get_price_repo)) -> PriceService:
-    return PriceService(price_repo)
+def get_price_catalog() -> PriceCatalogCache:
+    return price_catalog
+
+def get_price_service(price_repo=Depends(get_price_repo), catalog=Depends(get_price_catalog)) -> PriceService:
+    return PriceService(price_repo, catalog=catalog, flights=price_flights, repo_scope=price_repo_scope)
 
 def get_order_service(price_repo=Depends(get_price_repo), order_repo=Depends(get_order_repo), user_repo=Depends(get_user_repo)) -> OrderService:
-    return OrderService(price_repo=price_repo, order_repo=order_repo, user_repo=user_repo)
+    return OrderService(
+        price_repo=price_repo,
+        order_repo=order_repo,
+        user_repo=user_repo,
+        route_index=best_route_index,
+        catalog=price_catalog
+    )
+
+def get_route_import_service(catalog=Depends(get_price_catalog)) -> RouteImportService:
+    return RouteImportService(repo_scope=provider_route_repo_scope, catalog=catalog, route_index=best_route_index)
+
+def get_price_history_service() -> PriceHistoryService:
+    return price_history_service
+
+def get_repricing_service(catalog=Depends(get_price_catalog)) -> RepricingService:
+    return RepricingService(repo_scope=provider_route_repo_scope, catalog=catalog, route_index=best_route_index)
 
 __all__ = [
     "get_user_service",
@@ -41,6 +91,10 @@ __all__ = [
     "get_jwt_service",
     "get_heleket_service",
     "get_payment_service",
+    "get_price_catalog",
     "get_price_service",
-    "get_order_service"
+    "get_order_service",
+    "get_route_import_service",
+    "get_price_history_service",
+    "get_repricing_service"
 ]
\ No newline at end of file
@@ -32,4 +32,6 @@ class OrderListDTO(BaseModel):
     orders: list[OrderDTO]
     total: int
     page: int
-    size: int
\ No newline at end of file
+    size: int
+    # Курсор следующей страницы для ?cursor=; None — страница последняя
+    next_cursor: Optional[str] = None
\ No newline at end of file
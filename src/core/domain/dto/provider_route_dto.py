@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import List
+from src.core.domain.entity.provider_route import PriceHistoryPoint, RoutePriceRow
+from src.core.domain.dto.service_price_dto import ServiceCountryPairDTO
+
+class PriceListImportDTO(BaseModel):
+    rows: List[RoutePriceRow] = Field(min_length=1)
+    only_changed: bool = False
+
+class ProviderPriceListDTO(BaseModel):
+    provider_id: int
+    rows: List[RoutePriceRow] = Field(min_length=1)
+
+class PriceListImportResultDTO(BaseModel):
+    provider_id: int
+    received: int
+    affected: int
+    changed: List[ServiceCountryPairDTO] = []
+    duration_ms: int
+
+class PriceHistoryDTO(BaseModel):
+    service_code: str
+    country_code: str
+    provider_id: int
+    resolution: str
+    points: List[PriceHistoryPoint] = []
+
+class RepriceResultDTO(BaseModel):
+    total: int
+    changed: int
+    # Маршруты без подходящего правила сохраняют прежние цены
+    unpriced: int
+    raised_to_min_margin: int
+    dry_run: bool
+    duration_ms: int
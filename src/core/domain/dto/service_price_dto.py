@@ -1,5 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
+from src.core.config import PRICE_BATCH_MAX_PAIRS
+from src.core.domain.entity.service_price import ServicePrice, CatalogChange
 
 class ServiceCatalogDTO(BaseModel):
     service_code: str
@@ -29,4 +31,24 @@ class OrderPriceDTO(BaseModel):
     country_code: str
     price: float
     service_name: str
-    country_name: str
\ No newline at end of file
+    country_name: str
+
+class CatalogChangesDTO(BaseModel):
+    version: int
+    full_resync: bool
+    changes: List[CatalogChange] = []
+    catalog: Optional[List[ServicePrice]] = None
+
+class ServiceCountryPairDTO(BaseModel):
+    service_code: str = Field(min_length=1)
+    country_code: str = Field(min_length=1)
+
+class PriceBatchRequestDTO(BaseModel):
+    items: List[ServiceCountryPairDTO] = Field(min_length=1, max_length=PRICE_BATCH_MAX_PAIRS)
+
+class SuggestionDTO(BaseModel):
+    kind: str
+    code: str
+    name: str
+    name_en: Optional[str] = None
+    is_popular: bool = False
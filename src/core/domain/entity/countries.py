@@ -8,6 +8,7 @@ class CountryBase(BaseModel):
     iso_code: Optional[str] = None
     region: Optional[str] = None
     is_popular: bool = False
+    sort_order: int = 0
 
 class CountryPublic(CountryBase):
     class Config:
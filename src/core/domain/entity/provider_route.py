@@ -1,8 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, NamedTuple
 from datetime import datetime
 from decimal import Decimal
 
+
 class ProviderRoute(BaseModel):
     id: int
     provider_id: int
@@ -26,6 +27,7 @@ class ProviderRoute(BaseModel):
     class Config:
         from_attributes = True
 
+
 class BestProviderPrice(BaseModel):
     service_code: str
     country_code: str
@@ -37,4 +39,75 @@ class BestProviderPrice(BaseModel):
     rating: float = 50.0
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class RouteCandidate(BaseModel):
+    """Маршрут в индексе лучших цен: поля, по которым выбирается и отдаётся лучший маршрут"""
+    id: int
+    provider_id: int
+    provider_name: Optional[str] = None
+    service_code: str
+    country_code: str
+    client_price: Decimal
+    vip_client_price: Optional[Decimal] = None
+    available_count: int = 0
+    rating_score: float = 50.0
+    is_active: bool = True
+    service_name: Optional[str] = None
+    country_name: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RoutePriceRow(BaseModel):
+    """Строка прайс-листа поставщика; VIP-цена по умолчанию равна клиентской"""
+    service_code: str
+    country_code: str
+    provider_service_code: str
+    provider_country_code: str
+    cost_price: Decimal
+    client_price: Decimal
+    vip_client_price: Optional[Decimal] = None
+    available_count: int = 0
+    is_active: bool = True
+    external_product_id: Optional[str] = None
+
+
+class PriceHistoryPoint(BaseModel):
+    """Точка истории цен маршрута; у сырых точек min, max и last совпадают"""
+    at: datetime
+    cost_min: Decimal
+    cost_max: Decimal
+    cost_last: Decimal
+    client_min: Decimal
+    client_max: Decimal
+    client_last: Decimal
+    samples: int = 1
+
+
+class MarkupRule(BaseModel):
+    """
+    Наценка на себестоимость. Пустое поле подходит под любое значение,
+    правило без полей — глобальное. Побеждает самое конкретное правило.
+    """
+    provider_id: Optional[int] = None
+    service_code: Optional[str] = None
+    country_code: Optional[str] = None
+    markup_percent: Decimal = Field(ge=0)
+    # Без отдельной наценки VIP-цена считается по markup_percent
+    vip_markup_percent: Optional[Decimal] = Field(default=None, ge=0)
+
+
+class RouteCosts(NamedTuple):
+    """Колонки маршрутов для переоценки; без валидации pydantic, чтобы читать сотни тысяч строк"""
+    ids: List[int]
+    provider_ids: List[int]
+    service_codes: List[str]
+    country_codes: List[str]
+    cost_prices: List[Decimal]
+    min_margins: List[Optional[Decimal]]
+    client_prices: List[Decimal]
+    vip_client_prices: List[Decimal]
@@ -15,6 +15,26 @@ class ServicePrice(BaseModel):
     class Config:
         from_attributes = True
 
+class ServiceRoutePrice(ServicePrice):
+    """Лучшая цена вместе с маршрутом поставщика, который её даёт"""
+    provider_id: Optional[int] = None
+    provider_name: Optional[str] = None
+
+class CatalogChange(BaseModel):
+    """Изменение одной позиции каталога; removed означает, что позиция исчезла из продажи"""
+    service_code: str
+    country_code: str
+    price: Optional[float] = None
+    vip_price: Optional[float] = None
+    available: bool = False
+    removed: bool = False
+    country_name: Optional[str] = None
+    service_name: Optional[str] = None
+    version: int
+
+    class Config:
+        from_attributes = True
+
 class ServicePriceDetailed(BaseModel):
     service_code: str
     country_code: str
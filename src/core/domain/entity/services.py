@@ -8,6 +8,7 @@ class ServiceBase(BaseModel):
     icon: Optional[str] = None
     is_popular: bool = False
     description: Optional[str] = None
+    sort_order: int = 0
 
 class ServicePublic(ServiceBase):
     class Config:
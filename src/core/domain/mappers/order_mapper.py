@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Collection, Optional
 from src.core.domain.entity.orders import Order, OrderCreate
 from src.core.domain.dto.order_dto import OrderDTO, OrderCreateDTO
 
@@ -27,6 +27,36 @@ class OrderMapper:
             activ_id=order.activ_id
         )
 
+    @staticmethod
+    def entity_to_partial_dto(
+            order: Order,
+            fields: Collection[str],
+            service_name: Optional[str] = None,
+            country_name: Optional[str] = None,
+            provider_name: Optional[str] = None
+    ) -> OrderDTO:
+        """
+        OrderDTO с полями fields; заказ прочитан не целиком, поэтому без валидации.
+        id и created_at есть всегда: по ним строится курсор следующей страницы.
+        """
+        values = {
+            "id": order.id,
+            "service": getattr(order, "service", None),
+            "service_name": service_name,
+            "country_code": getattr(order, "country_code", None),
+            "country_name": country_name,
+            "phone_number": getattr(order, "number", None),
+            "price": getattr(order, "price", None),
+            "status": getattr(order, "status", None),
+            "provider_id": getattr(order, "provider_id", None),
+            "provider_name": provider_name,
+            "created_at": getattr(order, "created_at", None),
+            "updated_at": getattr(order, "updated_at", None),
+            "code": getattr(order, "code", None),
+            "activ_id": getattr(order, "activ_id", None),
+        }
+        return OrderDTO.model_construct(**{name: values[name] for name in {*fields, "id", "created_at"}})
+
     @staticmethod
     def create_dto_to_entity(order_dto: OrderCreateDTO, price: float, provider_id: Optional[int] = None) -> OrderCreate:
         return OrderCreate(
@@ -41,12 +71,21 @@ class OrderMapper:
             orders: list[Order],
             service_names: dict[str, str] = None,
             country_names: dict[str, str] = None,
-            provider_names: dict[int, str] = None
+            provider_names: dict[int, str] = None,
+            fields: Optional[Collection[str]] = None
     ) -> list[OrderDTO]:
         result = []
         for order in orders:
-            service_name = service_names.get(order.service) if service_names else None
-            country_name = country_names.get(order.country_code) if country_names else None
-            provider_name = provider_names.get(order.provider_id) if provider_names and order.provider_id else None
-            result.append(OrderMapper.entity_to_dto(order, service_name, country_name, provider_name))
+            service = getattr(order, "service", None)
+            country_code = getattr(order, "country_code", None)
+            provider_id = getattr(order, "provider_id", None)
+            service_name = service_names.get(service) if service_names else None
+            country_name = country_names.get(country_code) if country_names else None
+            provider_name = provider_names.get(provider_id) if provider_names and provider_id else None
+            if fields:
+                result.append(OrderMapper.entity_to_partial_dto(
+                    order, fields, service_name, country_name, provider_name
+                ))
+            else:
+                result.append(OrderMapper.entity_to_dto(order, service_name, country_name, provider_name))
         return result
\ No newline at end of file
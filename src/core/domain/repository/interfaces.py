@@ -1,7 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import Collection, List, Optional, Dict, Any, AsyncIterator, Tuple
+from datetime import datetime
+from decimal import Decimal
 from src.core.domain.entity.orders import Order, OrderCreate, OrderUpdate
-from src.core.domain.entity.service_price import ServicePrice
+from src.core.domain.entity.service_price import ServicePrice, ServiceRoutePrice, CatalogChange
+from src.core.domain.entity.provider_route import (
+    MarkupRule, PriceHistoryPoint, RouteCandidate, RouteCosts, RoutePriceRow
+)
+from src.core.domain.entity.services import ServicePublic
+from src.core.domain.entity.countries import CountryPublic
 
 
 
@@ -92,19 +99,43 @@ class IOrderRepository(ABC):
         pass
 
     @abstractmethod
-    async def get_by_user_id(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Order]:
+    async def get_by_user_id(
+            self,
+            user_id: int,
+            skip: int = 0,
+            limit: int = 100,
+            fields: Optional[Collection[str]] = None,
+            after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Order]:
+        """
+        fields — читать только эти поля Order; такие заказы частичные, без валидации.
+        after — (created_at, id) последнего заказа предыдущей страницы, вместо skip.
+        """
         pass
 
     @abstractmethod
-    async def get_by_status(self, status: str, skip: int = 0, limit: int = 100) -> List[Order]:
+    async def get_by_status(
+            self,
+            status: str,
+            skip: int = 0,
+            limit: int = 100,
+            fields: Optional[Collection[str]] = None,
+            after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Order]:
         pass
 
     @abstractmethod
-    async def get_active_orders(self, user_id: int) -> List[Order]:
+    async def get_active_orders(self, user_id: int, fields: Optional[Collection[str]] = None) -> List[Order]:
         pass
 
     @abstractmethod
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Order]:
+    async def get_all(
+            self,
+            skip: int = 0,
+            limit: int = 100,
+            fields: Optional[Collection[str]] = None,
+            after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Order]:
         pass
 
     @abstractmethod
@@ -157,7 +188,32 @@ class IPriceRepository(ABC):
         pass
 
     @abstractmethod
-    async def get_price_for_service_country(self, service_code: str, country_code: str) -> Optional[ServicePrice]:
+    def stream_service_catalog(self, batch_size: int = 500) -> AsyncIterator[List[ServicePrice]]:
+        pass
+
+    @abstractmethod
+    async def get_price_for_service_country(self, service_code: str, country_code: str) -> Optional[ServiceRoutePrice]:
+        pass
+
+    @abstractmethod
+    async def get_prices_for_pairs(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], ServiceRoutePrice]:
+        pass
+
+    @abstractmethod
+    async def get_route_price(
+            self,
+            provider_id: int,
+            service_code: str,
+            country_code: str
+    ) -> Optional[ServiceRoutePrice]:
+        pass
+
+    @abstractmethod
+    async def get_route_candidates(
+            self,
+            updated_since: Optional[datetime] = None,
+            keys: Optional[List[Tuple[str, str]]] = None
+    ) -> List[RouteCandidate]:
         pass
 
     @abstractmethod
@@ -184,6 +240,32 @@ class IPriceRepository(ABC):
     async def get_detailed_prices_for_service_country(self, service_code: str, country_code: str) -> List[Any]:
         pass
 
+    @abstractmethod
+    async def get_service_references(self) -> List[ServicePublic]:
+        pass
+
+    @abstractmethod
+    async def get_country_references(self) -> List[CountryPublic]:
+        pass
+
+    @abstractmethod
+    async def get_reference_names(
+            self,
+            service_codes: Collection[str],
+            country_codes: Collection[str],
+            provider_ids: Collection[int]
+    ) -> Tuple[Dict[str, str], Dict[str, str], Dict[int, str]]:
+        """Названия услуг, стран и поставщиков; не больше одного запроса на справочник"""
+        pass
+
+    @abstractmethod
+    async def get_catalog_change_version(self) -> int:
+        pass
+
+    @abstractmethod
+    async def get_catalog_changes(self, since: int, until: int, limit: int) -> List[CatalogChange]:
+        pass
+
 
 
 
@@ -244,6 +326,47 @@ class IProviderRouteRepository(IRepository):
     async def update_route_stats(self, route_id: int, success: bool, response_time_ms: int) -> bool:
         pass
 
+    @abstractmethod
+    async def import_price_list(
+            self,
+            provider_id: int,
+            rows: List[RoutePriceRow],
+            only_changed: bool = False
+    ) -> List[Tuple[str, str]]:
+        pass
+
+    @abstractmethod
+    async def get_price_history(
+            self,
+            service_code: str,
+            country_code: str,
+            provider_id: int,
+            since: datetime,
+            until: datetime,
+            resolution: str
+    ) -> List[PriceHistoryPoint]:
+        pass
+
+    @abstractmethod
+    async def prune_price_history(self, raw_before: datetime, hourly_before: datetime) -> Tuple[int, int]:
+        pass
+
+    @abstractmethod
+    async def get_route_costs(self) -> RouteCosts:
+        pass
+
+    @abstractmethod
+    async def apply_route_prices(self, updates: List[Tuple[int, Decimal, Decimal]]) -> int:
+        pass
+
+    @abstractmethod
+    async def get_markup_rules(self) -> List[MarkupRule]:
+        pass
+
+    @abstractmethod
+    async def save_markup_rules(self, rules: List[MarkupRule]) -> List[MarkupRule]:
+        pass
+
 class IStatusTypeRepository(IRepository):
     """Интерфейс репозитория типов статусов"""
 
@@ -1,5 +1,7 @@
 from src.infrastructure.database.base import Base
 from src.infrastructure.database.connection import engine
+from src.infrastructure.database import route_summary  # регистрирует триггеры route_summary в create_all
+from src.infrastructure.database import price_history  # регистрирует триггеры истории цен в create_all
 from src.core.logging_config import get_logger
 import asyncio
 from sqlalchemy.exc import OperationalError
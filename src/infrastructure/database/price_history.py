@@ -0,0 +1,147 @@
+"""
+Триггеры PostgreSQL, записывающие историю цен маршрутов.
+
+Каждый оператор над provider_routes, изменивший себестоимость, клиентскую или VIP-цену,
+одной вставкой добавляет точки в route_price_history и тут же обновляет
+почасовые и посуточные min/max/last в route_price_rollup. Так история пишется пачкой
+на каждый импорт прайс-листа или переоценку, кто бы их ни выполнил, а графики
+за длинные периоды читаются из свёрток без агрегации сырых точек.
+Сырые точки и почасовые свёртки старше срока хранения удаляет PriceHistoryService.
+
+Строка свёртки соответствует ровно одному маршруту: (provider_id, country_code, service_code)
+уникален в provider_routes. Её обновляет только транзакция, которая уже держит блокировку
+этого маршрута, поэтому триггеры не добавляют импорту и переоценке новых ожиданий
+и взаимоблокировок. Ошибка в триггере откатывает запись маршрутов целиком, без истории
+цена не меняется.
+"""
+from sqlalchemy import event
+
+from src.infrastructure.database.base import Base
+from src.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PRICE_HISTORY_DDL_LOCK = "SELECT pg_advisory_xact_lock(724302)"
+
+PRICE_ROLLUP_ADD_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_price_rollup_add(p_ids bigint[])
+RETURNS void AS $$
+    INSERT INTO route_price_rollup AS r (
+        service_code, country_code, provider_id, resolution, bucket,
+        cost_min, cost_max, cost_last, client_min, client_max, client_last, samples, last_at
+    )
+    SELECT
+        h.service_code,
+        h.country_code,
+        h.provider_id,
+        res.resolution,
+        date_trunc(res.resolution, h.recorded_at),
+        h.cost_price, h.cost_price, h.cost_price,
+        h.client_price, h.client_price, h.client_price,
+        1,
+        h.recorded_at
+    FROM route_price_history h
+    CROSS JOIN (VALUES ('hour'), ('day')) AS res(resolution)
+    WHERE h.id = ANY(p_ids)
+    ON CONFLICT (service_code, country_code, provider_id, resolution, bucket) DO UPDATE SET
+        cost_min = LEAST(r.cost_min, EXCLUDED.cost_min),
+        cost_max = GREATEST(r.cost_max, EXCLUDED.cost_max),
+        client_min = LEAST(r.client_min, EXCLUDED.client_min),
+        client_max = GREATEST(r.client_max, EXCLUDED.client_max),
+        -- Конкурентные транзакции могут закоммититься не по порядку, last — по времени точки
+        cost_last = CASE WHEN EXCLUDED.last_at >= r.last_at THEN EXCLUDED.cost_last ELSE r.cost_last END,
+        client_last = CASE WHEN EXCLUDED.last_at >= r.last_at THEN EXCLUDED.client_last ELSE r.client_last END,
+        last_at = GREATEST(r.last_at, EXCLUDED.last_at),
+        samples = r.samples + EXCLUDED.samples
+$$ LANGUAGE sql
+"""
+
+PRICE_HISTORY_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_price_history_on_routes_change()
+RETURNS trigger AS $$
+DECLARE
+    v_ids bigint[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        WITH inserted AS (
+            INSERT INTO route_price_history (
+                provider_id, service_code, country_code, cost_price, client_price, vip_client_price, recorded_at
+            )
+            SELECT n.provider_id, n.service_code, n.country_code,
+                   n.cost_price, n.client_price, n.vip_client_price, now()
+            FROM new_routes n
+            RETURNING id
+        )
+        SELECT array_agg(id) INTO v_ids FROM inserted;
+    ELSE
+        -- Остатки, рейтинг и статистика попыток историю цен не пополняют
+        WITH inserted AS (
+            INSERT INTO route_price_history (
+                provider_id, service_code, country_code, cost_price, client_price, vip_client_price, recorded_at
+            )
+            SELECT n.provider_id, n.service_code, n.country_code,
+                   n.cost_price, n.client_price, n.vip_client_price, now()
+            FROM new_routes n JOIN old_routes o ON o.id = n.id
+            WHERE (n.cost_price, n.client_price, n.vip_client_price)
+                IS DISTINCT FROM (o.cost_price, o.client_price, o.vip_client_price)
+            RETURNING id
+        )
+        SELECT array_agg(id) INTO v_ids FROM inserted;
+    END IF;
+
+    IF v_ids IS NOT NULL THEN
+        PERFORM route_price_rollup_add(v_ids);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+PRICE_HISTORY_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS route_price_history_after_insert ON provider_routes",
+    """
+    CREATE TRIGGER route_price_history_after_insert
+    AFTER INSERT ON provider_routes
+    REFERENCING NEW TABLE AS new_routes
+    FOR EACH STATEMENT EXECUTE FUNCTION route_price_history_on_routes_change()
+    """,
+    "DROP TRIGGER IF EXISTS route_price_history_after_update ON provider_routes",
+    """
+    CREATE TRIGGER route_price_history_after_update
+    AFTER UPDATE ON provider_routes
+    REFERENCING OLD TABLE AS old_routes NEW TABLE AS new_routes
+    FOR EACH STATEMENT EXECUTE FUNCTION route_price_history_on_routes_change()
+    """,
+]
+
+# Начальная точка для каждого маршрута, только если история только что создана и пуста
+PRICE_HISTORY_BACKFILL = """
+WITH inserted AS (
+    INSERT INTO route_price_history (
+        provider_id, service_code, country_code, cost_price, client_price, vip_client_price, recorded_at
+    )
+    SELECT provider_id, service_code, country_code, cost_price, client_price, vip_client_price, now()
+    FROM provider_routes
+    WHERE NOT EXISTS (SELECT 1 FROM route_price_history)
+    RETURNING id
+)
+SELECT route_price_rollup_add(array_agg(id)) FROM inserted
+"""
+
+PRICE_HISTORY_DDL = [
+    PRICE_HISTORY_DDL_LOCK,
+    PRICE_ROLLUP_ADD_FUNCTION,
+    PRICE_HISTORY_TRIGGER_FUNCTION,
+    *PRICE_HISTORY_TRIGGERS,
+    PRICE_HISTORY_BACKFILL,
+]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def install_price_history_triggers(target, connection, **kw):
+    if connection.dialect.name != "postgresql":
+        return
+
+    for statement in PRICE_HISTORY_DDL:
+        connection.exec_driver_sql(statement)
+    logger.info("✅ price history triggers installed")
@@ -0,0 +1,240 @@
+"""
+Триггеры PostgreSQL, поддерживающие таблицу route_summary в актуальном состоянии.
+
+route_summary хранит агрегат по активным маршрутам provider_routes для каждой пары
+(service_code, country_code): минимальные цены, максимальный остаток, доступность
+и номер последнего изменения для ленты /prices/changes.
+Пересчитываются только ключи, затронутые оператором, поэтому чтение каталога
+не требует GROUP BY по всей таблице маршрутов.
+
+Здесь же триггер, обновляющий provider_routes.updated_at при изменении полей,
+от которых зависит выбор лучшего маршрута: по нему индекс лучших цен
+подтягивает изменения, кто бы их ни записал.
+"""
+from sqlalchemy import event
+
+from src.infrastructure.database.base import Base
+from src.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Любой воркер при старте выполняет create_all, блокировка не даёт им
+# одновременно пересоздавать функции и триггеры
+ROUTE_SUMMARY_DDL_LOCK = "SELECT pg_advisory_xact_lock(724301)"
+
+# change_version меняется только при изменении цены, VIP-цены или доступности ключа.
+# Версия — номер транзакции, записавшей изменение, а не значение последовательности:
+# транзакция, которая ещё не закоммитилась, не моложе xmin снимка читателя, поэтому лента
+# отдаёт только версии ниже xmin и поздний коммит не проскакивает мимо клиента.
+# Ключи без активных маршрутов не удаляются, а остаются "надгробиями" с пустой ценой,
+# чтобы лента изменений могла сообщить клиентам об их исчезновении.
+ROUTE_SUMMARY_CHANGE_VERSION = [
+    "ALTER TABLE route_summary ADD COLUMN IF NOT EXISTS change_version BIGINT NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS ix_route_summary_change_version ON route_summary (change_version)",
+]
+
+ROUTE_SUMMARY_RECOMPUTE_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_summary_recompute(p_service_codes text[], p_country_codes text[])
+RETURNS void AS $$
+DECLARE
+    v_version bigint := pg_current_xact_id()::text::bigint;
+BEGIN
+    -- Сериализуем пересчёт одного ключа между конкурентными транзакциями
+    PERFORM pg_advisory_xact_lock(hashtext(k.service_code || '|' || k.country_code))
+    FROM (
+        SELECT DISTINCT u.service_code, u.country_code
+        FROM unnest(p_service_codes, p_country_codes) AS u(service_code, country_code)
+        ORDER BY 1, 2
+    ) k;
+
+    INSERT INTO route_summary AS rs (
+        service_code, country_code, min_price, min_vip_price,
+        max_available, is_available, routes_count, updated_at, change_version
+    )
+    SELECT
+        pr.service_code,
+        pr.country_code,
+        min(pr.client_price),
+        min(pr.vip_client_price),
+        max(pr.available_count),
+        bool_or(pr.available_count > 0),
+        count(*),
+        now(),
+        v_version
+    FROM provider_routes pr
+    JOIN unnest(p_service_codes, p_country_codes) AS k(service_code, country_code)
+        ON pr.service_code = k.service_code AND pr.country_code = k.country_code
+    WHERE pr.is_active
+    GROUP BY pr.service_code, pr.country_code
+    ON CONFLICT (service_code, country_code) DO UPDATE SET
+        min_price = EXCLUDED.min_price,
+        min_vip_price = EXCLUDED.min_vip_price,
+        max_available = EXCLUDED.max_available,
+        is_available = EXCLUDED.is_available,
+        routes_count = EXCLUDED.routes_count,
+        updated_at = EXCLUDED.updated_at,
+        change_version = CASE
+            WHEN (rs.min_price, rs.min_vip_price, rs.is_available)
+                IS DISTINCT FROM (EXCLUDED.min_price, EXCLUDED.min_vip_price, EXCLUDED.is_available)
+            THEN EXCLUDED.change_version
+            ELSE rs.change_version
+        END
+    WHERE (rs.min_price, rs.min_vip_price, rs.max_available, rs.is_available, rs.routes_count)
+        IS DISTINCT FROM (EXCLUDED.min_price, EXCLUDED.min_vip_price, EXCLUDED.max_available,
+                          EXCLUDED.is_available, EXCLUDED.routes_count);
+
+    UPDATE route_summary rs SET
+        min_price = NULL,
+        min_vip_price = NULL,
+        max_available = 0,
+        is_available = false,
+        routes_count = 0,
+        updated_at = now(),
+        change_version = v_version
+    FROM unnest(p_service_codes, p_country_codes) AS k(service_code, country_code)
+    WHERE rs.service_code = k.service_code
+      AND rs.country_code = k.country_code
+      AND rs.routes_count > 0
+      AND NOT EXISTS (
+          SELECT 1 FROM provider_routes pr
+          WHERE pr.service_code = k.service_code
+            AND pr.country_code = k.country_code
+            AND pr.is_active
+      );
+END;
+$$ LANGUAGE plpgsql
+"""
+
+ROUTE_SUMMARY_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION route_summary_on_routes_change()
+RETURNS trigger AS $$
+DECLARE
+    v_service_codes text[];
+    v_country_codes text[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(k.service_code), array_agg(k.country_code)
+        INTO v_service_codes, v_country_codes
+        FROM (SELECT DISTINCT service_code, country_code FROM new_routes) k;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(k.service_code), array_agg(k.country_code)
+        INTO v_service_codes, v_country_codes
+        FROM (SELECT DISTINCT service_code, country_code FROM old_routes) k;
+    ELSE
+        -- Обновления статистики (rating_score, attempts и т.п.) агрегат не меняют
+        SELECT array_agg(k.service_code), array_agg(k.country_code)
+        INTO v_service_codes, v_country_codes
+        FROM (
+            SELECT n.service_code, n.country_code
+            FROM new_routes n JOIN old_routes o ON o.id = n.id
+            WHERE (n.service_code, n.country_code, n.client_price, n.vip_client_price,
+                   n.available_count, n.is_active)
+                IS DISTINCT FROM
+                  (o.service_code, o.country_code, o.client_price, o.vip_client_price,
+                   o.available_count, o.is_active)
+            UNION
+            SELECT o.service_code, o.country_code
+            FROM new_routes n JOIN old_routes o ON o.id = n.id
+            WHERE (n.service_code, n.country_code) IS DISTINCT FROM (o.service_code, o.country_code)
+        ) k;
+    END IF;
+
+    IF v_service_codes IS NOT NULL THEN
+        PERFORM route_summary_recompute(v_service_codes, v_country_codes);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+ROUTE_SUMMARY_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS route_summary_after_insert ON provider_routes",
+    """
+    CREATE TRIGGER route_summary_after_insert
+    AFTER INSERT ON provider_routes
+    REFERENCING NEW TABLE AS new_routes
+    FOR EACH STATEMENT EXECUTE FUNCTION route_summary_on_routes_change()
+    """,
+    "DROP TRIGGER IF EXISTS route_summary_after_update ON provider_routes",
+    """
+    CREATE TRIGGER route_summary_after_update
+    AFTER UPDATE ON provider_routes
+    REFERENCING OLD TABLE AS old_routes NEW TABLE AS new_routes
+    FOR EACH STATEMENT EXECUTE FUNCTION route_summary_on_routes_change()
+    """,
+    "DROP TRIGGER IF EXISTS route_summary_after_delete ON provider_routes",
+    """
+    CREATE TRIGGER route_summary_after_delete
+    AFTER DELETE ON provider_routes
+    REFERENCING OLD TABLE AS old_routes
+    FOR EACH STATEMENT EXECUTE FUNCTION route_summary_on_routes_change()
+    """,
+]
+
+PROVIDER_ROUTES_TOUCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION provider_routes_touch()
+RETURNS trigger AS $$
+BEGIN
+    IF (NEW.service_code, NEW.country_code, NEW.client_price, NEW.vip_client_price,
+        NEW.available_count, NEW.rating_score, NEW.is_active)
+        IS DISTINCT FROM
+       (OLD.service_code, OLD.country_code, OLD.client_price, OLD.vip_client_price,
+        OLD.available_count, OLD.rating_score, OLD.is_active)
+    THEN
+        NEW.updated_at = now();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+PROVIDER_ROUTES_TOUCH_TRIGGER = [
+    "DROP TRIGGER IF EXISTS provider_routes_touch_before_update ON provider_routes",
+    """
+    CREATE TRIGGER provider_routes_touch_before_update
+    BEFORE UPDATE ON provider_routes
+    FOR EACH ROW EXECUTE FUNCTION provider_routes_touch()
+    """,
+]
+
+# Первичное заполнение, только если таблица только что создана и пуста
+ROUTE_SUMMARY_BACKFILL = """
+INSERT INTO route_summary (
+    service_code, country_code, min_price, min_vip_price,
+    max_available, is_available, routes_count, updated_at, change_version
+)
+SELECT
+    service_code,
+    country_code,
+    min(client_price),
+    min(vip_client_price),
+    max(available_count),
+    bool_or(available_count > 0),
+    count(*),
+    now(),
+    pg_current_xact_id()::text::bigint
+FROM provider_routes
+WHERE is_active AND NOT EXISTS (SELECT 1 FROM route_summary)
+GROUP BY service_code, country_code
+"""
+
+ROUTE_SUMMARY_DDL = [
+    ROUTE_SUMMARY_DDL_LOCK,
+    *ROUTE_SUMMARY_CHANGE_VERSION,
+    ROUTE_SUMMARY_RECOMPUTE_FUNCTION,
+    ROUTE_SUMMARY_TRIGGER_FUNCTION,
+    *ROUTE_SUMMARY_TRIGGERS,
+    ROUTE_SUMMARY_BACKFILL,
+    PROVIDER_ROUTES_TOUCH_FUNCTION,
+    *PROVIDER_ROUTES_TOUCH_TRIGGER,
+]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def install_route_summary_triggers(target, connection, **kw):
+    if connection.dialect.name != "postgresql":
+        return
+
+    for statement in ROUTE_SUMMARY_DDL:
+        connection.exec_driver_sql(statement)
+    logger.info("✅ route_summary triggers installed")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, BigInteger, Numeric, SmallInteger, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, BigInteger, Numeric, SmallInteger, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.infrastructure.database.base import Base
@@ -51,6 +51,13 @@ class OrderORM(Base):
     provider_id = Column(Integer, ForeignKey("providers.id"), index=True)
     client_ip = Column(INET)
 
+    # Ключи постраничной выдачи по курсору (created_at, id); B-tree читается и в обратном порядке
+    __table_args__ = (
+        Index("ix_history_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_history_status_created_id", "status_id", "created_at", "id"),
+        Index("ix_history_created_id", "created_at", "id"),
+    )
+
     # Relationships
     provider = relationship("ProviderORM", back_populates="orders")
     user = relationship("UserORM", back_populates="orders")
@@ -150,6 +157,87 @@ class ProviderRoutesORM(Base):
     notes = Column(Text)
     provider = relationship("ProviderORM", back_populates="routes")
 
+    __table_args__ = (
+        Index(
+            "ix_provider_routes_country_service_active_price",
+            "country_code", "service_code", "is_active", "client_price"
+        ),
+        Index(
+            "ix_provider_routes_service_country_active_price",
+            "service_code", "country_code", "is_active", "client_price"
+        ),
+        Index("ix_provider_routes_updated_at", "updated_at"),
+        Index(
+            "uq_provider_routes_provider_country_service",
+            "provider_id", "country_code", "service_code",
+            unique=True
+        ),
+    )
+
+class RouteSummaryORM(Base):
+    """Агрегат активных маршрутов по (service_code, country_code), ведётся триггерами provider_routes"""
+    __tablename__ = "route_summary"
+
+    service_code = Column(String(50), primary_key=True)
+    country_code = Column(String(10), primary_key=True)
+    min_price = Column(Numeric(10, 4))
+    min_vip_price = Column(Numeric(10, 4))
+    max_available = Column(Integer, nullable=False, default=0)
+    is_available = Column(Boolean, nullable=False, default=False)
+    routes_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    # id транзакции-писателя (pg_current_xact_id), выставляется триггерами; лента отдаёт
+    # только версии завершённых транзакций, поэтому поздний коммит не пропускается
+    change_version = Column(BigInteger, nullable=False, default=0, server_default="0", index=True)
+
+    __table_args__ = (
+        Index("ix_route_summary_country_service", "country_code", "service_code"),
+    )
+
+
+class RoutePriceHistoryORM(Base):
+    """Журнал изменений цен маршрутов, только добавление; пишется триггерами provider_routes"""
+    __tablename__ = "route_price_history"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    provider_id = Column(Integer, nullable=False)
+    service_code = Column(String(50), nullable=False)
+    country_code = Column(String(10), nullable=False)
+    cost_price = Column(Numeric(10, 4), nullable=False)
+    client_price = Column(Numeric(10, 4), nullable=False)
+    vip_client_price = Column(Numeric(10, 4))
+    recorded_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index(
+            "ix_route_price_history_route_recorded",
+            "service_code", "country_code", "provider_id", "recorded_at"
+        ),
+        # Очистка по времени на таблице, растущей по recorded_at
+        Index("ix_route_price_history_recorded_at", "recorded_at", postgresql_using="brin"),
+    )
+
+
+class RoutePriceRollupORM(Base):
+    """Почасовые и посуточные min/max/last цен маршрута, ведутся теми же триггерами"""
+    __tablename__ = "route_price_rollup"
+
+    service_code = Column(String(50), primary_key=True)
+    country_code = Column(String(10), primary_key=True)
+    provider_id = Column(Integer, primary_key=True)
+    # 'hour' или 'day', как первый аргумент date_trunc
+    resolution = Column(String(8), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    cost_min = Column(Numeric(10, 4), nullable=False)
+    cost_max = Column(Numeric(10, 4), nullable=False)
+    cost_last = Column(Numeric(10, 4), nullable=False)
+    client_min = Column(Numeric(10, 4), nullable=False)
+    client_max = Column(Numeric(10, 4), nullable=False)
+    client_last = Column(Numeric(10, 4), nullable=False)
+    samples = Column(Integer, nullable=False, default=0)
+    last_at = Column(DateTime(timezone=True), nullable=False)
+
+
 class ProviderORM(Base):
     """ORM для существующей таблицы providers"""
     __tablename__ = "providers"
@@ -236,6 +324,7 @@ __all__ = [
     "ServiceReferenceORM",
     "CountryReferenceORM",
     "ProviderRoutesORM",
+    "RouteSummaryORM",
     "ProviderORM",
     "ProviderBalanceSnapshotORM",
     "ProviderRouteStatsORM",
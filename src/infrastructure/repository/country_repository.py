@@ -74,5 +74,6 @@ class CountryRepository(ICountryRepository):
             name_en=country_orm.name_en,
             iso_code=country_orm.iso_code,
             region=country_orm.region,
-            is_popular=country_orm.is_popular
+            is_popular=bool(country_orm.is_popular),
+            sort_order=country_orm.sort_order or 0
         )
\ No newline at end of file
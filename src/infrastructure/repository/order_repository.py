@@ -1,12 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, and_
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy import select, update, and_, func, tuple_
+from typing import Collection, List, Optional, Tuple
 from datetime import datetime
 
 from src.core.domain.repository.interfaces import IOrderRepository
 from src.core.domain.entity.orders import Order, OrderCreate, OrderUpdate, OrderStatus
-from src.infrastructure.database.schemas import OrderORM, StatusTypeORM
+from src.infrastructure.database.schemas import OrderORM
+from src.infrastructure.repository.status_type_repository import StatusTypeRepository, StatusTypeTable
 from src.core.exceptions.exceptions import NotFoundException
 from src.core.logging_config import get_logger
 
@@ -14,126 +14,118 @@ from src.core.logging_config import get_logger
 class OrderRepository(IOrderRepository):
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.status_types = StatusTypeRepository(session)
         self.logger = get_logger(__name__)
 
     async def get_by_id(self, id: int) -> Optional[Order]:
         try:
             result = await self.session.execute(
-                select(OrderORM)
-                .options(selectinload(OrderORM.status))
-                .where(OrderORM.id == id)
+                select(OrderORM).where(OrderORM.id == id)
             )
             order_orm = result.scalar_one_or_none()
 
             if not order_orm:
                 return None
 
-            return self._orm_to_entity(order_orm)
+            return self._orm_to_entity(order_orm, await self.status_types.get_table_covering([order_orm.status_id]))
         except Exception as e:
             self.logger.error(f"Error getting order by id {id}: {e}")
             raise
 
-    async def get_by_user_id(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Order]:
+    async def get_by_user_id(
+            self,
+            user_id: int,
+            skip: int = 0,
+            limit: int = 100,
+            fields: Optional[Collection[str]] = None,
+            after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Order]:
         try:
             result = await self.session.execute(
-                select(OrderORM)
-                .options(selectinload(OrderORM.status))
+                self._page(self._select_orders(fields), skip, after)
                 .where(OrderORM.user_id == user_id)
-                .order_by(OrderORM.created_at.desc())
-                .offset(skip)
                 .limit(limit)
             )
-            orders_orm = result.scalars().all()
-
-            return [self._orm_to_entity(order_orm) for order_orm in orders_orm]
+            return await self._result_to_entities(result, fields)
         except Exception as e:
             self.logger.error(f"Error getting orders for user {user_id}: {e}")
             raise
 
-    async def get_by_status(self, status: str, skip: int = 0, limit: int = 100) -> List[Order]:
+    async def get_by_status(
+            self,
+            status: str,
+            skip: int = 0,
+            limit: int = 100,
+            fields: Optional[Collection[str]] = None,
+            after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Order]:
         try:
-            status_result = await self.session.execute(
-                select(StatusTypeORM.id).where(StatusTypeORM.code == status)
-            )
-            status_id = status_result.scalar_one_or_none()
-
+            status_id = await self.status_types.id_of(status)
             if not status_id:
                 return []
 
             result = await self.session.execute(
-                select(OrderORM)
-                .options(selectinload(OrderORM.status))
+                self._page(self._select_orders(fields), skip, after)
                 .where(OrderORM.status_id == status_id)
-                .order_by(OrderORM.created_at.desc())
-                .offset(skip)
                 .limit(limit)
             )
-            orders_orm = result.scalars().all()
-
-            return [self._orm_to_entity(order_orm) for order_orm in orders_orm]
+            return await self._result_to_entities(result, fields)
         except Exception as e:
             self.logger.error(f"Error getting orders by status {status}: {e}")
             raise
 
-    async def get_active_orders(self, user_id: int) -> List[Order]:
+    async def get_active_orders(self, user_id: int, fields: Optional[Collection[str]] = None) -> List[Order]:
         try:
-            result = await self.session.execute(
-                select(StatusTypeORM.id).where(StatusTypeORM.is_final == False)
-            )
-            non_final_status_ids = [row[0] for row in result.all()]
-
+            non_final_status_ids = (await self.status_types.get_table()).non_final_ids
             if not non_final_status_ids:
                 return []
 
             query = (
-                select(OrderORM)
-                .options(selectinload(OrderORM.status))
+                self._select_orders(fields)
                 .where(
                     and_(
                         OrderORM.user_id == user_id,
                         OrderORM.status_id.in_(non_final_status_ids)
                     )
                 )
-                .order_by(OrderORM.created_at.desc())
+                .order_by(OrderORM.created_at.desc(), OrderORM.id.desc())
             )
 
             result = await self.session.execute(query)
-            orders_orm = result.scalars().all()
-
-            return [self._orm_to_entity(order_orm) for order_orm in orders_orm]
+            return await self._result_to_entities(result, fields)
         except Exception as e:
             self.logger.error(f"Error getting active orders for user {user_id}: {e}")
             raise
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Order]:
+    async def get_all(
+            self,
+            skip: int = 0,
+            limit: int = 100,
+            fields: Optional[Collection[str]] = None,
+            after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Order]:
         try:
             result = await self.session.execute(
-                select(OrderORM)
-                .options(selectinload(OrderORM.status))
-                .order_by(OrderORM.created_at.desc())
-                .offset(skip)
+                self._page(self._select_orders(fields), skip, after)
                 .limit(limit)
             )
-            orders_orm = result.scalars().all()
-
-            return [self._orm_to_entity(order_orm) for order_orm in orders_orm]
+            return await self._result_to_entities(result, fields)
         except Exception as e:
             self.logger.error(f"Error getting all orders: {e}")
             raise
 
     async def create(self, order_create: OrderCreate) -> Order:
         try:
-            status_result = await self.session.execute(
-                select(StatusTypeORM).where(StatusTypeORM.code == OrderStatus.WAITING_CODE)
-            )
-            status_orm = status_result.scalar_one()
+            status_id = await self.status_types.id_of(OrderStatus.WAITING_CODE.value)
+            if not status_id:
+                raise NotFoundException(f"Status {OrderStatus.WAITING_CODE.value} not found")
 
             order_orm = OrderORM(
                 service=order_create.service,
                 country_code=order_create.country_code,
                 price=order_create.price,
                 provider_id=order_create.provider_id,
-                status_id=status_orm.id,
+                status_id=status_id,
                 user_id=order_create.user_id,
                 client_ip=order_create.client_ip,
                 created_at=datetime.utcnow(),
@@ -143,14 +135,8 @@ class OrderRepository(IOrderRepository):
             self.session.add(order_orm)
             await self.session.commit()
 
-            result = await self.session.execute(
-                select(OrderORM)
-                .options(selectinload(OrderORM.status))
-                .where(OrderORM.id == order_orm.id)
-            )
-            order_orm_with_relations = result.scalar_one()
-
-            return self._orm_to_entity(order_orm_with_relations)
+            # Сессия не сбрасывает атрибуты при commit, заказ перечитывать не нужно
+            return self._orm_to_entity(order_orm, await self.status_types.get_table_covering([order_orm.status_id]))
         except Exception as e:
             await self.session.rollback()
             self.logger.error(f"Error creating order: {e}")
@@ -161,10 +147,7 @@ class OrderRepository(IOrderRepository):
             update_data = {"updated_at": datetime.utcnow()}
 
             if order_update.status:
-                status_result = await self.session.execute(
-                    select(StatusTypeORM.id).where(StatusTypeORM.code == order_update.status)
-                )
-                status_id = status_result.scalar_one_or_none()
+                status_id = await self.status_types.id_of(order_update.status.value)
                 if status_id:
                     update_data["status_id"] = status_id
 
@@ -177,23 +160,18 @@ class OrderRepository(IOrderRepository):
             if order_update.status_id is not None:
                 update_data["status_id"] = order_update.status_id
 
-            await self.session.execute(
+            result = await self.session.execute(
                 update(OrderORM)
                 .where(OrderORM.id == id)
                 .values(**update_data)
-            )
-            await self.session.commit()
-
-            result = await self.session.execute(
-                select(OrderORM)
-                .options(selectinload(OrderORM.status))
-                .where(OrderORM.id == id)
+                .returning(OrderORM)
             )
             order_orm = result.scalar_one_or_none()
+            await self.session.commit()
             if not order_orm:
                 return None
 
-            return self._orm_to_entity(order_orm)
+            return self._orm_to_entity(order_orm, await self.status_types.get_table_covering([order_orm.status_id]))
         except Exception as e:
             await self.session.rollback()
             self.logger.error(f"Error updating order {id}: {e}")
@@ -201,11 +179,7 @@ class OrderRepository(IOrderRepository):
 
     async def update_status(self, order_id: int, status: str, code: Optional[str] = None) -> Optional[Order]:
         try:
-            status_result = await self.session.execute(
-                select(StatusTypeORM.id).where(StatusTypeORM.code == status)
-            )
-            status_id = status_result.scalar_one_or_none()
-
+            status_id = await self.status_types.id_of(status)
             if not status_id:
                 self.logger.error(f"Status {status} not found")
                 raise NotFoundException
@@ -218,24 +192,18 @@ class OrderRepository(IOrderRepository):
             if code is not None:
                 update_data["code"] = code
 
-            await self.session.execute(
+            result = await self.session.execute(
                 update(OrderORM)
                 .where(OrderORM.id == order_id)
                 .values(**update_data)
-            )
-            await self.session.commit()
-
-            # Перезагружаем заказ с отношениями
-            result = await self.session.execute(
-                select(OrderORM)
-                .options(selectinload(OrderORM.status))
-                .where(OrderORM.id == order_id)
+                .returning(OrderORM)
             )
             order_orm = result.scalar_one_or_none()
+            await self.session.commit()
             if not order_orm:
                 return None
 
-            return self._orm_to_entity(order_orm)
+            return self._orm_to_entity(order_orm, await self.status_types.get_table_covering([order_orm.status_id]))
         except Exception as e:
             await self.session.rollback()
             self.logger.error(f"Error updating status for order {order_id}: {e}")
@@ -262,14 +230,65 @@ class OrderRepository(IOrderRepository):
     async def get_orders_count_by_user(self, user_id: int) -> int:
         try:
             result = await self.session.execute(
-                select(OrderORM.id).where(OrderORM.user_id == user_id)
+                select(func.count()).select_from(OrderORM).where(OrderORM.user_id == user_id)
             )
-            return len(result.all())
+            return result.scalar_one()
         except Exception as e:
             self.logger.error(f"Error getting orders count for user {user_id}: {e}")
             raise
 
-    def _orm_to_entity(self, order_orm: OrderORM) -> Order:
+    @staticmethod
+    def _select_orders(fields: Optional[Collection[str]] = None):
+        """
+        Запрос заказов; с fields в SELECT попадают только эти поля Order,
+        а также id и created_at — ключ курсора следующей страницы
+        """
+        if not fields:
+            return select(OrderORM)
+
+        columns = [OrderORM.id, OrderORM.created_at]
+        for name in fields:
+            if name == "status":
+                columns.append(OrderORM.status_id)
+            elif name not in ("id", "created_at") and name in Order.model_fields:
+                columns.append(getattr(OrderORM, name))
+        return select(*columns)
+
+    @staticmethod
+    def _page(query, skip: int = 0, after: Optional[Tuple[datetime, int]] = None):
+        """
+        Порядок от новых к старым с id для однозначности.
+        after — ключ (created_at, id) последней строки предыдущей страницы: страница
+        читается по индексу с нужного места, без OFFSET. Без него — OFFSET для совместимости.
+        """
+        query = query.order_by(OrderORM.created_at.desc(), OrderORM.id.desc())
+        if after is not None:
+            return query.where(tuple_(OrderORM.created_at, OrderORM.id) < tuple_(*after))
+        return query.offset(skip)
+
+    async def _result_to_entities(self, result, fields: Optional[Collection[str]] = None) -> List[Order]:
+        if not fields:
+            orders_orm = result.scalars().all()
+            table = await self.status_types.get_table_covering({o.status_id for o in orders_orm})
+            return [self._orm_to_entity(order_orm, table) for order_orm in orders_orm]
+
+        rows = result.all()
+        table = await self.status_types.get_table_covering({row.status_id for row in rows if "status" in fields})
+        # Частичные заказы: без валидации, невыбранные поля отсутствуют
+        orders = []
+        for row in rows:
+            values = row._asdict()
+            if "status" in fields:
+                values["status"] = OrderStatus(table.code_of(values["status_id"]))
+                if "status_id" not in fields:
+                    del values["status_id"]
+            if values.get("price") is not None:
+                values["price"] = float(values["price"])
+            orders.append(Order.model_construct(**values))
+        return orders
+
+    @staticmethod
+    def _orm_to_entity(order_orm: OrderORM, status_types: StatusTypeTable) -> Order:
         return Order(
             id=order_orm.id,
             user_id=order_orm.user_id,
@@ -280,7 +299,7 @@ class OrderRepository(IOrderRepository):
             service=order_orm.service,
             price=float(order_orm.price),
             country_code=order_orm.country_code,
-            status=OrderStatus(order_orm.status.code),
+            status=OrderStatus(status_types.code_of(order_orm.status_id)),
             status_id=order_orm.status_id,
             created_at=order_orm.created_at,
             updated_at=order_orm.updated_at,
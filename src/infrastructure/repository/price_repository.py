@@ -1,13 +1,18 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, case
+from sqlalchemy import select, func, and_, or_, case, cast, values, column, distinct, String, BigInteger
 import os
-from typing import List, Optional, Dict, Any
+from typing import Collection, List, Optional, Dict, Any, AsyncIterator, Tuple
+from datetime import datetime
 from decimal import Decimal
 
 from src.core.domain.repository.interfaces import IPriceRepository
-from src.core.domain.entity.service_price import ServicePrice
+from src.core.domain.entity.service_price import ServicePrice, ServiceRoutePrice, CatalogChange
+from src.core.domain.entity.provider_route import RouteCandidate
+from src.core.domain.entity.services import ServicePublic
+from src.core.domain.entity.countries import CountryPublic
 from src.infrastructure.database.schemas import (
     ProviderRoutesORM,
+    RouteSummaryORM,
     ServiceReferenceORM,
     CountryReferenceORM,
     ProviderORM
@@ -20,68 +25,109 @@ class PriceRepository(IPriceRepository):
         self.session = session
         self.logger = get_logger(__name__)
 
-    async def get_service_catalog(self) -> List[ServicePrice]:
-        try:
-            if os.environ.get("TESTING") == "1":
-                is_available_expr = func.MAX(
-                    case(
-                        (
-                            and_(
-                                ProviderRoutesORM.is_active == True,
-                                ProviderRoutesORM.available_count > 0
-                            ),
-                            1
-                        ),
-                        else_=0
-                    )
-                ).label('is_available')
-            else:
-                is_available_expr = func.bool_or(
+    def _summary_source(self):
+        """
+        Агрегат маршрутов по (service_code, country_code).
+        В PostgreSQL это таблица route_summary, которую ведут триггеры provider_routes,
+        в тестах на SQLite агрегат считается на лету.
+        """
+        if os.environ.get("TESTING") != "1":
+            return RouteSummaryORM.__table__
+
+        is_available_expr = func.MAX(
+            case(
+                (
                     and_(
                         ProviderRoutesORM.is_active == True,
                         ProviderRoutesORM.available_count > 0
-                    )
-                ).label('is_available')
-
-            subquery = (
-                select(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code,
-                    func.min(ProviderRoutesORM.client_price).label('min_price'),
-                    func.min(ProviderRoutesORM.vip_client_price).label('min_vip_price'),
-                    func.max(ProviderRoutesORM.available_count).label('max_available'),
-                    is_available_expr
-                )
-                .where(ProviderRoutesORM.is_active == True)
-                .group_by(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code
-                )
-                .subquery()
+                    ),
+                    1
+                ),
+                else_=0
             )
+        ).label('is_available')
+
+        return (
+            select(
+                ProviderRoutesORM.service_code,
+                ProviderRoutesORM.country_code,
+                func.min(ProviderRoutesORM.client_price).label('min_price'),
+                func.min(ProviderRoutesORM.vip_client_price).label('min_vip_price'),
+                func.max(ProviderRoutesORM.available_count).label('max_available'),
+                is_available_expr
+            )
+            .where(ProviderRoutesORM.is_active == True)
+            .group_by(
+                ProviderRoutesORM.service_code,
+                ProviderRoutesORM.country_code
+            )
+            .subquery()
+        )
+
+    def _summary_query(
+            self,
+            service_join_clause=None,
+            country_join_clause=None,
+            service_code: Optional[str] = None,
+            country_code: Optional[str] = None
+    ):
+        summary = self._summary_source()
+
+        service_join = summary.c.service_code == ServiceReferenceORM.code
+        if service_join_clause is not None:
+            service_join = and_(service_join, service_join_clause)
+
+        country_join = summary.c.country_code == CountryReferenceORM.code
+        if country_join_clause is not None:
+            country_join = and_(country_join, country_join_clause)
+
+        query = (
+            select(
+                summary.c.service_code,
+                summary.c.country_code,
+                summary.c.min_price.label('price'),
+                summary.c.min_vip_price.label('vip_price'),
+                summary.c.is_available.label('available'),
+                ServiceReferenceORM.name.label('service_name'),
+                CountryReferenceORM.name_ru.label('country_name')
+            )
+            .select_from(summary)
+            .join(ServiceReferenceORM, service_join, isouter=True)
+            .join(CountryReferenceORM, country_join, isouter=True)
+            .where(summary.c.min_price > 0)
+        )
+
+        if service_code is not None:
+            query = query.where(summary.c.service_code == service_code)
+        if country_code is not None:
+            query = query.where(summary.c.country_code == country_code)
+
+        return query
+
+    @staticmethod
+    def _row_to_service_price(row) -> ServicePrice:
+        return ServicePrice(
+            service_code=row.service_code,
+            country_code=row.country_code,
+            price=Decimal(str(row.price)) if row.price else Decimal('0.0'),
+            vip_price=float(row.vip_price) if row.vip_price else None,
+            available=bool(row.available),
+            service_name=row.service_name or row.service_code,
+            country_name=row.country_name or row.country_code
+        )
+
+    @classmethod
+    def _row_to_route_price(cls, row) -> ServiceRoutePrice:
+        return ServiceRoutePrice(
+            **cls._row_to_service_price(row).model_dump(),
+            provider_id=row.provider_id,
+            provider_name=row.provider_name
+        )
 
+    async def get_service_catalog(self) -> List[ServicePrice]:
+        try:
             query = (
-                select(
-                    subquery.c.service_code,
-                    subquery.c.country_code,
-                    subquery.c.min_price.label('price'),
-                    subquery.c.min_vip_price.label('vip_price'),
-                    subquery.c.is_available.label('available'),
-                    ServiceReferenceORM.name.label('service_name'),
-                    CountryReferenceORM.name_ru.label('country_name')
-                )
-                .select_from(subquery)
-                .join(
-                    ServiceReferenceORM,
-                    subquery.c.service_code == ServiceReferenceORM.code,
-                    isouter=True
-                )
-                .join(
-                    CountryReferenceORM,
-                    subquery.c.country_code == CountryReferenceORM.code,
-                    isouter=True
-                )
-                .where(subquery.c.min_price > 0)
+                self._summary_query()
                 .order_by(
                     ServiceReferenceORM.name,
                     CountryReferenceORM.name_ru
@@ -94,16 +140,7 @@ class PriceRepository(IPriceRepository):
             catalog = []
             for row in rows:
                 try:
-                    service_price = ServicePrice(
-                        service_code=row.service_code,
-                        country_code=row.country_code,
-                        price=Decimal(str(row.price)) if row.price else Decimal('0.0'),
-                        vip_price=float(row.vip_price) if row.vip_price else None,
-                        available=bool(row.available),
-                        service_name=row.service_name or row.service_code,
-                        country_name=row.country_name or row.country_code
-                    )
-                    catalog.append(service_price)
+                    catalog.append(self._row_to_service_price(row))
                 except (ValueError, TypeError) as e:
                     self.logger.warning(f"Skipping invalid price data for {row.service_code}/{row.country_code}: {e}")
                     continue
@@ -115,52 +152,98 @@ class PriceRepository(IPriceRepository):
             self.logger.error(f"Error getting service catalog: {e}")
             raise
 
-    async def get_price_for_service_country(self, service_code: str, country_code: str) -> Optional[ServicePrice]:
+    async def stream_service_catalog(self, batch_size: int = 500) -> AsyncIterator[List[ServicePrice]]:
+        """
+        Каталог в том же порядке, что и get_service_catalog, пачками по batch_size.
+        Строки читаются серверным курсором, в памяти держится только текущая пачка.
+        """
         try:
             query = (
-                select(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code,
-                    ProviderRoutesORM.client_price.label('price'),
-                    ProviderRoutesORM.vip_client_price.label('vip_price'),
-                    and_(
-                        ProviderRoutesORM.is_active == True,
-                        ProviderRoutesORM.available_count > 0
-                    ).label('available'),
-                    ServiceReferenceORM.name.label('service_name'),
-                    CountryReferenceORM.name_ru.label('country_name'),
-                    ProviderRoutesORM.provider_id,
-                    ProviderORM.name.label('provider_name')
-                )
-                .select_from(ProviderRoutesORM)
-                .join(
-                    ServiceReferenceORM,
-                    ProviderRoutesORM.service_code == ServiceReferenceORM.code,
-                    isouter=True
-                )
-                .join(
-                    CountryReferenceORM,
-                    ProviderRoutesORM.country_code == CountryReferenceORM.code,
-                    isouter=True
+                self._summary_query()
+                .order_by(
+                    ServiceReferenceORM.name,
+                    CountryReferenceORM.name_ru
                 )
-                .join(
-                    ProviderORM,
-                    ProviderRoutesORM.provider_id == ProviderORM.id,
-                    isouter=True
+                .execution_options(yield_per=batch_size)
+            )
+
+            result = await self.session.stream(query)
+            total = 0
+            async for rows in result.partitions():
+                batch = []
+                for row in rows:
+                    try:
+                        batch.append(self._row_to_service_price(row))
+                    except (ValueError, TypeError) as e:
+                        self.logger.warning(f"Skipping invalid price data for {row.service_code}/{row.country_code}: {e}")
+                total += len(batch)
+                yield batch
+
+            self.logger.info(f"Streamed {total} price combinations")
+
+        except Exception as e:
+            self.logger.error(f"Error streaming service catalog: {e}")
+            raise
+
+    @staticmethod
+    def _best_route_query():
+        """Активные маршруты с ценой в порядке выбора лучшего: цена, рейтинг, остаток"""
+        return (
+            select(
+                ProviderRoutesORM.service_code,
+                ProviderRoutesORM.country_code,
+                ProviderRoutesORM.client_price.label('price'),
+                ProviderRoutesORM.vip_client_price.label('vip_price'),
+                and_(
+                    ProviderRoutesORM.is_active == True,
+                    ProviderRoutesORM.available_count > 0
+                ).label('available'),
+                ServiceReferenceORM.name.label('service_name'),
+                CountryReferenceORM.name_ru.label('country_name'),
+                ProviderRoutesORM.provider_id,
+                ProviderORM.name.label('provider_name')
+            )
+            .select_from(ProviderRoutesORM)
+            .join(
+                ServiceReferenceORM,
+                ProviderRoutesORM.service_code == ServiceReferenceORM.code,
+                isouter=True
+            )
+            .join(
+                CountryReferenceORM,
+                ProviderRoutesORM.country_code == CountryReferenceORM.code,
+                isouter=True
+            )
+            .join(
+                ProviderORM,
+                ProviderRoutesORM.provider_id == ProviderORM.id,
+                isouter=True
+            )
+            .where(
+                and_(
+                    ProviderRoutesORM.is_active == True,
+                    ProviderRoutesORM.client_price > 0
                 )
+            )
+        )
+
+    _BEST_ROUTE_ORDER = (
+        ProviderRoutesORM.client_price.asc(),
+        ProviderRoutesORM.rating_score.desc(),
+        ProviderRoutesORM.available_count.desc()
+    )
+
+    async def get_price_for_service_country(self, service_code: str, country_code: str) -> Optional[ServiceRoutePrice]:
+        try:
+            query = (
+                self._best_route_query()
                 .where(
                     and_(
                         ProviderRoutesORM.service_code == service_code,
-                        ProviderRoutesORM.country_code == country_code,
-                        ProviderRoutesORM.is_active == True,
-                        ProviderRoutesORM.client_price > 0
+                        ProviderRoutesORM.country_code == country_code
                     )
                 )
-                .order_by(
-                    ProviderRoutesORM.client_price.asc(),
-                    ProviderRoutesORM.rating_score.desc(),
-                    ProviderRoutesORM.available_count.desc()
-                )
+                .order_by(*self._BEST_ROUTE_ORDER)
                 .limit(1)
             )
 
@@ -171,101 +254,207 @@ class PriceRepository(IPriceRepository):
                 self.logger.info(f"No active prices found for {service_code}/{country_code}")
                 return None
 
-            return ServicePrice(
-                service_code=row.service_code,
-                country_code=row.country_code,
-                price=Decimal(str(row.price)) if row.price else Decimal('0.0'),
-                vip_price=float(row.vip_price) if row.vip_price else None,
-                available=bool(row.available),
-                service_name=row.service_name or service_code,
-                country_name=row.country_name or country_code
-            )
+            return self._row_to_route_price(row)
 
         except Exception as e:
             self.logger.error(f"Error getting price for {service_code}/{country_code}: {e}")
             raise
 
-    async def get_services_by_country(self, country_code: str) -> List[ServicePrice]:
+    async def get_route_price(
+            self,
+            provider_id: int,
+            service_code: str,
+            country_code: str
+    ) -> Optional[ServiceRoutePrice]:
+        """Текущая цена маршрута конкретного поставщика; None, если он выключен или без цены"""
         try:
-            if os.environ.get("TESTING") == "1":
-                # SQLite-совместимая версия
-                is_available_expr = func.MAX(
-                    case(
-                        (
-                            and_(
-                                ProviderRoutesORM.is_active == True,
-                                ProviderRoutesORM.available_count > 0
-                            ),
-                            1
-                        ),
-                        else_=0
-                    )
-                ).label('is_available')
-            else:
-                # PostgreSQL версия
-                is_available_expr = func.bool_or(
+            query = (
+                self._best_route_query()
+                .where(
                     and_(
-                        ProviderRoutesORM.is_active == True,
-                        ProviderRoutesORM.available_count > 0
+                        ProviderRoutesORM.provider_id == provider_id,
+                        ProviderRoutesORM.service_code == service_code,
+                        ProviderRoutesORM.country_code == country_code
                     )
-                ).label('is_available')
+                )
+                .limit(1)
+            )
 
-            subquery = (
-                select(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code,
-                    func.min(ProviderRoutesORM.client_price).label('min_price'),
-                    func.min(ProviderRoutesORM.vip_client_price).label('min_vip_price'),
-                    func.max(ProviderRoutesORM.available_count).label('max_available'),
-                    is_available_expr
+            result = await self.session.execute(query)
+            row = result.first()
+            return self._row_to_route_price(row) if row else None
+
+        except Exception as e:
+            self.logger.error(f"Error getting route price for provider {provider_id} {service_code}/{country_code}: {e}")
+            raise
+
+    async def get_prices_for_pairs(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], ServiceRoutePrice]:
+        """
+        Лучшие цены для набора пар (service_code, country_code) одним запросом.
+        Пары без активных маршрутов в результат не попадают.
+        """
+        unique_pairs = list(dict.fromkeys(pairs))
+        if not unique_pairs:
+            return {}
+
+        try:
+            if os.environ.get("TESTING") == "1":
+                # SQLite не умеет DISTINCT ON и VALUES с именами колонок
+                prices = {}
+                for service_code, country_code in unique_pairs:
+                    price = await self.get_price_for_service_country(service_code, country_code)
+                    if price:
+                        prices[(service_code, country_code)] = price
+                return prices
+
+            requested = (
+                values(
+                    column('service_code', String),
+                    column('country_code', String),
+                    name='requested'
+                )
+                .data(unique_pairs)
+            )
+
+            query = (
+                self._best_route_query()
+                .join(
+                    requested,
+                    and_(
+                        ProviderRoutesORM.service_code == requested.c.service_code,
+                        ProviderRoutesORM.country_code == requested.c.country_code
+                    )
                 )
-                .where(ProviderRoutesORM.is_active == True)
-                .group_by(
+                .distinct(ProviderRoutesORM.service_code, ProviderRoutesORM.country_code)
+                .order_by(
                     ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code
+                    ProviderRoutesORM.country_code,
+                    *self._BEST_ROUTE_ORDER
                 )
-                .subquery()
             )
 
+            result = await self.session.execute(query)
+            prices = {
+                (row.service_code, row.country_code): self._row_to_route_price(row)
+                for row in result.all()
+            }
+
+            self.logger.info(f"Resolved {len(prices)} of {len(unique_pairs)} requested prices")
+            return prices
+
+        except Exception as e:
+            self.logger.error(f"Error getting prices for {len(unique_pairs)} pairs: {e}")
+            raise
+
+    async def get_route_candidates(
+            self,
+            updated_since: Optional[datetime] = None,
+            keys: Optional[List[Tuple[str, str]]] = None
+    ) -> List[RouteCandidate]:
+        """
+        Маршруты для индекса лучших цен.
+        Без updated_since — все активные маршруты с ценой; с ним — все маршруты,
+        изменённые начиная с этого момента, включая выключенные, чтобы индекс мог их убрать.
+        keys ограничивает выборку парами (service_code, country_code).
+        """
+        try:
             query = (
                 select(
-                    subquery.c.service_code,
-                    subquery.c.country_code,
-                    subquery.c.min_price.label('price'),
-                    subquery.c.min_vip_price.label('vip_price'),
-                    subquery.c.is_available.label('available'),
+                    ProviderRoutesORM.id,
+                    ProviderRoutesORM.provider_id,
+                    ProviderORM.name.label('provider_name'),
+                    ProviderRoutesORM.service_code,
+                    ProviderRoutesORM.country_code,
+                    ProviderRoutesORM.client_price,
+                    ProviderRoutesORM.vip_client_price,
+                    ProviderRoutesORM.available_count,
+                    ProviderRoutesORM.rating_score,
+                    ProviderRoutesORM.is_active,
+                    ProviderRoutesORM.updated_at,
                     ServiceReferenceORM.name.label('service_name'),
                     CountryReferenceORM.name_ru.label('country_name')
                 )
-                .select_from(subquery)
-                .join(
-                    ServiceReferenceORM,
-                    subquery.c.service_code == ServiceReferenceORM.code,
-                    isouter=True
-                )
-                .join(
-                    CountryReferenceORM,
-                    subquery.c.country_code == CountryReferenceORM.code,
-                    isouter=True
-                )
-                .where(subquery.c.min_price > 0)
-                .order_by(ServiceReferenceORM.name)
+                .select_from(ProviderRoutesORM)
+                .join(ProviderORM, ProviderRoutesORM.provider_id == ProviderORM.id, isouter=True)
+                .join(ServiceReferenceORM, ProviderRoutesORM.service_code == ServiceReferenceORM.code, isouter=True)
+                .join(CountryReferenceORM, ProviderRoutesORM.country_code == CountryReferenceORM.code, isouter=True)
             )
 
-            result = await self.session.execute(query)
-            rows = result.all()
+            if updated_since is None:
+                query = query.where(
+                    and_(
+                        ProviderRoutesORM.is_active == True,
+                        ProviderRoutesORM.client_price > 0
+                    )
+                )
+            else:
+                query = query.where(ProviderRoutesORM.updated_at >= updated_since)
+
+            if keys is not None:
+                unique_keys = list(dict.fromkeys(keys))
+                if not unique_keys:
+                    return []
+                if os.environ.get("TESTING") == "1":
+                    # SQLite не умеет VALUES с именами колонок
+                    query = query.where(
+                        or_(*(
+                            and_(
+                                ProviderRoutesORM.service_code == service_code,
+                                ProviderRoutesORM.country_code == country_code
+                            )
+                            for service_code, country_code in unique_keys
+                        ))
+                    )
+                else:
+                    requested = (
+                        values(
+                            column('service_code', String),
+                            column('country_code', String),
+                            name='requested'
+                        )
+                        .data(unique_keys)
+                    )
+                    query = query.join(
+                        requested,
+                        and_(
+                            ProviderRoutesORM.service_code == requested.c.service_code,
+                            ProviderRoutesORM.country_code == requested.c.country_code
+                        )
+                    )
 
-            services = []
-            for row in rows:
-                services.append(ServicePrice(
+            result = await self.session.execute(query)
+            return [
+                RouteCandidate(
+                    id=row.id,
+                    provider_id=row.provider_id,
+                    provider_name=row.provider_name,
                     service_code=row.service_code,
                     country_code=row.country_code,
-                    price=Decimal(str(row.price)) if row.price else Decimal('0.0'),
-                    vip_price=float(row.vip_price) if row.vip_price else None,
-                    available=bool(row.available),
-                    service_name=row.service_name or row.service_code,
-                    country_name=row.country_name or country_code
-                ))
+                    client_price=row.client_price or Decimal('0.0'),
+                    vip_client_price=row.vip_client_price,
+                    available_count=row.available_count or 0,
+                    rating_score=float(row.rating_score or 0.0),
+                    is_active=bool(row.is_active),
+                    service_name=row.service_name,
+                    country_name=row.country_name,
+                    updated_at=row.updated_at
+                )
+                for row in result.all()
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Error getting route candidates: {e}")
+            raise
+
+    async def get_services_by_country(self, country_code: str) -> List[ServicePrice]:
+        try:
+            query = (
+                self._summary_query(country_code=country_code)
+                .order_by(ServiceReferenceORM.name)
+            )
+
+            result = await self.session.execute(query)
+            services = [self._row_to_service_price(row) for row in result.all()]
 
             self.logger.info(f"Found {len(services)} services for country {country_code}")
             return services
@@ -276,85 +465,13 @@ class PriceRepository(IPriceRepository):
 
     async def get_countries_by_service(self, service_code: str) -> List[ServicePrice]:
         try:
-            if os.environ.get("TESTING") == "1":
-                # SQLite-совместимая версия
-                is_available_expr = func.MAX(
-                    case(
-                        (
-                            and_(
-                                ProviderRoutesORM.is_active == True,
-                                ProviderRoutesORM.available_count > 0
-                            ),
-                            1
-                        ),
-                        else_=0
-                    )
-                ).label('is_available')
-            else:
-                # PostgreSQL версия
-                is_available_expr = func.bool_or(
-                    and_(
-                        ProviderRoutesORM.is_active == True,
-                        ProviderRoutesORM.available_count > 0
-                    )
-                ).label('is_available')
-
-            subquery = (
-                select(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code,
-                    func.min(ProviderRoutesORM.client_price).label('min_price'),
-                    func.min(ProviderRoutesORM.vip_client_price).label('min_vip_price'),
-                    func.max(ProviderRoutesORM.available_count).label('max_available'),
-                    is_available_expr
-                )
-                .where(ProviderRoutesORM.is_active == True)
-                .group_by(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code
-                )
-                .subquery()
-            )
-
             query = (
-                select(
-                    subquery.c.service_code,
-                    subquery.c.country_code,
-                    subquery.c.min_price.label('price'),
-                    subquery.c.min_vip_price.label('vip_price'),
-                    subquery.c.is_available.label('available'),
-                    ServiceReferenceORM.name.label('service_name'),
-                    CountryReferenceORM.name_ru.label('country_name')
-                )
-                .select_from(subquery)
-                .join(
-                    ServiceReferenceORM,
-                    subquery.c.service_code == ServiceReferenceORM.code,
-                    isouter=True
-                )
-                .join(
-                    CountryReferenceORM,
-                    subquery.c.country_code == CountryReferenceORM.code,
-                    isouter=True
-                )
-                .where(subquery.c.min_price > 0)
+                self._summary_query(service_code=service_code)
                 .order_by(CountryReferenceORM.name_ru)
             )
 
             result = await self.session.execute(query)
-            rows = result.all()
-
-            countries = []
-            for row in rows:
-                countries.append(ServicePrice(
-                    service_code=row.service_code,
-                    country_code=row.country_code,
-                    price=Decimal(str(row.price)) if row.price else Decimal('0.0'),
-                    vip_price=float(row.vip_price) if row.vip_price else None,
-                    available=bool(row.available),
-                    service_name=row.service_name or service_code,
-                    country_name=row.country_name or row.country_code
-                ))
+            countries = [self._row_to_service_price(row) for row in result.all()]
 
             self.logger.info(f"Found {len(countries)} countries for service {service_code}")
             return countries
@@ -365,93 +482,14 @@ class PriceRepository(IPriceRepository):
 
     async def get_popular_services(self) -> List[ServicePrice]:
         try:
-            if os.environ.get("TESTING") == "1":
-                # SQLite-совместимая версия
-                is_available_expr = func.MAX(
-                    case(
-                        (
-                            and_(
-                                ProviderRoutesORM.is_active == True,
-                                ProviderRoutesORM.available_count > 0
-                            ),
-                            1
-                        ),
-                        else_=0
-                    )
-                ).label('is_available')
-            else:
-                # PostgreSQL версия
-                is_available_expr = func.bool_or(
-                    and_(
-                        ProviderRoutesORM.is_active == True,
-                        ProviderRoutesORM.available_count > 0
-                    )
-                ).label('is_available')
-
-            subquery = (
-                select(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code,
-                    func.min(ProviderRoutesORM.client_price).label('min_price'),
-                    func.min(ProviderRoutesORM.vip_client_price).label('min_vip_price'),
-                    func.max(ProviderRoutesORM.available_count).label('max_available'),
-                    is_available_expr
-                )
-                .where(ProviderRoutesORM.is_active == True)
-                .group_by(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code
-                )
-                .subquery()
-            )
-
             query = (
-                select(
-                    subquery.c.service_code,
-                    subquery.c.country_code,
-                    subquery.c.min_price.label('price'),
-                    subquery.c.min_vip_price.label('vip_price'),
-                    subquery.c.is_available.label('available'),
-                    ServiceReferenceORM.name.label('service_name'),
-                    CountryReferenceORM.name_ru.label('country_name')
-                )
-                .select_from(subquery)
-                .join(
-                    ServiceReferenceORM,
-                    and_(
-                        subquery.c.service_code == ServiceReferenceORM.code,
-                        ServiceReferenceORM.is_popular == True
-                    ),
-                    isouter=True
-                )
-                .join(
-                    CountryReferenceORM,
-                    subquery.c.country_code == CountryReferenceORM.code,
-                    isouter=True
-                )
-                .where(
-                    and_(
-                        subquery.c.min_price > 0,
-                        ServiceReferenceORM.is_popular == True
-                    )
-                )
+                self._summary_query(service_join_clause=ServiceReferenceORM.is_popular == True)
+                .where(ServiceReferenceORM.is_popular == True)
                 .order_by(ServiceReferenceORM.name)
             )
 
             result = await self.session.execute(query)
-            rows = result.all()
-
-            popular_services = []
-            for row in rows:
-                popular_services.append(ServicePrice(
-                    service_code=row.service_code,
-                    country_code=row.country_code,
-                    price=Decimal(str(row.price)) if row.price else Decimal('0.0'),
-                    vip_price=float(row.vip_price) if row.vip_price else None,
-                    available=bool(row.available),
-                    service_name=row.service_name or row.service_code,
-                    country_name=row.country_name or row.country_code
-                ))
+            popular_services = [self._row_to_service_price(row) for row in result.all()]
 
             self.logger.info(f"Found {len(popular_services)} popular services")
             return popular_services
@@ -462,93 +500,14 @@ class PriceRepository(IPriceRepository):
 
     async def get_popular_countries(self) -> List[ServicePrice]:
         try:
-            if os.environ.get("TESTING") == "1":
-                # SQLite-совместимая версия
-                is_available_expr = func.MAX(
-                    case(
-                        (
-                            and_(
-                                ProviderRoutesORM.is_active == True,
-                                ProviderRoutesORM.available_count > 0
-                            ),
-                            1
-                        ),
-                        else_=0
-                    )
-                ).label('is_available')
-            else:
-                # PostgreSQL версия
-                is_available_expr = func.bool_or(
-                    and_(
-                        ProviderRoutesORM.is_active == True,
-                        ProviderRoutesORM.available_count > 0
-                    )
-                ).label('is_available')
-
-            subquery = (
-                select(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code,
-                    func.min(ProviderRoutesORM.client_price).label('min_price'),
-                    func.min(ProviderRoutesORM.vip_client_price).label('min_vip_price'),
-                    func.max(ProviderRoutesORM.available_count).label('max_available'),
-                    is_available_expr
-                )
-                .where(ProviderRoutesORM.is_active == True)
-                .group_by(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code
-                )
-                .subquery()
-            )
-
             query = (
-                select(
-                    subquery.c.service_code,
-                    subquery.c.country_code,
-                    subquery.c.min_price.label('price'),
-                    subquery.c.min_vip_price.label('vip_price'),
-                    subquery.c.is_available.label('available'),
-                    ServiceReferenceORM.name.label('service_name'),
-                    CountryReferenceORM.name_ru.label('country_name')
-                )
-                .select_from(subquery)
-                .join(
-                    ServiceReferenceORM,
-                    subquery.c.service_code == ServiceReferenceORM.code,
-                    isouter=True
-                )
-                .join(
-                    CountryReferenceORM,
-                    and_(
-                        subquery.c.country_code == CountryReferenceORM.code,
-                        CountryReferenceORM.is_popular == True
-                    ),
-                    isouter=True
-                )
-                .where(
-                    and_(
-                        subquery.c.min_price > 0,
-                        CountryReferenceORM.is_popular == True
-                    )
-                )
+                self._summary_query(country_join_clause=CountryReferenceORM.is_popular == True)
+                .where(CountryReferenceORM.is_popular == True)
                 .order_by(CountryReferenceORM.name_ru)
             )
 
             result = await self.session.execute(query)
-            rows = result.all()
-
-            popular_countries = []
-            for row in rows:
-                popular_countries.append(ServicePrice(
-                    service_code=row.service_code,
-                    country_code=row.country_code,
-                    price=Decimal(str(row.price)) if row.price else Decimal('0.0'),
-                    vip_price=float(row.vip_price) if row.vip_price else None,
-                    available=bool(row.available),
-                    service_name=row.service_name or row.service_code,
-                    country_name=row.country_name or row.country_code
-                ))
+            popular_countries = [self._row_to_service_price(row) for row in result.all()]
 
             self.logger.info(f"Found {len(popular_countries)} popular countries")
             return popular_countries
@@ -559,50 +518,36 @@ class PriceRepository(IPriceRepository):
 
     async def get_available_services_countries(self) -> Dict[str, Any]:
         """
-        Получить статистику по доступным сервисам и странам
+        Получить статистику по доступным сервисам и странам.
+        Считается по агрегату route_summary (одна строка на пару), а не по всем маршрутам.
         """
         try:
-            # Получаем уникальные комбинации
-            query = (
+            summary = self._summary_source()
+            available = and_(summary.c.is_available == True, summary.c.min_price > 0)
+
+            counts = (await self.session.execute(
                 select(
-                    ProviderRoutesORM.service_code,
-                    ProviderRoutesORM.country_code,
-                    ServiceReferenceORM.name.label('service_name'),
-                    CountryReferenceORM.name_ru.label('country_name')
-                )
-                .distinct()
-                .join(
-                    ServiceReferenceORM,
-                    ProviderRoutesORM.service_code == ServiceReferenceORM.code,
-                    isouter=True
-                )
-                .join(
-                    CountryReferenceORM,
-                    ProviderRoutesORM.country_code == CountryReferenceORM.code,
-                    isouter=True
+                    func.count().label('combinations'),
+                    func.count(distinct(summary.c.service_code)).label('services'),
+                    func.count(distinct(summary.c.country_code)).label('countries')
                 )
-                .where(
-                    and_(
-                        ProviderRoutesORM.is_active == True,
-                        ProviderRoutesORM.available_count > 0,
-                        ProviderRoutesORM.client_price > 0
-                    )
-                )
-            )
-
-            result = await self.session.execute(query)
-            rows = result.all()
+                .select_from(summary)
+                .where(available)
+            )).one()
 
-            services_count = len(set(row.service_code for row in rows))
-            countries_count = len(set(row.country_code for row in rows))
-            combinations_count = len(rows)
+            services = await self.session.scalars(
+                select(summary.c.service_code).where(available).distinct().order_by(summary.c.service_code)
+            )
+            countries = await self.session.scalars(
+                select(summary.c.country_code).where(available).distinct().order_by(summary.c.country_code)
+            )
 
             return {
-                "total_services": services_count,
-                "total_countries": countries_count,
-                "total_combinations": combinations_count,
-                "services": list(set(row.service_code for row in rows)),
-                "countries": list(set(row.country_code for row in rows))
+                "total_services": counts.services,
+                "total_countries": counts.countries,
+                "total_combinations": counts.combinations,
+                "services": list(services),
+                "countries": list(countries)
             }
 
         except Exception as e:
@@ -646,3 +591,170 @@ class PriceRepository(IPriceRepository):
         except Exception as e:
             self.logger.error(f"Error getting detailed prices for {service_code}/{country_code}: {e}")
             raise
+
+    async def get_service_references(self) -> List[ServicePublic]:
+        """Активные услуги справочника для индексов каталога"""
+        try:
+            result = await self.session.execute(
+                select(ServiceReferenceORM)
+                .where(ServiceReferenceORM.is_active == True)
+                .order_by(ServiceReferenceORM.code)
+            )
+            return [
+                ServicePublic(
+                    code=service.code,
+                    name=service.name,
+                    category=service.category,
+                    icon=service.icon,
+                    is_popular=service.is_popular,
+                    description=service.description,
+                    sort_order=service.sort_order or 0
+                )
+                for service in result.scalars().all()
+            ]
+        except Exception as e:
+            self.logger.error(f"Error getting service references: {e}")
+            raise
+
+    async def get_country_references(self) -> List[CountryPublic]:
+        """Активные страны справочника для индексов каталога"""
+        try:
+            result = await self.session.execute(
+                select(CountryReferenceORM)
+                .where(CountryReferenceORM.is_active == True)
+                .order_by(CountryReferenceORM.code)
+            )
+            return [
+                CountryPublic(
+                    code=country.code,
+                    name_ru=country.name_ru,
+                    name_en=country.name_en,
+                    iso_code=country.iso_code,
+                    region=country.region,
+                    is_popular=bool(country.is_popular),
+                    sort_order=country.sort_order or 0
+                )
+                for country in result.scalars().all()
+            ]
+        except Exception as e:
+            self.logger.error(f"Error getting country references: {e}")
+            raise
+
+    async def get_reference_names(
+            self,
+            service_codes: Collection[str],
+            country_codes: Collection[str],
+            provider_ids: Collection[int]
+    ) -> Tuple[Dict[str, str], Dict[str, str], Dict[int, str]]:
+        """Названия по кодам, включая неактивные записи: они нужны для истории заказов"""
+        try:
+            service_names, country_names, provider_names = {}, {}, {}
+            if service_codes:
+                result = await self.session.execute(
+                    select(ServiceReferenceORM.code, ServiceReferenceORM.name)
+                    .where(ServiceReferenceORM.code.in_(service_codes))
+                )
+                service_names = dict(result.all())
+            if country_codes:
+                result = await self.session.execute(
+                    select(CountryReferenceORM.code, CountryReferenceORM.name_ru)
+                    .where(CountryReferenceORM.code.in_(country_codes))
+                )
+                country_names = dict(result.all())
+            if provider_ids:
+                result = await self.session.execute(
+                    select(ProviderORM.id, ProviderORM.name)
+                    .where(ProviderORM.id.in_(provider_ids))
+                )
+                provider_names = dict(result.all())
+            return service_names, country_names, provider_names
+        except Exception as e:
+            self.logger.error(f"Error getting reference names: {e}")
+            raise
+
+    async def get_catalog_change_version(self) -> int:
+        """
+        Последняя версия ленты route_summary, до которой изменения уже не могут появиться;
+        0, если лента изменений не ведётся.
+        Версии — номера пишущих транзакций, поэтому берутся только версии ниже xmin
+        снимка: все транзакции с такими номерами уже завершены.
+        """
+        if os.environ.get("TESTING") == "1":
+            return 0
+
+        try:
+            oldest_running = cast(
+                cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), String), BigInteger
+            )
+            result = await self.session.execute(
+                select(func.max(RouteSummaryORM.change_version))
+                .where(RouteSummaryORM.change_version < oldest_running)
+            )
+            return result.scalar() or 0
+        except Exception as e:
+            self.logger.error(f"Error getting catalog change version: {e}")
+            raise
+
+    async def get_catalog_changes(self, since: int, until: int, limit: int) -> List[CatalogChange]:
+        """
+        Позиции каталога, изменившиеся в версиях (since, until], в порядке изменений.
+        Позиции без активных маршрутов возвращаются с removed=True.
+        """
+        if os.environ.get("TESTING") == "1":
+            return []
+
+        try:
+            query = (
+                select(
+                    RouteSummaryORM.service_code,
+                    RouteSummaryORM.country_code,
+                    RouteSummaryORM.min_price.label('price'),
+                    RouteSummaryORM.min_vip_price.label('vip_price'),
+                    RouteSummaryORM.is_available.label('available'),
+                    RouteSummaryORM.change_version,
+                    ServiceReferenceORM.name.label('service_name'),
+                    CountryReferenceORM.name_ru.label('country_name')
+                )
+                .select_from(RouteSummaryORM)
+                .join(
+                    ServiceReferenceORM,
+                    RouteSummaryORM.service_code == ServiceReferenceORM.code,
+                    isouter=True
+                )
+                .join(
+                    CountryReferenceORM,
+                    RouteSummaryORM.country_code == CountryReferenceORM.code,
+                    isouter=True
+                )
+                .where(
+                    and_(
+                        RouteSummaryORM.change_version > since,
+                        RouteSummaryORM.change_version <= until
+                    )
+                )
+                .order_by(RouteSummaryORM.change_version)
+                .limit(limit)
+            )
+
+            result = await self.session.execute(query)
+
+            changes = []
+            for row in result.all():
+                removed = not row.price or row.price <= 0
+                changes.append(CatalogChange(
+                    service_code=row.service_code,
+                    country_code=row.country_code,
+                    price=None if removed else float(row.price),
+                    vip_price=float(row.vip_price) if row.vip_price and not removed else None,
+                    available=bool(row.available) and not removed,
+                    removed=removed,
+                    service_name=row.service_name or row.service_code,
+                    country_name=row.country_name or row.country_code,
+                    version=row.change_version
+                ))
+
+            return changes
+
+        except Exception as e:
+            self.logger.error(f"Error getting catalog changes since {since}: {e}")
+            raise
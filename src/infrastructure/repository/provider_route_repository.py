@@ -1,12 +1,78 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, and_, func
-from typing import List, Optional
+from sqlalchemy import select, update, delete, and_, or_, func, text, table, column, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import os
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.core.domain.repository.interfaces import IProviderRouteRepository
-from src.core.domain.entity.provider_route import ProviderRoute, BestProviderPrice
-from src.infrastructure.database.schemas import ProviderRoutesORM, ProviderORM
+from src.core.domain.entity.provider_route import (
+    ProviderRoute, BestProviderPrice, RoutePriceRow, PriceHistoryPoint, MarkupRule, RouteCosts
+)
+from src.infrastructure.database.schemas import (
+    ProviderRoutesORM, ProviderORM, RoutePriceHistoryORM, RoutePriceRollupORM, SystemConfigORM
+)
 from src.core.logging_config import get_logger
 
+# Поля прайс-листа, которые приходят от поставщика и перезаписываются при импорте
+PRICE_LIST_COLUMNS = (
+    "service_code",
+    "country_code",
+    "provider_service_code",
+    "provider_country_code",
+    "external_product_id",
+    "cost_price",
+    "client_price",
+    "vip_client_price",
+    "available_count",
+    "is_active",
+)
+
+PRICE_LIST_STAGING_DDL = """
+CREATE TEMP TABLE provider_routes_staging (
+    service_code varchar(50) NOT NULL,
+    country_code varchar(10) NOT NULL,
+    provider_service_code varchar(100) NOT NULL,
+    provider_country_code varchar(50) NOT NULL,
+    external_product_id varchar(100),
+    cost_price numeric(10, 4) NOT NULL,
+    client_price numeric(10, 4) NOT NULL,
+    vip_client_price numeric(10, 4) NOT NULL,
+    available_count integer NOT NULL,
+    is_active boolean NOT NULL,
+    ordinal integer NOT NULL
+) ON COMMIT DROP
+"""
+
+price_list_staging = table(
+    "provider_routes_staging",
+    *(column(name) for name in PRICE_LIST_COLUMNS),
+    column("ordinal")
+)
+
+PRICE_LIST_CONFLICT_KEY = ["provider_id", "country_code", "service_code"]
+
+# Ключ system_config с правилами наценки
+MARKUP_RULES_CONFIG_KEY = "pricing.markup_rules"
+
+# Переоценка одним оператором: новые цены передаются массивами и разворачиваются unnest
+APPLY_ROUTE_PRICES_SQL = """
+UPDATE provider_routes pr SET
+    client_price = u.client_price,
+    vip_client_price = u.vip_client_price,
+    last_price_update = now()
+FROM unnest(CAST(:ids AS bigint[]), CAST(:client_prices AS numeric[]), CAST(:vip_prices AS numeric[]))
+    AS u(id, client_price, vip_client_price)
+WHERE pr.id = u.id
+"""
+
+# Поля, которые импорт перезаписывает у существующего маршрута и по которым ищет изменения
+PRICE_LIST_UPDATE_COLUMNS = tuple(
+    name for name in PRICE_LIST_COLUMNS if name not in PRICE_LIST_CONFLICT_KEY
+)
+
 
 class ProviderRouteRepository(IProviderRouteRepository):
     def __init__(self, session: AsyncSession):
@@ -28,6 +94,63 @@ class ProviderRouteRepository(IProviderRouteRepository):
             self.logger.error(f"Error getting provider route by id {id}: {e}")
             raise
 
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ProviderRoute]:
+        try:
+            result = await self.session.execute(
+                select(ProviderRoutesORM)
+                .order_by(ProviderRoutesORM.id)
+                .offset(skip)
+                .limit(limit)
+            )
+            return [self._orm_to_entity(route_orm) for route_orm in result.scalars().all()]
+        except Exception as e:
+            self.logger.error(f"Error getting provider routes: {e}")
+            raise
+
+    async def create(self, entity: Dict[str, Any]) -> ProviderRoute:
+        try:
+            route_orm = ProviderRoutesORM(**entity)
+            self.session.add(route_orm)
+            await self.session.commit()
+            await self.session.refresh(route_orm)
+            return self._orm_to_entity(route_orm)
+        except Exception as e:
+            await self.session.rollback()
+            self.logger.error(f"Error creating provider route: {e}")
+            raise
+
+    async def update(self, id: int, entity: Dict[str, Any]) -> Optional[ProviderRoute]:
+        try:
+            result = await self.session.execute(
+                update(ProviderRoutesORM)
+                .where(ProviderRoutesORM.id == id)
+                .values(**entity, updated_at=func.now())
+                .returning(ProviderRoutesORM)
+            )
+
+            route_orm = result.scalar_one_or_none()
+            if not route_orm:
+                return None
+
+            await self.session.commit()
+            return self._orm_to_entity(route_orm)
+        except Exception as e:
+            await self.session.rollback()
+            self.logger.error(f"Error updating provider route {id}: {e}")
+            raise
+
+    async def delete(self, id: int) -> bool:
+        try:
+            result = await self.session.execute(
+                delete(ProviderRoutesORM).where(ProviderRoutesORM.id == id)
+            )
+            await self.session.commit()
+            return result.rowcount > 0
+        except Exception as e:
+            await self.session.rollback()
+            self.logger.error(f"Error deleting provider route {id}: {e}")
+            raise
+
     async def get_best_price_for_service_country(self, service_code: str, country_code: str) -> Optional[
         BestProviderPrice]:
         try:
@@ -199,6 +322,303 @@ class ProviderRouteRepository(IProviderRouteRepository):
             self.logger.error(f"Error getting active routes for provider {provider_id}: {e}")
             raise
 
+    async def import_price_list(
+            self,
+            provider_id: int,
+            rows: List[RoutePriceRow],
+            only_changed: bool = False
+    ) -> List[Tuple[str, str]]:
+        """
+        Загрузить прайс-лист поставщика одной транзакцией.
+        Строки копируются COPY во временную таблицу и сливаются в provider_routes
+        одним INSERT ... ON CONFLICT. С only_changed существующие маршруты переписываются,
+        только если поля прайса действительно изменились.
+        Возвращает ключи (service_code, country_code) вставленных и обновлённых маршрутов.
+        """
+        if not rows:
+            return []
+
+        try:
+            if os.environ.get("TESTING") == "1":
+                statement = await self._price_list_values_insert(provider_id, rows)
+            else:
+                statement = await self._price_list_staging_insert(provider_id, rows)
+
+            statement = statement.on_conflict_do_update(
+                index_elements=PRICE_LIST_CONFLICT_KEY,
+                set_=self._merge_update_set(statement.excluded),
+                where=self._changed_condition(statement.excluded) if only_changed else None
+            ).returning(ProviderRoutesORM.service_code, ProviderRoutesORM.country_code)
+
+            result = await self.session.execute(statement)
+            changed_keys = [(row.service_code, row.country_code) for row in result.all()]
+
+            await self.session.commit()
+            self.logger.info(
+                f"Imported price list for provider {provider_id}: {len(rows)} rows, "
+                f"{len(changed_keys)} routes written"
+            )
+            return changed_keys
+        except Exception as e:
+            await self.session.rollback()
+            self.logger.error(f"Error importing price list for provider {provider_id}: {e}")
+            raise
+
+    async def get_price_history(
+            self,
+            service_code: str,
+            country_code: str,
+            provider_id: int,
+            since: datetime,
+            until: datetime,
+            resolution: str
+    ) -> List[PriceHistoryPoint]:
+        """
+        История цен маршрута за окно [since, until).
+        resolution "raw" читает сырые точки, "hour" и "day" — готовые свёртки.
+        """
+        try:
+            if resolution == "raw":
+                history = RoutePriceHistoryORM
+                query = (
+                    select(
+                        history.recorded_at.label("at"),
+                        history.cost_price.label("cost_min"),
+                        history.cost_price.label("cost_max"),
+                        history.cost_price.label("cost_last"),
+                        history.client_price.label("client_min"),
+                        history.client_price.label("client_max"),
+                        history.client_price.label("client_last"),
+                        literal(1).label("samples")
+                    )
+                    .where(
+                        history.service_code == service_code,
+                        history.country_code == country_code,
+                        history.provider_id == provider_id,
+                        history.recorded_at >= since,
+                        history.recorded_at < until
+                    )
+                    .order_by(history.recorded_at, history.id)
+                )
+            else:
+                rollup = RoutePriceRollupORM
+                query = (
+                    select(
+                        rollup.bucket.label("at"),
+                        rollup.cost_min, rollup.cost_max, rollup.cost_last,
+                        rollup.client_min, rollup.client_max, rollup.client_last,
+                        rollup.samples
+                    )
+                    .where(
+                        rollup.service_code == service_code,
+                        rollup.country_code == country_code,
+                        rollup.provider_id == provider_id,
+                        rollup.resolution == resolution,
+                        rollup.bucket >= since,
+                        rollup.bucket < until
+                    )
+                    .order_by(rollup.bucket)
+                )
+
+            result = await self.session.execute(query)
+            return [PriceHistoryPoint.model_validate(row._mapping) for row in result.all()]
+        except Exception as e:
+            self.logger.error(
+                f"Error getting price history for {service_code}/{country_code}, provider {provider_id}: {e}"
+            )
+            raise
+
+    async def prune_price_history(self, raw_before: datetime, hourly_before: datetime) -> Tuple[int, int]:
+        """Удалить сырые точки старше raw_before и почасовые свёртки старше hourly_before"""
+        try:
+            raw = await self.session.execute(
+                delete(RoutePriceHistoryORM).where(RoutePriceHistoryORM.recorded_at < raw_before)
+            )
+            hourly = await self.session.execute(
+                delete(RoutePriceRollupORM).where(
+                    RoutePriceRollupORM.resolution == "hour",
+                    RoutePriceRollupORM.bucket < hourly_before
+                )
+            )
+            await self.session.commit()
+            return raw.rowcount, hourly.rowcount
+        except Exception as e:
+            await self.session.rollback()
+            self.logger.error(f"Error pruning price history: {e}")
+            raise
+
+    async def get_route_costs(self) -> RouteCosts:
+        """Себестоимость, маржа и текущие цены всех маршрутов по колонкам"""
+        try:
+            result = await self.session.execute(
+                select(
+                    ProviderRoutesORM.id,
+                    ProviderRoutesORM.provider_id,
+                    ProviderRoutesORM.service_code,
+                    ProviderRoutesORM.country_code,
+                    ProviderRoutesORM.cost_price,
+                    ProviderRoutesORM.min_margin_percent,
+                    ProviderRoutesORM.client_price,
+                    ProviderRoutesORM.vip_client_price
+                )
+            )
+            rows = result.all()
+            if not rows:
+                return RouteCosts([], [], [], [], [], [], [], [])
+            return RouteCosts(*(list(values) for values in zip(*rows)))
+        except Exception as e:
+            self.logger.error(f"Error getting route costs: {e}")
+            raise
+
+    async def apply_route_prices(self, updates: List[Tuple[int, Decimal, Decimal]]) -> int:
+        """Записать новые цены (id, client_price, vip_client_price) одним UPDATE"""
+        if not updates:
+            return 0
+        try:
+            if os.environ.get("TESTING") == "1":
+                # SQLite в тестах: без массивов, тот же UPDATE по первичному ключу пачкой параметров
+                await self.session.execute(
+                    update(ProviderRoutesORM),
+                    [
+                        {"id": route_id, "client_price": client_price, "vip_client_price": vip_price}
+                        for route_id, client_price, vip_price in updates
+                    ]
+                )
+            else:
+                ids, client_prices, vip_prices = (list(column) for column in zip(*updates))
+                await self.session.execute(
+                    text(APPLY_ROUTE_PRICES_SQL),
+                    {"ids": ids, "client_prices": client_prices, "vip_prices": vip_prices}
+                )
+            await self.session.commit()
+            self.logger.info(f"Applied new prices to {len(updates)} routes")
+            return len(updates)
+        except Exception as e:
+            await self.session.rollback()
+            self.logger.error(f"Error applying prices to {len(updates)} routes: {e}")
+            raise
+
+    async def get_markup_rules(self) -> List[MarkupRule]:
+        try:
+            result = await self.session.execute(
+                select(SystemConfigORM.value)
+                .where(SystemConfigORM.key == MARKUP_RULES_CONFIG_KEY)
+                .order_by(SystemConfigORM.id.desc())
+                .limit(1)
+            )
+            value = result.scalar_one_or_none()
+            return [MarkupRule.model_validate(rule) for rule in value or []]
+        except Exception as e:
+            self.logger.error(f"Error getting markup rules: {e}")
+            raise
+
+    async def save_markup_rules(self, rules: List[MarkupRule]) -> List[MarkupRule]:
+        try:
+            value = [rule.model_dump(mode="json") for rule in rules]
+            result = await self.session.execute(
+                update(SystemConfigORM)
+                .where(SystemConfigORM.key == MARKUP_RULES_CONFIG_KEY)
+                .values(value=value, updated_at=func.now())
+            )
+            if not result.rowcount:
+                self.session.add(SystemConfigORM(
+                    key=MARKUP_RULES_CONFIG_KEY,
+                    value=value,
+                    description="Правила наценки для переоценки маршрутов",
+                    category="pricing"
+                ))
+            await self.session.commit()
+            return rules
+        except Exception as e:
+            await self.session.rollback()
+            self.logger.error(f"Error saving markup rules: {e}")
+            raise
+
+    @staticmethod
+    def _price_list_record(row: RoutePriceRow) -> tuple:
+        return (
+            row.service_code,
+            row.country_code,
+            row.provider_service_code,
+            row.provider_country_code,
+            row.external_product_id,
+            row.cost_price,
+            row.client_price,
+            row.vip_client_price if row.vip_client_price is not None else row.client_price,
+            row.available_count,
+            row.is_active,
+        )
+
+    @staticmethod
+    def _insert_defaults() -> dict:
+        """
+        Значения по умолчанию остальных колонок provider_routes.
+        В схеме это клиентские default, поэтому в INSERT ... SELECT их нужно передать явно.
+        """
+        defaults = {}
+        for col in ProviderRoutesORM.__table__.columns:
+            if col.name in PRICE_LIST_COLUMNS or col.default is None:
+                continue
+            value = col.default.arg(None) if col.default.is_callable else col.default.arg
+            defaults[col.name] = literal(value, type_=col.type)
+        return defaults
+
+    def _merge_update_set(self, excluded) -> dict:
+        values = {name: getattr(excluded, name) for name in PRICE_LIST_UPDATE_COLUMNS}
+        values["last_price_update"] = func.now()
+        return values
+
+    @staticmethod
+    def _changed_condition(excluded):
+        return or_(*(
+            getattr(ProviderRoutesORM, name).is_distinct_from(getattr(excluded, name))
+            for name in PRICE_LIST_UPDATE_COLUMNS
+        ))
+
+    async def _price_list_staging_insert(self, provider_id: int, rows: List[RoutePriceRow]):
+        await self.session.execute(text(PRICE_LIST_STAGING_DDL))
+
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "provider_routes_staging",
+            records=[(*self._price_list_record(row), ordinal) for ordinal, row in enumerate(rows)],
+            columns=[*PRICE_LIST_COLUMNS, "ordinal"]
+        )
+
+        defaults = self._insert_defaults()
+        columns = ["provider_id", *PRICE_LIST_COLUMNS, *defaults, "last_price_update"]
+        source = (
+            select(
+                literal(provider_id).label("provider_id"),
+                *(price_list_staging.c[name] for name in PRICE_LIST_COLUMNS),
+                *defaults.values(),
+                func.now()
+            )
+            # ON CONFLICT не может обновить одну строку дважды, дубликаты в прайсе схлопываем.
+            # Как и в ветке SQLite, из дубликатов остаётся последняя строка прайса
+            .distinct(price_list_staging.c.country_code, price_list_staging.c.service_code)
+            .order_by(
+                price_list_staging.c.country_code,
+                price_list_staging.c.service_code,
+                price_list_staging.c.ordinal.desc()
+            )
+        )
+
+        return pg_insert(ProviderRoutesORM).from_select(columns, source)
+
+    async def _price_list_values_insert(self, provider_id: int, rows: List[RoutePriceRow]):
+        # SQLite в тестах: без COPY, тот же upsert по списку значений.
+        # BIGINT-ключ в SQLite не автоинкрементный, id новым строкам выдаём сами
+        next_id = (await self.session.execute(select(func.max(ProviderRoutesORM.id)))).scalar() or 0
+        records = {}
+        for row in rows:
+            record = dict(zip(PRICE_LIST_COLUMNS, self._price_list_record(row)))
+            next_id += 1
+            records[(row.country_code, row.service_code)] = {"id": next_id, "provider_id": provider_id, **record}
+
+        return sqlite_insert(ProviderRoutesORM).values(list(records.values()))
+
     def _orm_to_entity(self, route_orm: ProviderRoutesORM) -> ProviderRoute:
         return ProviderRoute(
             id=route_orm.id,
@@ -89,5 +89,6 @@ class ServiceRepository(IServiceRepository):
             category=service_orm.category,
             icon=service_orm.icon,
             is_popular=service_orm.is_popular,
-            description=service_orm.description
+            description=service_orm.description,
+            sort_order=service_orm.sort_order or 0
         )
\ No newline at end of file
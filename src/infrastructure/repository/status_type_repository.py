@@ -1,6 +1,9 @@
+import asyncio
+import time
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional, Any
+from sqlalchemy import select, update, delete
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
 from src.core.domain.repository.interfaces import IStatusTypeRepository
 from src.core.domain.entity.status_type import StatusType
@@ -8,57 +11,177 @@ from src.infrastructure.database.schemas import StatusTypeORM
 from src.core.logging_config import get_logger
 
 
+class StatusTypeTable:
+    """Неизменяемый справочник status_types с поиском по коду и по id"""
+
+    def __init__(self, statuses: Iterable[StatusType]):
+        statuses = list(statuses)
+        self.by_code: Mapping[str, StatusType] = MappingProxyType({s.code: s for s in statuses})
+        self.by_id: Mapping[int, StatusType] = MappingProxyType({s.id: s for s in statuses})
+        self.non_final_ids = tuple(sorted(s.id for s in statuses if not s.is_final))
+
+    def id_of(self, code: str) -> Optional[int]:
+        status = self.by_code.get(code)
+        return status.id if status else None
+
+    def code_of(self, status_id: int) -> Optional[str]:
+        status = self.by_id.get(status_id)
+        return status.code if status else None
+
+
+# Таблица крошечная и почти не меняется: держим её в процессе, а не читаем на каждый заказ
+_table: Optional[StatusTypeTable] = None
+_load_lock: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = None
+
+# Неизвестный код или id перечитывает справочник не чаще раза в это число секунд,
+# чтобы поток запросов с несуществующим статусом не превращался в поток SELECT
+MISS_REFRESH_COOLDOWN = 5.0
+_miss_refreshed_at: Optional[float] = None
+
+
+def invalidate_status_types() -> None:
+    """Сбросить справочник; следующее обращение перечитает его из БД"""
+    global _table, _miss_refreshed_at
+    _table = None
+    _miss_refreshed_at = None
+
+
+def _get_load_lock() -> asyncio.Lock:
+    """Блокировка загрузки справочника; создаётся в работающем цикле событий, а не при импорте"""
+    global _load_lock
+    loop = asyncio.get_running_loop()
+    if _load_lock is None or _load_lock[0] is not loop:
+        _load_lock = (loop, asyncio.Lock())
+    return _load_lock[1]
+
+
 class StatusTypeRepository(IStatusTypeRepository):
     def __init__(self, session: AsyncSession):
         self.session = session
         self.logger = get_logger(__name__)
 
-    async def get_by_code(self, code: str) -> Optional[StatusType]:
-        try:
-            result = await self.session.execute(
-                select(StatusTypeORM).where(StatusTypeORM.code == code)
-            )
-            status_orm = result.scalar_one_or_none()
+    async def get_table(self, refresh: bool = False) -> StatusTypeTable:
+        """Справочник статусов из кэша процесса; при первом обращении или refresh читается из БД"""
+        global _table
+        table = _table
+        if table is not None and not refresh:
+            return table
 
-            if not status_orm:
-                return None
+        async with _get_load_lock():
+            if _table is None or _table is table:
+                try:
+                    result = await self.session.execute(select(StatusTypeORM))
+                    _table = StatusTypeTable(self._orm_to_entity(s) for s in result.scalars().all())
+                except Exception as e:
+                    self.logger.error(f"Error loading status types: {e}")
+                    raise
+            return _table
+
+    async def _refresh_on_miss(self, table: StatusTypeTable) -> StatusTypeTable:
+        """Перечитать справочник после промаха, если с прошлого такого перечитывания прошло достаточно времени"""
+        global _miss_refreshed_at
+        now = time.monotonic()
+        if _miss_refreshed_at is not None and now - _miss_refreshed_at < MISS_REFRESH_COOLDOWN:
+            return table
+        _miss_refreshed_at = now
+        return await self.get_table(refresh=True)
 
+    async def get_table_covering(self, status_ids: Iterable[int]) -> StatusTypeTable:
+        """Справочник, в котором есть все status_ids; статус, добавленный после загрузки, перечитывает его"""
+        table = await self.get_table()
+        if any(status_id not in table.by_id for status_id in status_ids):
+            table = await self._refresh_on_miss(table)
+        return table
+
+    async def id_of(self, code: str) -> Optional[int]:
+        """id статуса по коду; неизвестный код перечитывает справочник не чаще MISS_REFRESH_COOLDOWN"""
+        table = await self.get_table()
+        status_id = table.id_of(code)
+        if status_id is None:
+            status_id = (await self._refresh_on_miss(table)).id_of(code)
+        return status_id
+
+    async def code_of(self, status_id: int) -> Optional[str]:
+        table = await self.get_table()
+        code = table.code_of(status_id)
+        if code is None:
+            code = (await self._refresh_on_miss(table)).code_of(status_id)
+        return code
+
+    async def get_by_id(self, id: int) -> Optional[StatusType]:
+        table = await self.get_table()
+        return table.by_id.get(id)
+
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[StatusType]:
+        table = await self.get_table()
+        return sorted(table.by_id.values(), key=lambda status: status.id)[skip:skip + limit]
+
+    async def create(self, entity: Dict[str, Any]) -> StatusType:
+        try:
+            status_orm = StatusTypeORM(**entity)
+            self.session.add(status_orm)
+            await self.session.commit()
+            await self.session.refresh(status_orm)
+            invalidate_status_types()
             return self._orm_to_entity(status_orm)
         except Exception as e:
-            self.logger.error(f"Error getting status type by code {code}: {e}")
+            await self.session.rollback()
+            self.logger.error(f"Error creating status type: {e}")
             raise
 
-    async def get_final_statuses(self) -> List[Any]:
+    async def update(self, id: int, entity: Dict[str, Any]) -> Optional[StatusType]:
         try:
             result = await self.session.execute(
-                select(StatusTypeORM).where(StatusTypeORM.is_final == True)
+                update(StatusTypeORM)
+                .where(StatusTypeORM.id == id)
+                .values(**entity)
+                .returning(StatusTypeORM)
             )
-            statuses_orm = result.scalars().all()
 
-            return [self._orm_to_entity(status_orm) for status_orm in statuses_orm]
+            status_orm = result.scalar_one_or_none()
+            if not status_orm:
+                return None
+
+            await self.session.commit()
+            invalidate_status_types()
+            return self._orm_to_entity(status_orm)
         except Exception as e:
-            self.logger.error(f"Error getting final statuses: {e}")
+            await self.session.rollback()
+            self.logger.error(f"Error updating status type {id}: {e}")
             raise
 
-    async def get_error_statuses(self) -> List[Any]:
+    async def delete(self, id: int) -> bool:
         try:
             result = await self.session.execute(
-                select(StatusTypeORM).where(StatusTypeORM.is_error == True)
+                delete(StatusTypeORM).where(StatusTypeORM.id == id)
             )
-            statuses_orm = result.scalars().all()
-
-            return [self._orm_to_entity(status_orm) for status_orm in statuses_orm]
+            await self.session.commit()
+            invalidate_status_types()
+            return result.rowcount > 0
         except Exception as e:
-            self.logger.error(f"Error getting error statuses: {e}")
+            await self.session.rollback()
+            self.logger.error(f"Error deleting status type {id}: {e}")
             raise
 
+    async def get_by_code(self, code: str) -> Optional[StatusType]:
+        table = await self.get_table()
+        return table.by_code.get(code)
+
+    async def get_final_statuses(self) -> List[Any]:
+        table = await self.get_table()
+        return [status for status in table.by_id.values() if status.is_final]
+
+    async def get_error_statuses(self) -> List[Any]:
+        table = await self.get_table()
+        return [status for status in table.by_id.values() if status.is_error]
+
     def _orm_to_entity(self, status_orm: StatusTypeORM) -> StatusType:
         return StatusType(
             id=status_orm.id,
             code=status_orm.code,
             name_ru=status_orm.name_ru,
             name_en=status_orm.name_en,
-            is_final=status_orm.is_final,
-            is_error=status_orm.is_error,
+            is_final=bool(status_orm.is_final),
+            is_error=bool(status_orm.is_error),
             description=status_orm.description
         )
@@ -1,6 +1,7 @@
 from src.core.app import Application
 from src.presentation.api import routers
 from src.core.logging_config import setup_logging, get_logger
+from src.core.di.service import price_catalog, best_route_index, price_history_service
 from contextlib import asynccontextmanager
 from sqlalchemy.exc import OperationalError
 import sys
@@ -15,6 +16,9 @@ async def lifespan(app):
         from src.infrastructure.database.init_db import sync_database
         await sync_database()
         logger.info("✅ Database connection established")
+        await price_catalog.start()
+        await best_route_index.start()
+        await price_history_service.start()
         yield
     except OperationalError as e:
         logger.error(f"Database error: {e}")
@@ -25,6 +29,9 @@ async def lifespan(app):
         yield
         sys.exit()
     finally:
+        await price_catalog.stop()
+        await best_route_index.stop()
+        await price_history_service.stop()
         logger.info("Database connection closed")
 
 
@@ -4,6 +4,8 @@ from src.presentation.api.payments.payment_router import router as payment_route
 from .user.user_router import user_router
 from .price.price_router import price_router
 from .orders.order_router import router as order_router
+from .providers.provider_router import router as provider_router
+from .pricing.pricing_router import router as pricing_router
 
 routers = [
     health_router,
@@ -11,5 +13,7 @@ routers = [
     payment_router,
     webhooks_router,
     price_router,
-    order_router
+    order_router,
+    provider_router,
+    pricing_router
 ]
\ No newline at end of file
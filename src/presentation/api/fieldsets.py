@@ -0,0 +1,34 @@
+from typing import Any, Callable, FrozenSet, Optional, Type
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel, TypeAdapter
+
+
+def fieldset(model: Type[BaseModel]) -> Callable[..., Optional[FrozenSet[str]]]:
+    """
+    Зависимость для ?fields=a,b,c: набор полей model, которые нужно вернуть.
+    None — параметр не передан, ответ полный.
+    """
+    allowed = frozenset(model.model_fields)
+
+    def dependency(fields: Optional[str] = Query(None, max_length=500)) -> Optional[FrozenSet[str]]:
+        if not fields:
+            return None
+        selected = frozenset(name.strip() for name in fields.split(",") if name.strip())
+        unknown = selected - allowed
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        return selected or None
+
+    return dependency
+
+
+def sparse_json(adapter: TypeAdapter, value: Any, include: Any, headers: Optional[dict] = None) -> Response:
+    """Тело ответа только с выбранными полями; response_model не применяется, поля могут отсутствовать"""
+    return Response(
+        content=adapter.dump_json(value, include=include),
+        media_type="application/json",
+        headers=headers
+    )
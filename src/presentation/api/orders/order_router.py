@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from pydantic import TypeAdapter
+from typing import FrozenSet, List, Optional
 from datetime import datetime, timedelta
 
-from src.core.di import get_current_user, get_order_service, get_user_service
-from src.services.order_service import OrderService
+from src.core.di import get_current_admin, get_current_user, get_order_service, get_user_service
+from src.services.order_service import OrderService, next_cursor
 from src.services.user_service import UserService
 from src.core.domain.entity.user import User
 from src.core.domain.dto.order_dto import OrderDTO, OrderCreateDTO, OrderStatusDTO, OrderListDTO
@@ -11,10 +12,25 @@ from src.core.domain.dto.history_dto import UserHistoryDTO, DashboardStatsDTO
 from src.core.domain.dto.response_dto import StandardResponse, PaginatedResponse
 from src.core.exceptions.exceptions import NotFoundException, InsufficientBalanceException
 from src.core.logging_config import get_logger
+from src.presentation.api.fieldsets import fieldset, sparse_json
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 logger = get_logger(__name__)
 
+order_fields = fieldset(OrderDTO)
+_order_list = TypeAdapter(List[OrderDTO])
+_order_page = TypeAdapter(OrderListDTO)
+
+
+def _order_list_response(response: Response, orders: List[OrderDTO], limit: int, fields: Optional[FrozenSet[str]]):
+    """Список заказов; курсор следующей страницы — в заголовке X-Next-Cursor"""
+    cursor = next_cursor(orders, limit)
+    headers = {"X-Next-Cursor": cursor} if cursor else {}
+    if fields:
+        return sparse_json(_order_list, orders, {"__all__": fields}, headers)
+    response.headers.update(headers)
+    return orders
+
 
 @router.post("/create", response_model=OrderDTO)
 async def create_order(
@@ -37,7 +53,8 @@ async def create_order(
             order_create_dto=order_data,
             user_id=current_user.id,
             user_balance=user.balance,
-            client_ip=client_ip
+            client_ip=client_ip,
+            discount_rate=user.discount_rate
         )
 
         return order
@@ -60,21 +77,63 @@ async def create_order(
         )
 
 
+@router.get("", response_model=List[OrderDTO])
+async def get_all_orders(
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = Query(None, max_length=200),
+        fields: Optional[FrozenSet[str]] = Depends(order_fields),
+        current_user: User = Depends(get_current_admin),
+        order_service: OrderService = Depends(get_order_service)
+):
+    """Все заказы для администратора, от новых к старым"""
+    try:
+        orders = await order_service.get_all_orders(skip=skip, limit=limit, fields=fields, cursor=cursor)
+        return _order_list_response(response, orders, limit, fields)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error getting all orders: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
 @router.get("/my", response_model=OrderListDTO)
 async def get_my_orders(
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = Query(None, max_length=200),
+        fields: Optional[FrozenSet[str]] = Depends(order_fields),
         current_user: User = Depends(get_current_user),
         order_service: OrderService = Depends(get_order_service)
 ):
+    """Заказы пользователя; для глубоких страниц передавайте next_cursor вместо skip"""
     try:
         orders = await order_service.get_orders_by_user_id(
             user_id=current_user.id,
             skip=skip,
-            limit=limit
+            limit=limit,
+            fields=fields,
+            cursor=cursor
         )
+        if fields:
+            return sparse_json(_order_page, orders, {
+                "orders": {"__all__": fields}, "total": True, "page": True, "size": True, "next_cursor": True
+            })
         return orders
 
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error getting user orders: {e}")
         raise HTTPException(
@@ -85,11 +144,14 @@ async def get_my_orders(
 
 @router.get("/active", response_model=List[OrderDTO])
 async def get_my_active_orders(
+        fields: Optional[FrozenSet[str]] = Depends(order_fields),
         current_user: User = Depends(get_current_user),
         order_service: OrderService = Depends(get_order_service)
 ):
     try:
-        orders = await order_service.get_active_orders(current_user.id)
+        orders = await order_service.get_active_orders(current_user.id, fields)
+        if fields:
+            return sparse_json(_order_list, orders, {"__all__": fields})
         return orders
 
     except Exception as e:
@@ -201,7 +263,8 @@ async def validate_order(
         validation_result = await order_service.validate_order_creation(
             service=order_data.service,
             country_code=order_data.country_code,
-            user_balance=user.balance
+            user_balance=user.balance,
+            discount_rate=user.discount_rate
         )
 
         return validation_result
@@ -333,18 +396,28 @@ async def get_orders_by_period(
 @router.get("/status/{status}", response_model=List[OrderDTO])
 async def get_orders_by_status(
         status: str,
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = Query(None, max_length=200),
+        fields: Optional[FrozenSet[str]] = Depends(order_fields),
         order_service: OrderService = Depends(get_order_service)
 ):
     try:
         orders = await order_service.get_orders_by_status(
             status=status,
             skip=skip,
-            limit=limit
+            limit=limit,
+            fields=fields,
+            cursor=cursor
         )
-        return orders
+        return _order_list_response(response, orders, limit, fields)
 
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error getting orders by status {status}: {e}")
         raise
\ No newline at end of file
@@ -1,21 +1,149 @@
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.exceptions import HTTPException
-from src.core.di import get_price_service
+from src.core.di import get_current_user, get_locale, get_price_service
+from src.core.domain.entity.user import User
 from src.core.logging_config import get_logger
 from src.core.domain.entity.service_price import ServicePrice
 from src.core.domain.dto.response_dto import StandardResponse
-from typing import List, Optional
+from src.core.domain.dto.service_price_dto import (
+    CatalogChangesDTO, CountryServicesDTO, PriceBatchRequestDTO, ServiceCatalogDTO, SuggestionDTO
+)
+from src.presentation.api.fieldsets import fieldset, sparse_json
+from src.services.price_catalog import DEFAULT_LOCALE, SUPPORTED_ENCODINGS, discount_tier
+from pydantic import TypeAdapter
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
 
 price_router = APIRouter(prefix="/prices", tags=["prices"])
 logger = get_logger(__name__)
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+_price_list = TypeAdapter(List[ServicePrice])
+price_fields = fieldset(ServicePrice)
+
+
+def _fields_variant(fields: Optional[FrozenSet[str]]) -> str:
+    """Часть ETag для набора полей: порядок в ?fields= на тег не влияет"""
+    return "f" + ".".join(sorted(fields)) if fields else ""
+
+
+def _price_list_response(prices: List[ServicePrice], fields: Optional[FrozenSet[str]]):
+    if fields:
+        return sparse_json(_price_list, prices, {"__all__": fields})
+    return prices
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def _negotiate_encoding(request: Request) -> str:
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+
+    for encoding in SUPPORTED_ENCODINGS:
+        if encoding == "identity" or accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+async def _etag_headers(
+        price_service, variant: str = "identity", locale: str = DEFAULT_LOCALE
+) -> Dict[str, str]:
+    """
+    ETag версии каталога; у сжатых и переведённых представлений свой тег,
+    как требует строгое сравнение
+    """
+    version = await price_service.get_catalog_version()
+    if version is None:
+        return {}
+
+    suffix = [part for part, default in ((locale, DEFAULT_LOCALE), (variant, "identity")) if part != default]
+    etag = "-".join([version] + suffix)
+    return {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+
+
+def _variant(*parts: str) -> str:
+    return "-".join(filter(None, parts))
+
+
+async def _payload_response(
+        price_service,
+        result: Tuple[bytes, str],
+        negotiated: str,
+        headers: Dict[str, str],
+        locale: str,
+        variant: str = ""
+) -> Response:
+    """Готовое тело; если сжатая копия ещё не готова, у несжатого тела и ETag несжатого варианта"""
+    payload, encoding = result
+    if encoding != negotiated:
+        etag = (await _etag_headers(price_service, _variant(variant, encoding), locale)).get("ETag")
+        if etag:
+            headers["ETag"] = etag
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+
+def _not_modified(request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    """Готовый 304 без обращения к данным и сериализации, если версия у клиента совпадает"""
+    etag = headers.get("ETag")
+    if etag and _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
 
 @price_router.get("/catalog", response_model=List[ServicePrice])
 async def get_price_catalog(
+        request: Request,
+        response: Response,
+        stream: bool = Query(False),
+        fields: Optional[FrozenSet[str]] = Depends(price_fields),
+        locale: str = Depends(get_locale),
         price_service=Depends(get_price_service)
 ) -> List[ServicePrice]:
     try:
-        return await price_service.get_full_catalog()
+        if stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            return StreamingResponse(price_service.stream_catalog(locale), media_type=NDJSON_MEDIA_TYPE)
+
+        encoding = _negotiate_encoding(request)
+        variant = _fields_variant(fields)
+        headers = await _etag_headers(price_service, _variant(variant, encoding), locale)
+        headers["Vary"] = "Accept-Encoding, Accept-Language, Authorization"
+
+        not_modified = _not_modified(request, headers)
+        if not_modified:
+            return not_modified
+
+        payload = await price_service.get_catalog_payload(encoding, locale, fields=fields)
+        if payload is None:
+            response.headers.update(headers)
+            catalog = await price_service.get_full_catalog(locale)
+            if fields:
+                return sparse_json(_price_list, catalog, {"__all__": fields}, headers)
+            return catalog
+
+        return await _payload_response(price_service, payload, encoding, headers, locale, variant)
     except Exception as e:
         logger.error(f"Error getting price catalog: {e}")
         raise HTTPException(
@@ -24,14 +152,141 @@ async def get_price_catalog(
         )
 
 
+@price_router.get("/catalog/my", response_model=List[ServicePrice])
+async def get_personal_catalog(
+        request: Request,
+        response: Response,
+        fields: Optional[FrozenSet[str]] = Depends(price_fields),
+        locale: str = Depends(get_locale),
+        current_user: User = Depends(get_current_user),
+        price_service=Depends(get_price_service)
+) -> List[ServicePrice]:
+    """Каталог с ценами по скидке пользователя; тот же расчёт применяется при создании заказа"""
+    try:
+        tier = discount_tier(current_user.discount_rate)
+        encoding = _negotiate_encoding(request)
+        variant = _variant(f"d{tier.normalize()}" if tier else "", _fields_variant(fields))
+        headers = await _etag_headers(price_service, _variant(variant, encoding), locale)
+        headers["Cache-Control"] = "private, no-cache"
+        headers["Vary"] = "Accept-Encoding, Accept-Language, Authorization"
+
+        not_modified = _not_modified(request, headers)
+        if not_modified:
+            return not_modified
+
+        payload = await price_service.get_catalog_payload(encoding, locale, tier, fields)
+        if payload is None:
+            response.headers.update(headers)
+            catalog = await price_service.get_full_catalog(locale, tier)
+            if fields:
+                return sparse_json(_price_list, catalog, {"__all__": fields}, headers)
+            return catalog
+
+        return await _payload_response(price_service, payload, encoding, headers, locale, variant)
+    except Exception as e:
+        logger.error(f"Error getting catalog for user {current_user.id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+@price_router.get(
+    "/catalog/grouped",
+    response_model=Union[List[ServiceCatalogDTO], List[CountryServicesDTO]]
+)
+async def get_grouped_catalog(
+        request: Request,
+        response: Response,
+        by: str = Query("service", pattern="^(service|country)$"),
+        locale: str = Depends(get_locale),
+        price_service=Depends(get_price_service)
+):
+    try:
+        encoding = _negotiate_encoding(request)
+        headers = await _etag_headers(price_service, _variant(by, encoding), locale)
+        headers["Vary"] = "Accept-Encoding, Accept-Language, Authorization"
+
+        not_modified = _not_modified(request, headers)
+        if not_modified:
+            return not_modified
+
+        payload = await price_service.get_grouped_catalog_payload(by, encoding, locale)
+        if payload is None:
+            response.headers.update(headers)
+            return await price_service.get_grouped_catalog(by, locale)
+
+        return await _payload_response(price_service, payload, encoding, headers, locale, by)
+    except Exception as e:
+        logger.error(f"Error getting catalog grouped by {by}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+@price_router.get("/changes", response_model=CatalogChangesDTO)
+async def get_catalog_changes(
+        since: Optional[int] = Query(None, ge=0),
+        locale: str = Depends(get_locale),
+        price_service=Depends(get_price_service)
+) -> CatalogChangesDTO:
+    try:
+        return await price_service.get_catalog_changes(since, locale)
+    except Exception as e:
+        logger.error(f"Error getting catalog changes since {since}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+@price_router.get("/stream")
+async def stream_price_changes(
+        request: Request,
+        locale: str = Depends(get_locale),
+        price_service=Depends(get_price_service)
+) -> StreamingResponse:
+    """
+    Изменения цен и доступности в формате SSE.
+    id события — версия ленты изменений; после переподключения браузер присылает её
+    в Last-Event-ID, и клиент получает пропущенную дельту или событие resync.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    since = int(last_event_id) if last_event_id.isdigit() else None
+    return StreamingResponse(
+        price_service.stream_changes(locale, since),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@price_router.get("/suggest", response_model=List[SuggestionDTO])
+async def suggest(
+        q: str = Query(..., min_length=1, max_length=100),
+        limit: int = Query(10, ge=1, le=50),
+        kind: Optional[str] = Query(None, pattern="^(service|country)$"),
+        price_service=Depends(get_price_service)
+) -> List[SuggestionDTO]:
+    try:
+        return await price_service.suggest(q, limit, kind)
+    except Exception as e:
+        logger.error(f"Error getting suggestions for {q!r}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
 @price_router.get("/service/{service_code}/{country_code}", response_model=ServicePrice)
 async def get_service_price(
         service_code: str,
         country_code: str,
+        locale: str = Depends(get_locale),
         price_service=Depends(get_price_service)
 ) -> ServicePrice:
     try:
-        price = await price_service.get_service_price(service_code, country_code)
+        price = await price_service.get_service_price(service_code, country_code, locale)
         return price
     except KeyError as e:
         logger.warning(f"Validation error: {e}")
@@ -47,13 +302,33 @@ async def get_service_price(
         )
 
 
+@price_router.post("/batch", response_model=List[Optional[ServicePrice]])
+async def get_batch_prices(
+        request: PriceBatchRequestDTO,
+        locale: str = Depends(get_locale),
+        price_service=Depends(get_price_service)
+) -> List[Optional[ServicePrice]]:
+    try:
+        pairs = [(item.service_code, item.country_code) for item in request.items]
+        return await price_service.get_batch_prices(pairs, locale)
+    except Exception as e:
+        logger.error(f"Error getting batch prices for {len(request.items)} pairs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
 @price_router.get("/country/{country_code}", response_model=List[ServicePrice])
 async def get_services_by_country(
         country_code: str,
+        fields: Optional[FrozenSet[str]] = Depends(price_fields),
+        locale: str = Depends(get_locale),
         price_service=Depends(get_price_service)
 ) -> List[ServicePrice]:
     try:
-        return await price_service.list_services_by_country(country_code)
+        prices = await price_service.list_services_by_country(country_code, locale)
+        return _price_list_response(prices, fields)
     except KeyError as e:
         logger.warning(f"Validation error: {e}")
         raise HTTPException(
@@ -71,10 +346,13 @@ async def get_services_by_country(
 @price_router.get("/service/{service_code}", response_model=List[ServicePrice])
 async def get_countries_by_service(
         service_code: str,
+        fields: Optional[FrozenSet[str]] = Depends(price_fields),
+        locale: str = Depends(get_locale),
         price_service=Depends(get_price_service)
 ) -> List[ServicePrice]:
     try:
-        return await price_service.list_countries_by_service(service_code)
+        prices = await price_service.list_countries_by_service(service_code, locale)
+        return _price_list_response(prices, fields)
     except KeyError as e:
         logger.warning(f"Validation error: {e}")
         raise HTTPException(
@@ -91,10 +369,13 @@ async def get_countries_by_service(
 
 @price_router.get("/popular/services", response_model=List[ServicePrice])
 async def get_popular_services(
+        fields: Optional[FrozenSet[str]] = Depends(price_fields),
+        locale: str = Depends(get_locale),
         price_service=Depends(get_price_service)
 ) -> List[ServicePrice]:
     try:
-        return await price_service.get_popular_services()
+        prices = await price_service.get_popular_services(locale)
+        return _price_list_response(prices, fields)
     except Exception as e:
         logger.error(f"Error getting popular services: {e}")
         raise HTTPException(
@@ -105,10 +386,13 @@ async def get_popular_services(
 
 @price_router.get("/popular/countries", response_model=List[ServicePrice])
 async def get_popular_countries(
+        fields: Optional[FrozenSet[str]] = Depends(price_fields),
+        locale: str = Depends(get_locale),
         price_service=Depends(get_price_service)
 ) -> List[ServicePrice]:
     try:
-        return await price_service.get_popular_countries()
+        prices = await price_service.get_popular_countries(locale)
+        return _price_list_response(prices, fields)
     except Exception as e:
         logger.error(f"Error getting popular countries: {e}")
         raise HTTPException(
@@ -165,35 +449,47 @@ async def get_detailed_prices(
 
 @price_router.get("/search")
 async def search_prices(
+        request: Request,
+        response: Response,
         service_code: Optional[str] = Query(None),
         country_code: Optional[str] = Query(None),
+        locale: str = Depends(get_locale),
         price_service=Depends(get_price_service)
 ):
 
     try:
+        # Точная пара берётся из БД по лучшему маршруту, версия снимка её не описывает
+        if not (service_code and country_code):
+            headers = await _etag_headers(price_service, locale=locale)
+            headers["Vary"] = "Accept-Language, Authorization"
+            not_modified = _not_modified(request, headers)
+            if not_modified:
+                return not_modified
+            response.headers.update(headers)
+
         if service_code and country_code:
-            price = await price_service.get_service_price(service_code, country_code)
+            price = await price_service.get_service_price(service_code, country_code, locale)
             return StandardResponse(
                 success=True,
                 message="Price found successfully",
                 data=price
             )
         elif service_code:
-            countries = await price_service.list_countries_by_service(service_code)
+            countries = await price_service.list_countries_by_service(service_code, locale)
             return StandardResponse(
                 success=True,
                 message="Countries for service retrieved successfully",
                 data=countries
             )
         elif country_code:
-            services = await price_service.list_services_by_country(country_code)
+            services = await price_service.list_services_by_country(country_code, locale)
             return StandardResponse(
                 success=True,
                 message="Services for country retrieved successfully",
                 data=services
             )
         else:
-            catalog = await price_service.get_full_catalog()
+            catalog = await price_service.get_full_catalog(locale)
             return StandardResponse(
                 success=True,
                 message="Full catalog retrieved successfully",
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List
+
+from src.core.di import get_current_admin, get_repricing_service
+from src.services.repricing_service import RepricingService
+from src.core.domain.entity.user import User
+from src.core.domain.entity.provider_route import MarkupRule
+from src.core.domain.dto.provider_route_dto import RepriceResultDTO
+from src.core.logging_config import get_logger
+
+router = APIRouter(prefix="/pricing", tags=["pricing"])
+logger = get_logger(__name__)
+
+
+@router.get("/rules", response_model=List[MarkupRule])
+async def get_markup_rules(
+        current_user: User = Depends(get_current_admin),
+        repricing_service: RepricingService = Depends(get_repricing_service)
+):
+    try:
+        return await repricing_service.get_rules()
+    except Exception as e:
+        logger.error(f"Error getting markup rules: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+@router.put("/rules", response_model=List[MarkupRule])
+async def save_markup_rules(
+        rules: List[MarkupRule],
+        current_user: User = Depends(get_current_admin),
+        repricing_service: RepricingService = Depends(get_repricing_service)
+):
+    try:
+        return await repricing_service.save_rules(rules)
+    except ValueError as e:
+        logger.warning(f"Validation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error saving markup rules: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+@router.post("/reprice", response_model=RepriceResultDTO)
+async def reprice_routes(
+        dry_run: bool = Query(False),
+        current_user: User = Depends(get_current_admin),
+        repricing_service: RepricingService = Depends(get_repricing_service)
+):
+    try:
+        return await repricing_service.reprice(dry_run=dry_run)
+    except Exception as e:
+        logger.error(f"Error repricing routes: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
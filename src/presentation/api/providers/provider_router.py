@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import datetime
+from typing import List, Optional
+
+from src.core.di import get_current_admin, get_route_import_service, get_price_history_service
+from src.services.route_import_service import RouteImportService
+from src.services.price_history_service import PriceHistoryService
+from src.core.domain.entity.user import User
+from src.core.domain.dto.provider_route_dto import (
+    PriceListImportDTO,
+    ProviderPriceListDTO,
+    PriceListImportResultDTO,
+    PriceHistoryDTO
+)
+from src.core.logging_config import get_logger
+
+router = APIRouter(prefix="/providers", tags=["providers"])
+logger = get_logger(__name__)
+
+
+@router.post("/{provider_id}/price-list", response_model=PriceListImportResultDTO)
+async def import_price_list(
+        provider_id: int,
+        price_list: PriceListImportDTO,
+        current_user: User = Depends(get_current_admin),
+        import_service: RouteImportService = Depends(get_route_import_service)
+):
+    try:
+        return await import_service.import_price_list(
+            provider_id,
+            price_list.rows,
+            only_changed=price_list.only_changed
+        )
+    except Exception as e:
+        logger.error(f"Error importing price list for provider {provider_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+@router.post("/price-lists", response_model=List[PriceListImportResultDTO])
+async def import_price_lists(
+        price_lists: List[ProviderPriceListDTO],
+        only_changed: bool = Query(False),
+        current_user: User = Depends(get_current_admin),
+        import_service: RouteImportService = Depends(get_route_import_service)
+):
+    try:
+        return await import_service.import_price_lists(
+            {price_list.provider_id: price_list.rows for price_list in price_lists},
+            only_changed=only_changed
+        )
+    except Exception as e:
+        logger.error(f"Error importing {len(price_lists)} price lists: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+@router.get("/{provider_id}/price-history", response_model=PriceHistoryDTO)
+async def get_price_history(
+        provider_id: int,
+        service_code: str,
+        country_code: str,
+        since: datetime,
+        until: Optional[datetime] = None,
+        resolution: str = Query("auto", pattern="^(auto|raw|hour|day)$"),
+        current_user: User = Depends(get_current_admin),
+        history_service: PriceHistoryService = Depends(get_price_history_service)
+):
+    try:
+        return await history_service.get_history(
+            service_code, country_code, provider_id, since, until, resolution
+        )
+    except ValueError as e:
+        logger.warning(f"Validation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error getting price history for provider {provider_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
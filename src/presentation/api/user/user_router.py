@@ -90,7 +90,11 @@ async def login_user(
                 detail="Invalid credentials"
             )
 
-        token = jwt_service.create_access_token(user.id)
+        # Язык в токене позволяет локализовать ответы без чтения пользователя из БД
+        token = jwt_service.create_access_token(
+            user.id,
+            {"lang": user.language} if user.language else None
+        )
         logger.info(f"User {login_dto.user_name} logged in, token generated for user_id: {user.id}")
 
         return {
@@ -87,3 +87,10 @@ class JWTService:
         except ValueError as e:
             self.logger.error(f"Error extracting user_id from token: {str(e)}")
             return None
+
+    def get_language_from_token(self, token: str) -> Optional[str]:
+        try:
+            return self.decode(token).get('lang')
+        except ValueError as e:
+            self.logger.error(f"Error extracting language from token: {str(e)}")
+            return None
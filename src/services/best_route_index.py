@@ -0,0 +1,201 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import AsyncContextManager, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.core.domain.repository.interfaces import IPriceRepository
+from src.core.domain.entity.provider_route import RouteCandidate
+from src.core.domain.entity.service_price import ServiceRoutePrice
+from src.core.logging_config import get_logger
+
+RouteKey = Tuple[str, str]
+
+# Транзакция видна только после коммита, а updated_at у неё — время начала,
+# поэтому каждая синхронизация перечитывает маршруты с запасом назад
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def _route_order(route: RouteCandidate):
+    """Тот же порядок, что ORDER BY в get_price_for_service_country"""
+    return route.client_price, -route.rating_score, -route.available_count, route.id
+
+
+def _to_route_price(route: RouteCandidate) -> ServiceRoutePrice:
+    return ServiceRoutePrice(
+        service_code=route.service_code,
+        country_code=route.country_code,
+        price=float(route.client_price),
+        vip_price=float(route.vip_client_price) if route.vip_client_price else None,
+        available=route.is_active and route.available_count > 0,
+        service_name=route.service_name or route.service_code,
+        country_name=route.country_name or route.country_code,
+        provider_id=route.provider_id,
+        provider_name=route.provider_name
+    )
+
+
+class BestRouteIndex:
+    """
+    Процессный индекс лучших маршрутов по (service_code, country_code).
+    Лучший маршрут каждого ключа выбран заранее, чтение — одно обращение к словарю.
+    Изменённые маршруты подтягиваются по provider_routes.updated_at и применяются
+    на месте: пересчитываются только затронутые ключи.
+    Импорт и переоценка в этом процессе сами знают изменённые ключи и обновляют
+    их сразу через refresh_keys, не дожидаясь синхронизации.
+    Полная перезагрузка по расписанию убирает физически удалённые маршруты.
+    """
+
+    def __init__(
+            self,
+            repo_scope: Callable[[], AsyncContextManager[IPriceRepository]],
+            sync_interval: float = 5.0,
+            reload_interval: float = 600.0
+    ):
+        self._repo_scope = repo_scope
+        self._sync_interval = sync_interval
+        self._reload_interval = reload_interval
+        self._routes: Dict[RouteKey, Dict[int, RouteCandidate]] = {}
+        self._route_keys: Dict[int, RouteKey] = {}
+        self._best: Dict[RouteKey, ServiceRoutePrice] = {}
+        self._watermark: Optional[datetime] = None
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.logger = get_logger(__name__)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def best(self, service_code: str, country_code: str) -> Optional[ServiceRoutePrice]:
+        """Лучшая цена для пары; None, если активных маршрутов нет или индекс не загружен"""
+        return self._best.get((service_code, country_code))
+
+    def apply(self, routes: Iterable[RouteCandidate]) -> int:
+        """Применить изменённые маршруты; возвращает число пересчитанных ключей"""
+        touched = set()
+        for route in routes:
+            old_key = self._route_keys.pop(route.id, None)
+            if old_key is not None:
+                self._routes[old_key].pop(route.id, None)
+                touched.add(old_key)
+
+            if route.is_active and route.client_price > 0:
+                key = (route.service_code, route.country_code)
+                self._routes.setdefault(key, {})[route.id] = route
+                self._route_keys[route.id] = key
+                touched.add(key)
+
+            if route.updated_at and (self._watermark is None or route.updated_at > self._watermark):
+                self._watermark = route.updated_at
+
+        for key in touched:
+            self._reselect(key)
+        return len(touched)
+
+    def remove(self, route_id: int) -> None:
+        key = self._route_keys.pop(route_id, None)
+        if key is None:
+            return
+        self._routes[key].pop(route_id, None)
+        self._reselect(key)
+
+    def replace(self, keys: Iterable[RouteKey], routes: Iterable[RouteCandidate]) -> int:
+        """
+        Заменить все маршруты ключей keys на routes.
+        Отметка синхронизации не сдвигается: routes покрывают только эти ключи.
+        """
+        keys = set(keys)
+        for key in keys:
+            for route_id in self._routes.pop(key, {}):
+                self._route_keys.pop(route_id, None)
+
+        watermark = self._watermark
+        self.apply(routes)
+        self._watermark = watermark
+
+        for key in keys:
+            self._reselect(key)
+        return len(keys)
+
+    def _reselect(self, key: RouteKey) -> None:
+        candidates = self._routes.get(key)
+        if not candidates:
+            self._routes.pop(key, None)
+            self._best.pop(key, None)
+            return
+        self._best[key] = _to_route_price(min(candidates.values(), key=_route_order))
+
+    async def load(self) -> None:
+        """Полностью перечитать активные маршруты и подменить индекс"""
+        async with self._lock:
+            started = time.perf_counter()
+            async with self._repo_scope() as repo:
+                routes = await repo.get_route_candidates()
+
+            self._reset(routes)
+            self.logger.info(
+                f"Best route index loaded: {len(self._best)} keys from {len(routes)} routes "
+                f"in {time.perf_counter() - started:.3f}s"
+            )
+
+    async def sync(self) -> int:
+        """Подтянуть маршруты, изменённые после последней синхронизации"""
+        if not self._loaded or self._watermark is None:
+            await self.load()
+            return len(self._best)
+
+        async with self._lock:
+            async with self._repo_scope() as repo:
+                routes = await repo.get_route_candidates(updated_since=self._watermark - SYNC_OVERLAP)
+            return self.apply(routes)
+
+    async def refresh_keys(self, keys: Iterable[RouteKey]) -> int:
+        """Перечитать маршруты ключей, которые только что изменили в этом процессе"""
+        keys = list(dict.fromkeys(keys))
+        if not keys or not self._loaded:
+            return 0
+
+        async with self._lock:
+            async with self._repo_scope() as repo:
+                routes = await repo.get_route_candidates(keys=keys)
+            return self.replace(keys, routes)
+
+    def _reset(self, routes: List[RouteCandidate]) -> None:
+        # Собираем новый индекс целиком и подменяем, чтобы читатели не видели полупустой
+        fresh = BestRouteIndex(self._repo_scope)
+        fresh.apply(routes)
+        self._routes, self._route_keys, self._best = fresh._routes, fresh._route_keys, fresh._best
+        self._watermark = fresh._watermark
+        self._loaded = True
+
+    async def start(self) -> None:
+        try:
+            await self.load()
+        except Exception as e:
+            self.logger.error(f"Initial best route index load failed: {e}")
+        self._task = asyncio.create_task(self._run())
+        self.logger.info(f"Best route index sync started, interval {self._sync_interval}s")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        last_reload = time.monotonic()
+        while True:
+            await asyncio.sleep(self._sync_interval)
+            try:
+                if time.monotonic() - last_reload >= self._reload_interval:
+                    await self.load()
+                    last_reload = time.monotonic()
+                else:
+                    await self.sync()
+            except Exception as e:
+                self.logger.error(f"Error syncing best route index: {e}")
@@ -0,0 +1,108 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.core.domain.entity.services import ServicePublic
+from src.core.domain.entity.countries import CountryPublic
+from src.core.domain.dto.service_price_dto import SuggestionDTO
+
+# Запросы короче триграммы отвечаются по индексу префиксов слов
+MAX_PREFIX_LENGTH = 2
+
+# Классы совпадения в порядке выдачи
+MATCH_CODE = 0
+MATCH_NAME_PREFIX = 1
+MATCH_WORD_PREFIX = 2
+MATCH_SUBSTRING = 3
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().replace("ё", "е").split())
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameSearchIndex:
+    """
+    Индекс подсказок по названиям услуг и стран.
+    Запросы из одной-двух букв отвечаются словарём префиксов слов, длинные — пересечением
+    списков триграмм с проверкой подстроки. Записи заранее упорядочены по популярности,
+    поэтому ранжирование сводится к сортировке по паре целых чисел.
+    """
+
+    def __init__(self, services: List[ServicePublic], countries: List[CountryPublic]):
+        entries = [
+            (
+                SuggestionDTO(kind="service", code=s.code, name=s.name, is_popular=s.is_popular),
+                [s.name],
+                s.sort_order
+            )
+            for s in services
+        ] + [
+            (
+                SuggestionDTO(kind="country", code=c.code, name=c.name_ru, name_en=c.name_en, is_popular=c.is_popular),
+                [c.name_ru, c.name_en] if c.name_en else [c.name_ru],
+                c.sort_order
+            )
+            for c in countries
+        ]
+        entries.sort(key=lambda e: (not e[0].is_popular, e[2], e[0].name))
+
+        self._entries: List[SuggestionDTO] = [entry for entry, _, _ in entries]
+        self._names: List[List[str]] = []
+        self._codes: List[str] = []
+        self._prefixes: Dict[str, Set[int]] = {}
+        self._trigrams: Dict[str, Set[int]] = {}
+
+        for entry_id, (entry, names, _) in enumerate(entries):
+            normalized = [normalize(name) for name in names if name]
+            self._names.append(normalized)
+            self._codes.append(entry.code.lower())
+
+            for text in normalized + [entry.code.lower()]:
+                for word in text.split():
+                    for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1):
+                        self._prefixes.setdefault(word[:length], set()).add(entry_id)
+                for trigram in _trigrams(text):
+                    self._trigrams.setdefault(trigram, set()).add(entry_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None) -> List[SuggestionDTO]:
+        query = normalize(query)
+        if not query:
+            return []
+
+        if len(query) <= MAX_PREFIX_LENGTH and " " not in query:
+            candidates = self._prefixes.get(query, set())
+        else:
+            postings = [self._trigrams.get(t) for t in _trigrams(query)]
+            if not postings or not all(postings):
+                return []
+            candidates = set.intersection(*sorted(postings, key=len))
+
+        ranked: List[Tuple[int, int]] = []
+        for entry_id in candidates:
+            if kind and self._entries[entry_id].kind != kind:
+                continue
+            match = self._match(entry_id, query)
+            if match is not None:
+                ranked.append((match, entry_id))
+
+        ranked.sort()
+        return [self._entries[entry_id] for _, entry_id in ranked[:limit]]
+
+    def _match(self, entry_id: int, query: str) -> Optional[int]:
+        if self._codes[entry_id] == query:
+            return MATCH_CODE
+
+        best = None
+        for name in self._names[entry_id]:
+            if name.startswith(query):
+                return MATCH_NAME_PREFIX
+            if f" {query}" in f" {name}":
+                best = MATCH_WORD_PREFIX
+            elif best is None and query in name:
+                best = MATCH_SUBSTRING
+        return best
@@ -1,20 +1,96 @@
-from typing import List, Optional
+import base64
+import binascii
+from datetime import datetime
+from typing import Collection, List, Optional, Set, Tuple
 from src.core.domain.repository.interfaces import IOrderRepository, IPriceRepository, IUserRepository
+from src.core.domain.entity.service_price import ServiceRoutePrice
 from src.core.domain.entity.orders import Order, OrderCreate, OrderUpdate
 from src.core.domain.dto.order_dto import OrderDTO, OrderCreateDTO, OrderStatusDTO, OrderListDTO
 from src.core.domain.mappers.order_mapper import OrderMapper
 from src.core.exceptions.exceptions import NotFoundException, InsufficientBalanceException
 from src.core.logging_config import get_logger
+from src.services.best_route_index import BestRouteIndex
+from src.services.price_catalog import DEFAULT_LOCALE, PriceCatalogCache, apply_discount, discount_tier
+
+
+# Поля Order, которые нужны для поля OrderDTO
+_ORDER_SOURCE_FIELDS = {
+    "phone_number": ("number",),
+    "service_name": ("service",),
+    "country_name": ("country_code",),
+    "provider_name": ("provider_id",),
+}
+_NAME_FIELDS = frozenset(("service_name", "country_name", "provider_name"))
+
+
+def _order_fields(fields: Optional[Collection[str]]) -> Optional[Set[str]]:
+    """Поля Order, которые нужно прочитать из БД для полей OrderDTO fields"""
+    if not fields:
+        return None
+    return {source for name in fields for source in _ORDER_SOURCE_FIELDS.get(name, (name,))}
+
+
+def encode_cursor(created_at: datetime, order_id: int) -> str:
+    """Непрозрачный курсор страницы: ключ (created_at, id) последнего заказа"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{order_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def next_cursor(orders: List[OrderDTO], limit: int) -> Optional[str]:
+    """Курсор следующей страницы; неполная страница — последняя"""
+    if not orders or len(orders) < limit:
+        return None
+    last = orders[-1]
+    return encode_cursor(last.created_at, last.id)
 
 
 class OrderService:
-    def __init__(self, order_repo: IOrderRepository, price_repo: IPriceRepository, user_repo: IUserRepository):
+    def __init__(
+            self,
+            order_repo: IOrderRepository,
+            price_repo: IPriceRepository,
+            user_repo: IUserRepository,
+            route_index: Optional[BestRouteIndex] = None,
+            catalog: Optional[PriceCatalogCache] = None
+    ):
         self.order_repo = order_repo
         self.price_repo = price_repo
         self.user_repo = user_repo
+        self.route_index = route_index
+        self.catalog = catalog
         self.order_mapper = OrderMapper()
         self.logger = get_logger(__name__)
 
+    async def _get_best_price(self, service_code: str, country_code: str) -> Optional[ServiceRoutePrice]:
+        """Лучший маршрут из индекса; при промахе или незагруженном индексе — запрос в БД"""
+        if self.route_index and self.route_index.loaded:
+            price = self.route_index.best(service_code, country_code)
+            if price:
+                return price
+        return await self.price_repo.get_price_for_service_country(service_code, country_code)
+
+    async def _get_charge_price(self, service_code: str, country_code: str) -> Optional[ServiceRoutePrice]:
+        """
+        Цена для списания. Индекс синхронизируется с опозданием, поэтому выбранный
+        в нём маршрут перечитывается из БД; если его цена изменилась — берётся лучший из БД
+        """
+        if self.route_index and self.route_index.loaded:
+            indexed = self.route_index.best(service_code, country_code)
+            if indexed:
+                current = await self.price_repo.get_route_price(indexed.provider_id, service_code, country_code)
+                if current and current.price == indexed.price and current.available == indexed.available:
+                    return current
+                self.logger.info(f"Best route index is stale for {service_code}/{country_code}, using database")
+        return await self.price_repo.get_price_for_service_country(service_code, country_code)
+
     async def get_order_by_id(self, order_id: int) -> Optional[OrderDTO]:
         """Получить заказ по ID"""
         try:
@@ -38,28 +114,29 @@ class OrderService:
             self,
             user_id: int,
             skip: int = 0,
-            limit: int = 100
+            limit: int = 100,
+            fields: Optional[Collection[str]] = None,
+            cursor: Optional[str] = None
     ) -> OrderListDTO:
-        """Получить список заказов пользователя"""
+        """
+        Получить список заказов пользователя; fields — только эти поля OrderDTO.
+        cursor — next_cursor предыдущей страницы, тогда skip не используется.
+        """
         try:
-            orders = await self.order_repo.get_by_user_id(user_id, skip, limit)
-
-            service_names, country_names, provider_names = await self._get_orders_additional_data(orders)
-
-            order_dtos = self.order_mapper.entities_to_dto_list(
-                orders,
-                service_names,
-                country_names,
-                provider_names
+            after = decode_cursor(cursor) if cursor else None
+            orders = await self.order_repo.get_by_user_id(
+                user_id, skip, limit, fields=_order_fields(fields), after=after
             )
+            order_dtos = await self._to_dto_list(orders, fields)
 
             total_count = await self.order_repo.get_orders_count_by_user(user_id)
 
             return OrderListDTO(
                 orders=order_dtos,
                 total=total_count,
-                page=skip // limit + 1 if limit > 0 else 1,
-                size=limit
+                page=skip // limit + 1 if limit > 0 and not after else 1,
+                size=limit,
+                next_cursor=next_cursor(order_dtos, limit)
             )
         except Exception as e:
             self.logger.error(f"Error getting orders for user {user_id}: {e}")
@@ -69,31 +146,26 @@ class OrderService:
             self,
             status: str,
             skip: int = 0,
-            limit: int = 100
+            limit: int = 100,
+            fields: Optional[Collection[str]] = None,
+            cursor: Optional[str] = None
     ) -> List[OrderDTO]:
         try:
-            orders = await self.order_repo.get_by_status(status, skip, limit)
-            service_names, country_names, provider_names = await self._get_orders_additional_data(orders)
-            return self.order_mapper.entities_to_dto_list(
-                orders,
-                service_names,
-                country_names,
-                provider_names
+            after = decode_cursor(cursor) if cursor else None
+            orders = await self.order_repo.get_by_status(
+                status, skip, limit, fields=_order_fields(fields), after=after
             )
+            return await self._to_dto_list(orders, fields)
         except Exception as e:
             self.logger.error(f"Error getting orders by status {status}: {e}")
             raise
 
-    async def get_active_orders(self, user_id: int) -> List[OrderDTO]:
+    async def get_active_orders(
+            self, user_id: int, fields: Optional[Collection[str]] = None
+    ) -> List[OrderDTO]:
         try:
-            orders = await self.order_repo.get_active_orders(user_id)
-            service_names, country_names, provider_names = await self._get_orders_additional_data(orders)
-            return self.order_mapper.entities_to_dto_list(
-                orders,
-                service_names,
-                country_names,
-                provider_names
-            )
+            orders = await self.order_repo.get_active_orders(user_id, fields=_order_fields(fields))
+            return await self._to_dto_list(orders, fields)
         except Exception as e:
             self.logger.error(f"Error getting active orders for user {user_id}: {e}")
             raise
@@ -101,17 +173,14 @@ class OrderService:
     async def get_all_orders(
             self,
             skip: int = 0,
-            limit: int = 100
+            limit: int = 100,
+            fields: Optional[Collection[str]] = None,
+            cursor: Optional[str] = None
     ) -> List[OrderDTO]:
         try:
-            orders = await self.order_repo.get_all(skip, limit)
-            service_names, country_names, provider_names = await self._get_orders_additional_data(orders)
-            return self.order_mapper.entities_to_dto_list(
-                orders,
-                service_names,
-                country_names,
-                provider_names
-            )
+            after = decode_cursor(cursor) if cursor else None
+            orders = await self.order_repo.get_all(skip, limit, fields=_order_fields(fields), after=after)
+            return await self._to_dto_list(orders, fields)
         except Exception as e:
             self.logger.error(f"Error getting all orders: {e}")
             raise
@@ -121,11 +190,12 @@ class OrderService:
             order_create_dto: OrderCreateDTO,
             user_id: int,
             user_balance: float,
-            client_ip: Optional[str] = None
+            client_ip: Optional[str] = None,
+            discount_rate: float = 0.0
     ) -> OrderDTO:
-        """Создать новый заказ"""
+        """Создать новый заказ по цене со скидкой пользователя, как в /prices/catalog/my"""
         try:
-            price_info = await self.price_repo.get_price_for_service_country(
+            price_info = await self._get_charge_price(
                 order_create_dto.service,
                 order_create_dto.country_code
             )
@@ -138,22 +208,23 @@ class OrderService:
             if not price_info.available:
                 raise NotFoundException("Service is currently unavailable")
 
-            if user_balance < float(price_info.price):
+            price = apply_discount(float(price_info.price), discount_tier(discount_rate))
+            if user_balance < price:
                 raise InsufficientBalanceException(
-                    f"Insufficient balance. Required: {price_info.price}, available: {user_balance}"
+                    f"Insufficient balance. Required: {price}, available: {user_balance}"
                 )
 
             order_create_entity = OrderCreate(
                 service=order_create_dto.service,
                 country_code=order_create_dto.country_code,
-                price=float(price_info.price),
-                provider_id=getattr(price_info, 'provider_id', None),
+                price=price,
+                provider_id=price_info.provider_id,
                 user_id=user_id,
                 client_ip=client_ip
             )
 
             order = await self.order_repo.create(order_create_entity)
-            await self.user_repo.update_balance(user_id, -float(price_info.price))
+            await self.user_repo.update_balance(user_id, -price)
 
             service_name, country_name, provider_name = await self._get_order_additional_data(order)
 
@@ -237,10 +308,11 @@ class OrderService:
             self,
             service: str,
             country_code: str,
-            user_balance: float
+            user_balance: float,
+            discount_rate: float = 0.0
     ) -> dict:
         try:
-            price_info = await self.price_repo.get_price_for_service_country(service, country_code)
+            price_info = await self._get_best_price(service, country_code)
 
             if not price_info:
                 return {
@@ -257,16 +329,17 @@ class OrderService:
                     "price": float(price_info.price)
                 }
 
-            sufficient_balance = user_balance >= float(price_info.price)
+            price = apply_discount(float(price_info.price), discount_tier(discount_rate))
+            sufficient_balance = user_balance >= price
 
             return {
                 "valid": sufficient_balance and price_info.available,
                 "available": price_info.available,
-                "price": float(price_info.price),
+                "price": price,
                 "sufficient_balance": sufficient_balance,
                 "service_name": price_info.service_name,
                 "country_name": price_info.country_name,
-                "required_balance": float(price_info.price),
+                "required_balance": price,
                 "current_balance": user_balance
             }
 
@@ -277,41 +350,59 @@ class OrderService:
                 "error": str(e)
             }
 
-    async def _get_order_additional_data(self, order: Order) -> tuple[Optional[str], Optional[str], Optional[str]]:
-        try:
-            price_info = await self.price_repo.get_price_for_service_country(
-                order.service,
-                order.country_code
-            )
+    async def _to_dto_list(self, orders: List[Order], fields: Optional[Collection[str]] = None) -> List[OrderDTO]:
+        """DTO заказов; названия разрешаются, только если они есть среди запрошенных полей"""
+        if fields and not _NAME_FIELDS.intersection(fields):
+            return self.order_mapper.entities_to_dto_list(orders, fields=fields)
 
-            service_name = price_info.service_name if price_info else None
-            country_name = price_info.country_name if price_info else None
-            provider_name = getattr(price_info, 'provider_name', None) if price_info else None
+        service_names, country_names, provider_names = await self._get_orders_additional_data(orders)
+        return self.order_mapper.entities_to_dto_list(
+            orders,
+            service_names,
+            country_names,
+            provider_names,
+            fields=fields
+        )
 
-            return service_name, country_name, provider_name
-        except Exception as e:
-            self.logger.warning(f"Error getting additional data for order {order.id}: {e}")
-            return None, None, None
+    async def _get_order_additional_data(self, order: Order) -> tuple[Optional[str], Optional[str], Optional[str]]:
+        service_names, country_names, provider_names = await self._get_orders_additional_data([order])
+        return (
+            service_names.get(order.service),
+            country_names.get(order.country_code),
+            provider_names.get(order.provider_id)
+        )
 
     async def _get_orders_additional_data(self, orders: List[Order]) -> tuple[dict, dict, dict]:
-        service_names = {}
-        country_names = {}
-        provider_names = {}
-
-        for order in orders:
-            try:
-                price_info = await self.price_repo.get_price_for_service_country(
-                    order.service,
-                    order.country_code
-                )
+        """
+        Названия услуг, стран и поставщиков для страницы заказов.
+        Услуги и страны берутся из снимка каталога, остальное — одним запросом на справочник,
+        поэтому число запросов не зависит от размера страницы.
+        """
+        service_codes = {order.service for order in orders if getattr(order, "service", None)}
+        country_codes = {order.country_code for order in orders if getattr(order, "country_code", None)}
+        provider_ids = {order.provider_id for order in orders if getattr(order, "provider_id", None)}
+
+        service_names, country_names = {}, {}
+        snapshot = self.catalog.snapshot if self.catalog else None
+        if snapshot is not None:
+            known_services = snapshot.service_names
+            known_countries = snapshot.country_names[DEFAULT_LOCALE]
+            service_names = {code: known_services[code] for code in service_codes if code in known_services}
+            country_names = {code: known_countries[code] for code in country_codes if code in known_countries}
+
+        service_codes -= service_names.keys()
+        country_codes -= country_names.keys()
+        if not (service_codes or country_codes or provider_ids):
+            return service_names, country_names, {}
 
-                if price_info:
-                    service_names[order.service] = price_info.service_name
-                    country_names[order.country_code] = price_info.country_name
-                    if hasattr(price_info, 'provider_name') and price_info.provider_name and order.provider_id:
-                        provider_names[order.provider_id] = price_info.provider_name
-            except Exception as e:
-                self.logger.warning(f"Error getting additional data for order {order.id}: {e}")
-                continue
+        try:
+            missing_services, missing_countries, provider_names = await self.price_repo.get_reference_names(
+                service_codes, country_codes, provider_ids
+            )
+        except Exception as e:
+            self.logger.warning(f"Error getting additional data for {len(orders)} orders: {e}")
+            return service_names, country_names, {}
 
-        return service_names, country_names, provider_names
\ No newline at end of file
+        service_names.update(missing_services)
+        country_names.update(missing_countries)
+        return service_names, country_names, provider_names
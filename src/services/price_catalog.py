@@ -0,0 +1,796 @@
+import asyncio
+import copy
+import gzip
+import hashlib
+import math
+import sys
+import time
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, AsyncContextManager, Callable, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+from pydantic import TypeAdapter
+
+from src.core.domain.repository.interfaces import IPriceRepository
+from src.core.domain.entity.service_price import ServicePrice, CatalogChange
+from src.core.domain.entity.services import ServicePublic
+from src.core.domain.entity.countries import CountryPublic
+from src.core.domain.dto.service_price_dto import CountryServicesDTO, ServiceCatalogDTO
+from src.core.domain.mappers.service_price_mapper import ServicePriceMapper
+from src.services.name_search import NameSearchIndex
+from src.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Кодировки тела ответа в порядке предпочтения
+SUPPORTED_ENCODINGS = (("br",) if brotli else ()) + ("gzip", "identity")
+
+# Языки, для которых каталог собирается заранее; первый — язык данных в БД
+SUPPORTED_LOCALES = ("ru", "en")
+DEFAULT_LOCALE = SUPPORTED_LOCALES[0]
+
+# Скидки пользователей сводятся к ступеням с этим шагом, представление кэшируется на ступень
+DISCOUNT_STEP = Decimal("0.0001")
+NO_DISCOUNT = Decimal(0)
+# Сколько ступеней скидки держать на одно представление каталога
+DISCOUNT_VIEWS_LIMIT = 64
+_PRICE_STEP = Decimal("0.0001")
+# Событий в очереди одного подписчика потока, дальше — ресинхронизация
+STREAM_QUEUE_SIZE = 32
+_NAN = float("nan")
+
+# Варианты группировки каталога для /prices/catalog/grouped
+GROUPINGS = ("service", "country")
+
+_service_price_list = TypeAdapter(List[ServicePrice])
+_catalog_change_list = TypeAdapter(List[CatalogChange])
+# Сериализаторы списков, отличных от плоского списка цен
+_projected_rows = TypeAdapter(List[Dict[str, Any]])
+_payload_adapters = {
+    "grouped_by_service": TypeAdapter(List[ServiceCatalogDTO]),
+    "grouped_by_country": TypeAdapter(List[CountryServicesDTO]),
+}
+
+
+def _payload_key(name: str, encoding: str, fields: Optional[FrozenSet[str]]) -> Tuple:
+    return name, encoding, tuple(sorted(fields)) if fields else None
+
+
+def discount_tier(discount_rate: Optional[float]) -> Decimal:
+    """
+    Скидка пользователя, приведённая к ступени кэша.
+    discount_rate — доля от 0 до 1 (0.1 — это 10%), а не проценты.
+    Значение вне диапазона — ошибка данных: скидка не применяется, чтобы 10 вместо 0.1
+    не превратилось в бесплатные заказы.
+    """
+    tier = Decimal(str(discount_rate or 0)).quantize(DISCOUNT_STEP, rounding=ROUND_HALF_UP)
+    if not NO_DISCOUNT <= tier <= 1:
+        logger.error(f"Discount rate {discount_rate} is outside [0, 1], applying no discount")
+        return NO_DISCOUNT
+    return tier
+
+
+def apply_discount(price: float, tier: Decimal) -> float:
+    """Цена со скидкой; одна формула и для каталога, и для списания при заказе"""
+    if not tier:
+        return price
+    return float((Decimal(str(price)) * (1 - tier)).quantize(_PRICE_STEP, rounding=ROUND_HALF_UP))
+
+
+def localize_changes(changes: List[CatalogChange], locale: str, country_names: Dict[str, Dict[str, str]]) -> List[CatalogChange]:
+    """Изменения с названиями стран на языке клиента; лента route_summary хранит русские"""
+    names = country_names.get(locale) if locale != DEFAULT_LOCALE else None
+    if not names:
+        return changes
+    return [
+        change.model_copy(update={"country_name": names[change.country_code]})
+        if names.get(change.country_code) else change
+        for change in changes
+    ]
+
+
+def match_locale(value: Optional[str]) -> Optional[str]:
+    """Поддерживаемый язык по тегу вида "en", "en-US" или "English"; None, если не подходит"""
+    if not value:
+        return None
+    language = value.strip().lower().replace("_", "-").split("-")[0][:2]
+    return language if language in SUPPORTED_LOCALES else None
+
+
+def negotiate_locale(accept_language: Optional[str]) -> Optional[str]:
+    """Первый поддерживаемый язык из Accept-Language с учётом весов q"""
+    ranked = []
+    for position, part in enumerate((accept_language or "").split(",")):
+        tag, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        locale = match_locale(tag)
+        if locale and quality > 0:
+            ranked.append((-quality, position, locale))
+    return min(ranked)[2] if ranked else None
+
+
+class CatalogColumns:
+    """
+    Колоночное хранение строк каталога.
+    Коды и названия услуг и стран лежат по одному разу в таблицах, строка ссылается
+    на них номерами, а цены и доступность хранятся в массивах array.
+    Объекты ServicePrice создаются только для строк, попадающих в ответ.
+    """
+
+    def __init__(self):
+        self.service_codes: List[str] = []
+        self.service_names: List[str] = []
+        self.country_codes: List[str] = []
+        self.country_names: List[str] = []
+        self._service_ids: Dict[str, int] = {}
+        self._country_ids: Dict[str, int] = {}
+
+        self.service = array("I")
+        self.country = array("I")
+        self.price = array("d")
+        # NaN — VIP-цены нет
+        self.vip_price = array("d")
+        self.available = array("b")
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def append(self, price: ServicePrice) -> int:
+        service_id = self._service_ids.get(price.service_code)
+        if service_id is None:
+            service_id = self._service_ids[price.service_code] = len(self.service_codes)
+            self.service_codes.append(sys.intern(price.service_code))
+            self.service_names.append(price.service_name)
+
+        country_id = self._country_ids.get(price.country_code)
+        if country_id is None:
+            country_id = self._country_ids[price.country_code] = len(self.country_codes)
+            self.country_codes.append(sys.intern(price.country_code))
+            self.country_names.append(price.country_name)
+
+        self.service.append(service_id)
+        self.country.append(country_id)
+        self.price.append(price.price)
+        self.vip_price.append(_NAN if price.vip_price is None else price.vip_price)
+        self.available.append(price.available)
+        return len(self.price) - 1
+
+    def row(self, i: int, country_names: List[str], prices: array) -> ServicePrice:
+        vip_price = self.vip_price[i]
+        return ServicePrice(
+            service_code=self.service_codes[self.service[i]],
+            country_code=self.country_codes[self.country[i]],
+            price=prices[i],
+            vip_price=None if math.isnan(vip_price) else vip_price,
+            available=bool(self.available[i]),
+            service_name=self.service_names[self.service[i]],
+            country_name=country_names[self.country[i]]
+        )
+
+
+class CatalogView:
+    """
+    Каталог на одном языке и с одной ступенью скидки поверх общих колонок.
+    Представление хранит только порядок строк, группы номеров строк, таблицу названий
+    стран и, для скидки, свой массив цен. Списки ServicePrice создаются на каждый вызов,
+    готовые тела ответов кэшируются.
+    """
+
+    def __init__(
+            self,
+            columns: CatalogColumns,
+            order: array,
+            popular_services: array,
+            popular_countries: array,
+            country_names: List[str],
+            prices: Optional[array] = None
+    ):
+        self.columns = columns
+        self.order = order
+        self.popular_service_rows = popular_services
+        self.popular_country_rows = popular_countries
+        self.country_names = country_names
+        self.prices = columns.price if prices is None else prices
+
+        # Порядок отсортирован по (service_name, country_name), поэтому группы
+        # сохраняют порядок, который раньше давал ORDER BY в репозитории
+        self.by_country: Dict[str, array] = {}
+        self.by_service: Dict[str, array] = {}
+        for i in order:
+            country_code = columns.country_codes[columns.country[i]]
+            service_code = columns.service_codes[columns.service[i]]
+            self.by_country.setdefault(country_code, array("I")).append(i)
+            self.by_service.setdefault(service_code, array("I")).append(i)
+
+        self._payloads: Dict[Tuple, bytes] = {}
+        self._compressing: Dict[Tuple, asyncio.Future] = {}
+        self._discounted: Dict[Decimal, "CatalogView"] = {}
+
+    @classmethod
+    def from_prices(
+            cls,
+            catalog: List[ServicePrice],
+            popular_services: List[ServicePrice] = (),
+            popular_countries: List[ServicePrice] = ()
+    ) -> "CatalogView":
+        """Представление из готовых списков в заданном порядке"""
+        columns = CatalogColumns()
+        order = array("I", (columns.append(price) for price in catalog))
+        return cls(
+            columns,
+            order,
+            array("I", (columns.append(price) for price in popular_services)),
+            array("I", (columns.append(price) for price in popular_countries)),
+            columns.country_names
+        )
+
+    def _rows(self, rows) -> List[ServicePrice]:
+        return [self.columns.row(i, self.country_names, self.prices) for i in rows]
+
+    @property
+    def catalog(self) -> List[ServicePrice]:
+        return self._rows(self.order)
+
+    def catalog_batches(self, size: int) -> Iterator[List[ServicePrice]]:
+        """Каталог пачками по size строк; объекты строятся только для текущей пачки"""
+        for start in range(0, len(self.order), size):
+            yield self._rows(self.order[start:start + size])
+
+    @property
+    def popular_services(self) -> List[ServicePrice]:
+        return self._rows(self.popular_service_rows)
+
+    @property
+    def popular_countries(self) -> List[ServicePrice]:
+        return self._rows(self.popular_country_rows)
+
+    def discounted(self, tier: Decimal) -> "CatalogView":
+        """
+        Представление с ценами для ступени скидки: один проход по массиву цен
+        при первом обращении, порядок и группы общие с исходным представлением.
+        """
+        if not tier:
+            return self
+        view = self._discounted.get(tier)
+        if view is not None:
+            return view
+
+        view = copy.copy(self)
+        view.prices = array("d", (apply_discount(price, tier) for price in self.prices))
+        view._payloads = {}
+        view._compressing = {}
+        view._discounted = {}
+        if len(self._discounted) >= DISCOUNT_VIEWS_LIMIT:
+            self._discounted.clear()
+        self._discounted[tier] = view
+        return view
+
+    @property
+    def grouped_by_service(self) -> List[ServiceCatalogDTO]:
+        """Услуги со вложенными странами"""
+        return ServicePriceMapper.to_catalog_dto(self.catalog, *self._names())
+
+    @property
+    def grouped_by_country(self) -> List[CountryServicesDTO]:
+        """Страны со вложенными услугами, по названию страны"""
+        grouped = ServicePriceMapper.to_country_services_dto(self.catalog, *self._names())
+        grouped.sort(key=lambda country: country.country_name)
+        return grouped
+
+    def grouped(self, by: str) -> list:
+        return self.grouped_by_service if by == "service" else self.grouped_by_country
+
+    def _names(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        columns = self.columns
+        return (
+            dict(zip(columns.service_codes, columns.service_names)),
+            dict(zip(columns.country_codes, self.country_names))
+        )
+
+    def project(self, rows, fields: FrozenSet[str]) -> List[Dict[str, Any]]:
+        """Строки только с выбранными полями ServicePrice, прямо из колонок"""
+        columns, names, prices = self.columns, self.country_names, self.prices
+
+        def vip_price(i: int) -> Optional[float]:
+            value = columns.vip_price[i]
+            return None if math.isnan(value) else value
+
+        getters = {
+            "service_code": lambda i: columns.service_codes[columns.service[i]],
+            "country_code": lambda i: columns.country_codes[columns.country[i]],
+            "price": prices.__getitem__,
+            "vip_price": vip_price,
+            "available": lambda i: bool(columns.available[i]),
+            "country_name": lambda i: names[columns.country[i]],
+            "service_name": lambda i: columns.service_names[columns.service[i]],
+        }
+        selected = [(name, getters[name]) for name in ServicePrice.model_fields if name in fields]
+        return [{name: get(i) for name, get in selected} for i in rows]
+
+    def payload(self, name: str, encoding: str = "identity", fields: Optional[FrozenSet[str]] = None) -> bytes:
+        """
+        JSON-представление списка в нужной кодировке.
+        Сериализуется и сжимается один раз на версию каталога и набор полей,
+        объекты строк после сериализации не удерживаются.
+        """
+        key = _payload_key(name, encoding, fields)
+        body = self._payloads.get(key)
+        if body is not None:
+            return body
+
+        if encoding == "identity" and fields:
+            rows = self._list_rows.get(name)
+            if rows is None:
+                raise ValueError(f"Fields are not supported for {name}")
+            body = _projected_rows.dump_json(self.project(rows, fields))
+        elif encoding == "identity":
+            body = _payload_adapters.get(name, _service_price_list).dump_json(getattr(self, name))
+        elif encoding == "gzip":
+            body = gzip.compress(self.payload(name, fields=fields), compresslevel=6)
+        elif encoding == "br" and brotli:
+            body = brotli.compress(self.payload(name, fields=fields), quality=9)
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+        self._payloads[key] = body
+        return body
+
+    def ready_payload(
+            self, name: str, encoding: str = "identity", fields: Optional[FrozenSet[str]] = None
+    ) -> Tuple[bytes, str]:
+        """
+        Тело ответа и его кодировка для обработчика запроса.
+        Сжатие занимает процессор надолго, поэтому идёт в пуле потоков,
+        а пока сжатой копии нет, отдаётся тело без сжатия.
+        """
+        body = self.payload(name, fields=fields)
+        if encoding == "identity":
+            return body, encoding
+        if encoding not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+        key = _payload_key(name, encoding, fields)
+        compressed = self._payloads.get(key)
+        if compressed is not None:
+            return compressed, encoding
+
+        if key not in self._compressing:
+            future = asyncio.get_running_loop().run_in_executor(None, self.payload, name, encoding, fields)
+            self._compressing[key] = future
+            future.add_done_callback(lambda done: self._compressed(key, done))
+        return body, "identity"
+
+    def _compressed(self, key: Tuple, future: asyncio.Future) -> None:
+        self._compressing.pop(key, None)
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error compressing catalog payload {key}: {future.exception()}")
+
+    @property
+    def _list_rows(self) -> Dict[str, array]:
+        return {
+            "catalog": self.order,
+            "popular_services": self.popular_service_rows,
+            "popular_countries": self.popular_country_rows,
+        }
+
+    def services_by_country(self, country_code: str) -> List[ServicePrice]:
+        return self._rows(self.by_country.get(country_code, ()))
+
+    def countries_by_service(self, service_code: str) -> List[ServicePrice]:
+        return self._rows(self.by_service.get(service_code, ()))
+
+
+class CatalogSnapshot:
+    """
+    Неизменяемый снимок каталога цен.
+    Строки хранятся в колонках один раз, представления для всех поддерживаемых языков
+    отличаются только порядком строк и таблицей названий стран.
+    Всё строится при сборке, читатели только выбирают готовое представление.
+    """
+
+    def __init__(
+            self,
+            catalog: List[ServicePrice],
+            popular_services: List[ServicePrice],
+            popular_countries: List[ServicePrice],
+            change_version: int = 0,
+            services: Optional[List[ServicePublic]] = None,
+            countries: Optional[List[CountryPublic]] = None
+    ):
+        self.services = services or []
+        self.countries = countries or []
+        self.built_at = time.time()
+        # Версия ленты изменений route_summary, которую снимок уже включает
+        self.change_version = change_version
+
+        columns = CatalogColumns()
+        order = array("I", (columns.append(price) for price in catalog))
+        # Популярные позиции — те же строки каталога, ссылаемся на них по номеру
+        row_ids = {(price.service_code, price.country_code): i for i, price in zip(order, catalog)}
+
+        def row_of(price: ServicePrice) -> int:
+            i = row_ids.get((price.service_code, price.country_code))
+            return columns.append(price) if i is None else i
+
+        popular_service_rows = array("I", map(row_of, popular_services))
+        popular_country_rows = array("I", map(row_of, popular_countries))
+        self.columns = columns
+
+        self.service_names: Dict[str, str] = {s.code: s.name for s in self.services}
+        # Репозиторий отдаёт русские названия стран, остальные языки берутся из справочника
+        self.country_names: Dict[str, Dict[str, str]] = {
+            DEFAULT_LOCALE: {c.code: c.name_ru for c in self.countries},
+            "en": {c.code: c.name_en or c.name_ru for c in self.countries},
+        }
+        self.views: Dict[str, CatalogView] = {
+            DEFAULT_LOCALE: CatalogView(
+                columns, order, popular_service_rows, popular_country_rows, columns.country_names
+            )
+        }
+        for locale in SUPPORTED_LOCALES:
+            if locale == DEFAULT_LOCALE:
+                continue
+            translated = self.country_names[locale]
+            names = [
+                translated.get(code) or name
+                for code, name in zip(columns.country_codes, columns.country_names)
+            ]
+
+            def sort_key(i: int, names=names):
+                return columns.service_names[columns.service[i]] or "", names[columns.country[i]] or ""
+
+            self.views[locale] = CatalogView(
+                columns,
+                array("I", sorted(order, key=sort_key)),
+                popular_service_rows,
+                array("I", sorted(popular_country_rows, key=lambda i, names=names: names[columns.country[i]] or "")),
+                names
+            )
+
+        self.search_index = NameSearchIndex(self.services, self.countries)
+        self.availability_stats = self._compute_availability_stats(order)
+
+        self.version = self._compute_version()
+
+    def _compute_availability_stats(self, order: array) -> Dict[str, Any]:
+        """Та же статистика, что get_available_services_countries, за один проход по колонкам"""
+        columns = self.columns
+        services, countries = set(), set()
+        combinations = 0
+        for i in order:
+            if columns.available[i]:
+                services.add(columns.service_codes[columns.service[i]])
+                countries.add(columns.country_codes[columns.country[i]])
+                combinations += 1
+        return {
+            "total_services": len(services),
+            "total_countries": len(countries),
+            "total_combinations": combinations,
+            "services": sorted(services),
+            "countries": sorted(countries)
+        }
+
+    def localize(self, price: ServicePrice, locale: str) -> ServicePrice:
+        """Цена с названием страны на нужном языке; без перевода возвращается как есть"""
+        name = self.country_names.get(locale, {}).get(price.country_code)
+        if not name or name == price.country_name:
+            return price
+        return price.model_copy(update={"country_name": name})
+
+    def view(self, locale: str = DEFAULT_LOCALE, tier: Decimal = NO_DISCOUNT) -> CatalogView:
+        return (self.views.get(locale) or self.views[DEFAULT_LOCALE]).discounted(tier)
+
+    # Представление языка по умолчанию доступно прямо на снимке
+
+    @property
+    def catalog(self) -> List[ServicePrice]:
+        return self.views[DEFAULT_LOCALE].catalog
+
+    @property
+    def popular_services(self) -> List[ServicePrice]:
+        return self.views[DEFAULT_LOCALE].popular_services
+
+    @property
+    def popular_countries(self) -> List[ServicePrice]:
+        return self.views[DEFAULT_LOCALE].popular_countries
+
+    def _row_state(self, i: int) -> Tuple[float, Optional[float], bool]:
+        columns = self.columns
+        vip_price = columns.vip_price[i]
+        return columns.price[i], None if math.isnan(vip_price) else vip_price, bool(columns.available[i])
+
+    def diff(self, previous: "CatalogSnapshot") -> List[CatalogChange]:
+        """Позиции, у которых изменились цена или доступность, и исчезнувшие позиции"""
+        def states(snapshot: "CatalogSnapshot") -> Dict[Tuple[str, str], int]:
+            columns = snapshot.columns
+            return {
+                (columns.service_codes[columns.service[i]], columns.country_codes[columns.country[i]]): i
+                for i in snapshot.views[DEFAULT_LOCALE].order
+            }
+
+        before, after = states(previous), states(self)
+        changes = []
+        for key, i in after.items():
+            state = self._row_state(i)
+            j = before.get(key)
+            if j is not None and previous._row_state(j) == state:
+                continue
+            price, vip_price, available = state
+            changes.append(CatalogChange(
+                service_code=key[0],
+                country_code=key[1],
+                price=price,
+                vip_price=vip_price,
+                available=available,
+                service_name=self.columns.service_names[self.columns.service[i]],
+                country_name=self.columns.country_names[self.columns.country[i]],
+                version=self.change_version
+            ))
+        for key in before.keys() - after.keys():
+            changes.append(CatalogChange(
+                service_code=key[0],
+                country_code=key[1],
+                removed=True,
+                version=self.change_version
+            ))
+        return changes
+
+    def _compute_version(self) -> str:
+        digest = hashlib.sha1()
+        columns = self.columns
+        default = self.views[DEFAULT_LOCALE]
+        for rows in (default.order, default.popular_service_rows, default.popular_country_rows):
+            for i in rows:
+                service, country = columns.service[i], columns.country[i]
+                vip_price = columns.vip_price[i]
+                digest.update(
+                    f"{columns.service_codes[service]}|{columns.country_codes[country]}|{columns.price[i]}|"
+                    f"{None if math.isnan(vip_price) else vip_price}|{bool(columns.available[i])}|"
+                    f"{columns.service_names[service]}|{columns.country_names[country]}\n".encode()
+                )
+            digest.update(b"--\n")
+        # Справочники влияют на подсказки и переводы, их изменение тоже меняет версию
+        for service in self.services:
+            digest.update(f"{service.code}|{service.name}|{service.is_popular}|{service.sort_order}\n".encode())
+        for country in self.countries:
+            digest.update(
+                f"{country.code}|{country.name_ru}|{country.name_en}|{country.is_popular}|{country.sort_order}\n".encode()
+            )
+        return digest.hexdigest()[:20]
+
+    def payload(
+            self,
+            name: str,
+            encoding: str = "identity",
+            locale: str = DEFAULT_LOCALE,
+            tier: Decimal = NO_DISCOUNT,
+            fields: Optional[FrozenSet[str]] = None
+    ) -> Tuple[bytes, str]:
+        return self.view(locale, tier).ready_payload(name, encoding, fields)
+
+    async def precompress(self) -> None:
+        """Сжать полный каталог языка по умолчанию в пуле потоков, пока снимок ещё не отдаётся"""
+        loop = asyncio.get_running_loop()
+        view = self.views[DEFAULT_LOCALE]
+        for encoding in SUPPORTED_ENCODINGS:
+            if encoding != "identity":
+                await loop.run_in_executor(None, view.payload, "catalog", encoding)
+
+    def services_by_country(self, country_code: str, locale: str = DEFAULT_LOCALE) -> List[ServicePrice]:
+        return self.view(locale).services_by_country(country_code)
+
+    def countries_by_service(self, service_code: str, locale: str = DEFAULT_LOCALE) -> List[ServicePrice]:
+        return self.view(locale).countries_by_service(service_code)
+
+
+class CatalogEvent:
+    """
+    Событие потока изменений каталога, общее для всех подписчиков процесса.
+    Кадр SSE собирается один раз на язык, подписчики получают готовые байты.
+    """
+
+    def __init__(
+            self,
+            kind: str,
+            version: int,
+            changes: List[CatalogChange] = (),
+            country_names: Optional[Dict[str, Dict[str, str]]] = None
+    ):
+        self.kind = kind
+        self.version = version
+        self.changes = list(changes)
+        self._country_names = country_names or {}
+        self._frames: Dict[str, bytes] = {}
+
+    @classmethod
+    def resync(cls, version: int) -> "CatalogEvent":
+        """Клиент отстал или версия неизвестна: каталог нужно перечитать целиком"""
+        return cls("resync", version)
+
+    def frame(self, locale: str = DEFAULT_LOCALE) -> bytes:
+        body = self._frames.get(locale)
+        if body is not None:
+            return body
+
+        if self.kind == "changes":
+            data = _catalog_change_list.dump_json(localize_changes(self.changes, locale, self._country_names))
+        else:
+            data = b'{"version": %d}' % self.version
+        body = b"id: %d\nevent: %s\ndata: %s\n\n" % (self.version, self.kind.encode(), data)
+        self._frames[locale] = body
+        return body
+
+
+class PriceCatalogCache:
+    """
+    Процессный кэш каталога цен.
+    Снимок пересобирается в фоне по расписанию или после invalidate()
+    и подменяется одной операцией присваивания, поэтому читатели никогда не ждут.
+    """
+
+    def __init__(
+            self,
+            repo_scope: Callable[[], AsyncContextManager[IPriceRepository]],
+            refresh_interval: float = 30.0,
+            stream_poll_interval: float = 2.0
+    ):
+        self._repo_scope = repo_scope
+        self._refresh_interval = refresh_interval
+        # Пока есть подписчики потока, ленту изменений опрашиваем чаще полной пересборки
+        self._stream_poll_interval = stream_poll_interval
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._build_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.logger = get_logger(__name__)
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    async def get_snapshot(self) -> CatalogSnapshot:
+        """Текущий снимок; при холодном старте собирается один раз для всех ожидающих"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        async with self._build_lock:
+            if self._snapshot is None:
+                await self._rebuild()
+            return self._snapshot
+
+    async def refresh(self) -> CatalogSnapshot:
+        """Принудительно пересобрать снимок из БД"""
+        async with self._build_lock:
+            await self._rebuild()
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        """Сообщить, что маршруты изменились и снимок нужно пересобрать"""
+        if self._task is not None and not self._task.done():
+            self._wakeup.set()
+        else:
+            self._snapshot = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Очередь событий изменений каталога для одного клиента потока"""
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if len(self._subscribers) == 1:
+            # Первый подписчик: переключаем фоновую задачу на частый опрос ленты
+            self._wakeup.set()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def _publish(self, event: CatalogEvent) -> None:
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Медленный клиент не держит остальных: вместо накопленной дельты — ресинхронизация
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(CatalogEvent.resync(event.version))
+
+    async def start(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            self.logger.error(f"Initial price catalog build failed: {e}")
+        self._task = asyncio.create_task(self._run())
+        self.logger.info(f"Price catalog refresher started, interval {self._refresh_interval}s")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        refreshed_at = time.monotonic()
+        while True:
+            timeout = self._refresh_interval
+            if self._subscribers:
+                timeout = min(timeout, self._stream_poll_interval)
+            woken = False
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                woken = True
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                due = woken or time.monotonic() - refreshed_at >= self._refresh_interval
+                if not due and not await self._feed_advanced():
+                    continue
+                await self.refresh()
+                refreshed_at = time.monotonic()
+            except Exception as e:
+                self.logger.error(f"Error refreshing price catalog: {e}")
+
+    async def _feed_advanced(self) -> bool:
+        """Появились ли в ленте route_summary изменения, которых нет в снимке"""
+        snapshot = self._snapshot
+        async with self._repo_scope() as repo:
+            change_version = await repo.get_catalog_change_version()
+        return snapshot is None or change_version > snapshot.change_version
+
+    async def _rebuild(self) -> None:
+        started = time.perf_counter()
+        async with self._repo_scope() as repo:
+            # Версию читаем до данных: снимок содержит как минимум все изменения до неё
+            change_version = await repo.get_catalog_change_version()
+            catalog = await repo.get_service_catalog()
+            popular_services = await repo.get_popular_services()
+            popular_countries = await repo.get_popular_countries()
+            services = await repo.get_service_references()
+            countries = await repo.get_country_references()
+
+        snapshot = CatalogSnapshot(
+            catalog,
+            popular_services,
+            popular_countries,
+            change_version,
+            services=services,
+            countries=countries
+        )
+        current = self._snapshot
+        if current is not None and current.version == snapshot.version:
+            # Содержимое то же, но лента ушла вперёд: иначе каждый опрос считал бы её новой
+            current.change_version = max(current.change_version, change_version)
+            return
+
+        await snapshot.precompress()
+        self._snapshot = snapshot
+        if current is not None and self._subscribers:
+            changes = snapshot.diff(current)
+            if changes:
+                self._publish(CatalogEvent(
+                    "changes", snapshot.change_version, changes, snapshot.country_names
+                ))
+        self.logger.info(
+            f"Price catalog snapshot {snapshot.version} built: {len(catalog)} entries "
+            f"in {time.perf_counter() - started:.3f}s"
+        )
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import AsyncContextManager, Callable, Optional
+
+from src.core.domain.repository.interfaces import IProviderRouteRepository
+from src.core.domain.dto.provider_route_dto import PriceHistoryDTO
+from src.core.logging_config import get_logger
+
+# Самая детальная гранулярность, при которой график укладывается в несколько сотен точек
+RESOLUTION_WINDOWS = (
+    ("raw", timedelta(days=2)),
+    ("hour", timedelta(days=60)),
+)
+RESOLUTIONS = ("raw", "hour", "day")
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """Время без зоны считаем UTC, чтобы сравнивать его с текущим"""
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+class PriceHistoryService:
+    """
+    История цен маршрутов для графиков.
+    Точки и свёртки пишут триггеры provider_routes, сервис выбирает гранулярность
+    под окно запроса и по расписанию удаляет данные старше срока хранения:
+    сырые точки и почасовые свёртки живут ограниченное время, посуточные — всегда.
+    """
+
+    def __init__(
+            self,
+            repo_scope: Callable[[], AsyncContextManager[IProviderRouteRepository]],
+            raw_retention: timedelta = timedelta(days=30),
+            hourly_retention: timedelta = timedelta(days=365),
+            prune_interval: float = 3600.0
+    ):
+        self._repo_scope = repo_scope
+        self._raw_retention = raw_retention
+        self._hourly_retention = hourly_retention
+        self._prune_interval = prune_interval
+        self._task: Optional[asyncio.Task] = None
+        self.logger = get_logger(__name__)
+
+    def choose_resolution(self, since: datetime, until: datetime, now: Optional[datetime] = None) -> str:
+        """Гранулярность по длине окна; сырые и почасовые данные — только в пределах срока хранения"""
+        now = now or datetime.now(timezone.utc)
+        retention = {"raw": self._raw_retention, "hour": self._hourly_retention}
+        for resolution, window in RESOLUTION_WINDOWS:
+            if until - since <= window and since >= now - retention[resolution]:
+                return resolution
+        return "day"
+
+    async def get_history(
+            self,
+            service_code: str,
+            country_code: str,
+            provider_id: int,
+            since: datetime,
+            until: Optional[datetime] = None,
+            resolution: str = "auto"
+    ) -> PriceHistoryDTO:
+        since = _as_utc(since)
+        until = _as_utc(until) if until else datetime.now(timezone.utc)
+        if since >= until:
+            raise ValueError("since must be earlier than until")
+        if resolution == "auto":
+            resolution = self.choose_resolution(since, until)
+        elif resolution not in RESOLUTIONS:
+            raise ValueError(f"Unsupported resolution: {resolution}")
+
+        async with self._repo_scope() as repo:
+            points = await repo.get_price_history(
+                service_code, country_code, provider_id, since, until, resolution
+            )
+
+        return PriceHistoryDTO(
+            service_code=service_code,
+            country_code=country_code,
+            provider_id=provider_id,
+            resolution=resolution,
+            points=points
+        )
+
+    async def prune(self) -> None:
+        now = datetime.now(timezone.utc)
+        async with self._repo_scope() as repo:
+            raw, hourly = await repo.prune_price_history(
+                now - self._raw_retention,
+                now - self._hourly_retention
+            )
+        if raw or hourly:
+            self.logger.info(f"Price history pruned: {raw} raw points, {hourly} hourly rollups")
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        self.logger.info(f"Price history pruning started, interval {self._prune_interval}s")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.prune()
+            except Exception as e:
+                self.logger.error(f"Error pruning price history: {e}")
+            await asyncio.sleep(self._prune_interval)
@@ -1,23 +1,221 @@
+import asyncio
 from decimal import Decimal
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, FrozenSet, Tuple, AsyncContextManager, AsyncIterator, Awaitable, Callable, Hashable, TypeVar
 from src.core.domain.repository.interfaces import IPriceRepository
 from src.core.domain.entity.service_price import ServicePrice
+from src.core.domain.dto.service_price_dto import CatalogChangesDTO, SuggestionDTO
+from src.core.config import CATALOG_CHANGES_LIMIT
 from src.core.exceptions.exceptions import NotFoundException
+from src.services.price_catalog import (
+    DEFAULT_LOCALE, NO_DISCOUNT, CatalogEvent, CatalogView, PriceCatalogCache, localize_changes
+)
+from src.services.single_flight import SingleFlight
+from src.services.name_search import NameSearchIndex
+
+T = TypeVar("T")
+
+# Позиций каталога в одной пачке потоковой выдачи
+CATALOG_STREAM_BATCH = 500
+# Пауза, после которой в поток изменений уходит комментарий, чтобы прокси не закрыли соединение
+CHANGES_STREAM_HEARTBEAT = 15.0
 
 
 class PriceService:
-    def __init__(self, price_repo: IPriceRepository):
+    def __init__(
+            self,
+            price_repo: IPriceRepository,
+            catalog: Optional[PriceCatalogCache] = None,
+            flights: Optional[SingleFlight] = None,
+            repo_scope: Optional[Callable[[], AsyncContextManager[IPriceRepository]]] = None
+    ):
         self.price_repo = price_repo
+        self.catalog = catalog
+        self.flights = flights
+        self.repo_scope = repo_scope
+
+    async def _shared(self, key: Hashable, query: Callable[[IPriceRepository], Awaitable[T]]) -> T:
+        """
+        Выполнить запрос к репозиторию так, чтобы одинаковые конкурентные запросы
+        разделили один поход в БД. Общий запрос идёт в собственной сессии,
+        не привязанной к жизни отдельного HTTP-запроса.
+        """
+        if not self.flights:
+            return await query(self.price_repo)
+
+        async def run() -> T:
+            if not self.repo_scope:
+                return await query(self.price_repo)
+            async with self.repo_scope() as repo:
+                return await query(repo)
+
+        return await self.flights.do(key, run)
+
+    async def get_catalog_version(self) -> Optional[str]:
+        """
+        Версия текущего снимка каталога, меняется только вместе с его содержимым.
+        Используется как ETag для условных запросов.
+        """
+        if not self.catalog:
+            return None
+        snapshot = await self.catalog.get_snapshot()
+        return snapshot.version
+
+    async def get_catalog_payload(
+            self,
+            encoding: str,
+            locale: str = DEFAULT_LOCALE,
+            tier: Decimal = NO_DISCOUNT,
+            fields: Optional[FrozenSet[str]] = None
+    ) -> Optional[Tuple[bytes, str]]:
+        """
+        Готовое тело ответа полного каталога и его кодировка: пока сжатая копия
+        готовится в фоне, тело отдаётся без сжатия.
+        fields — только эти поля строк. None, если сервис работает без кэша каталога.
+        """
+        if not self.catalog:
+            return None
+        snapshot = await self.catalog.get_snapshot()
+        return snapshot.payload("catalog", encoding, locale, tier, fields)
 
-    async def get_full_catalog(self) -> List[ServicePrice]:
+    async def get_full_catalog(
+            self, locale: str = DEFAULT_LOCALE, tier: Decimal = NO_DISCOUNT
+    ) -> List[ServicePrice]:
         """
         Получить полный каталог услуг с минимальными ценами и доступностью.
         Используется для отображения общего прайс-листа.
+        tier — ступень скидки пользователя, цены с ней кэшируются на ступень, а не на пользователя.
         """
-        return await self.price_repo.get_service_catalog()
+        if self.catalog:
+            snapshot = await self.catalog.get_snapshot()
+            return snapshot.view(locale, tier).catalog
+        catalog = await self._shared("catalog", lambda repo: repo.get_service_catalog())
+        return CatalogView.from_prices(catalog).discounted(tier).catalog
+
+    async def get_grouped_catalog_payload(
+            self, by: str, encoding: str, locale: str = DEFAULT_LOCALE
+    ) -> Optional[Tuple[bytes, str]]:
+        """
+        Готовое тело сгруппированного каталога и его кодировка.
+        None, если сервис работает без кэша каталога.
+        """
+        if not self.catalog:
+            return None
+        snapshot = await self.catalog.get_snapshot()
+        return snapshot.payload(f"grouped_by_{by}", encoding, locale)
+
+    async def get_grouped_catalog(self, by: str, locale: str = DEFAULT_LOCALE) -> list:
+        """
+        Каталог, сгруппированный по услугам или по странам.
+        Группировка считается один раз на версию снимка, а не на каждый запрос.
+        """
+        if self.catalog:
+            snapshot = await self.catalog.get_snapshot()
+            return snapshot.view(locale).grouped(by)
+        catalog = await self._shared("catalog", lambda repo: repo.get_service_catalog())
+        return CatalogView.from_prices(catalog).grouped(by)
+
+    async def stream_catalog(self, locale: str = DEFAULT_LOCALE) -> AsyncIterator[bytes]:
+        """
+        Полный каталог в формате NDJSON, по пачке строк за раз.
+        Готовый снимок отдаётся без обращения к БД, иначе строки читаются курсором.
+        """
+        snapshot = self.catalog.snapshot if self.catalog else None
+        if snapshot is not None:
+            for batch in snapshot.view(locale).catalog_batches(CATALOG_STREAM_BATCH):
+                yield _ndjson(batch)
+            return
+
+        # Ответ живёт дольше зависимостей запроса, поэтому курсору нужна своя сессия
+        if self.repo_scope:
+            async with self.repo_scope() as repo:
+                async for batch in repo.stream_service_catalog(CATALOG_STREAM_BATCH):
+                    yield _ndjson(batch)
+        else:
+            async for batch in self.price_repo.stream_service_catalog(CATALOG_STREAM_BATCH):
+                yield _ndjson(batch)
+
+    async def get_catalog_changes(
+            self, since: Optional[int], locale: str = DEFAULT_LOCALE
+    ) -> CatalogChangesDTO:
+        """
+        Изменения каталога после версии since.
+        Если версия неизвестна или изменений слишком много, отдаёт полный каталог для ресинхронизации.
+        """
+        current_version = await self._shared(
+            "change_version", lambda repo: repo.get_catalog_change_version()
+        )
+
+        if since is not None and 0 < since <= current_version:
+            changes = await self._shared(
+                ("changes", since, current_version),
+                lambda repo: repo.get_catalog_changes(since, current_version, CATALOG_CHANGES_LIMIT + 1)
+            )
+            if len(changes) <= CATALOG_CHANGES_LIMIT:
+                if self.catalog and locale != DEFAULT_LOCALE:
+                    snapshot = await self.catalog.get_snapshot()
+                    changes = localize_changes(changes, locale, snapshot.country_names)
+                return CatalogChangesDTO(version=current_version, full_resync=False, changes=changes)
+
+        if self.catalog:
+            snapshot = await self.catalog.get_snapshot()
+            return CatalogChangesDTO(
+                version=snapshot.change_version,
+                full_resync=True,
+                catalog=snapshot.view(locale).catalog
+            )
+
+        catalog = await self._shared("catalog", lambda repo: repo.get_service_catalog())
+        return CatalogChangesDTO(version=current_version, full_resync=True, catalog=catalog)
+
+    async def stream_changes(
+            self, locale: str = DEFAULT_LOCALE, since: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Поток SSE изменений цен и доступности.
+        Все клиенты процесса читают одну ленту PriceCatalogCache, к БД обращается только
+        догоняющий клиент с Last-Event-ID, и то один раз при подключении.
+        """
+        if not self.catalog:
+            raise RuntimeError("Price catalog cache is not configured")
+
+        # Подписываемся до чтения снимка, чтобы не потерять изменения между ними
+        queue = self.catalog.subscribe()
+        try:
+            snapshot = await self.catalog.get_snapshot()
+            if since is not None and since < snapshot.change_version:
+                delta = await self.get_catalog_changes(since, locale)
+                if delta.full_resync:
+                    yield CatalogEvent.resync(delta.version).frame(locale)
+                else:
+                    yield CatalogEvent("changes", delta.version, delta.changes, snapshot.country_names).frame(locale)
+            else:
+                yield CatalogEvent("version", snapshot.change_version).frame(locale)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=CHANGES_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield event.frame(locale)
+        finally:
+            self.catalog.unsubscribe(queue)
+
+    async def suggest(self, query: str, limit: int = 10, kind: Optional[str] = None) -> List[SuggestionDTO]:
+        """
+        Подсказки по названиям услуг и стран для поиска по мере ввода.
+        Популярные и стоящие выше по sort_order идут первыми.
+        """
+        if self.catalog:
+            snapshot = await self.catalog.get_snapshot()
+            return snapshot.search_index.search(query, limit, kind)
+
+        services = await self._shared("service_references", lambda repo: repo.get_service_references())
+        countries = await self._shared("country_references", lambda repo: repo.get_country_references())
+        return NameSearchIndex(services, countries).search(query, limit, kind)
 
     async def get_service_price(
-        self, service_code: str, country_code: str
+        self, service_code: str, country_code: str, locale: str = DEFAULT_LOCALE
     ) -> Optional[ServicePrice]:
         """
         Получить лучшую цену для конкретной услуги в указанной стране.
@@ -26,14 +224,34 @@ class PriceService:
         if not service_code or not country_code:
             raise KeyError("Service code and country code are required")
 
-        price = await self.price_repo.get_price_for_service_country(
-            service_code, country_code
+        price = await self._shared(
+            ("price", service_code, country_code),
+            lambda repo: repo.get_price_for_service_country(service_code, country_code)
         )
         if not price:
             raise NotFoundException
-        return price
+        return await self._localize(price, locale)
+
+    async def get_batch_prices(
+            self, pairs: List[Tuple[str, str]], locale: str = DEFAULT_LOCALE
+    ) -> List[Optional[ServicePrice]]:
+        """
+        Лучшие цены для набора пар (услуга, страна) одним запросом.
+        Результат идёт в порядке запроса, для пар без цены — None.
+        """
+        prices = await self.price_repo.get_prices_for_pairs(pairs)
+        return [await self._localize(prices.get(pair), locale) for pair in pairs]
 
-    async def list_services_by_country(self, country_code: str) -> List[ServicePrice]:
+    async def _localize(self, price: Optional[ServicePrice], locale: str) -> Optional[ServicePrice]:
+        """Название страны на нужном языке по справочнику снимка, без обращения к БД"""
+        if price is None or locale == DEFAULT_LOCALE or not self.catalog:
+            return price
+        snapshot = await self.catalog.get_snapshot()
+        return snapshot.localize(price, locale)
+
+    async def list_services_by_country(
+            self, country_code: str, locale: str = DEFAULT_LOCALE
+    ) -> List[ServicePrice]:
         """
         Получить все услуги, доступные для указанной страны.
         Используется в фильтрах на фронтенде.
@@ -41,9 +259,17 @@ class PriceService:
         if not country_code:
             raise KeyError("Country code is required")
 
-        return await self.price_repo.get_services_by_country(country_code)
+        if self.catalog:
+            snapshot = await self.catalog.get_snapshot()
+            return snapshot.services_by_country(country_code, locale)
+        return await self._shared(
+            ("by_country", country_code),
+            lambda repo: repo.get_services_by_country(country_code)
+        )
 
-    async def list_countries_by_service(self, service_code: str) -> List[ServicePrice]:
+    async def list_countries_by_service(
+            self, service_code: str, locale: str = DEFAULT_LOCALE
+    ) -> List[ServicePrice]:
         """
         Получить все страны, где доступна указанная услуга.
         Используется при выборе страны для услуги.
@@ -51,28 +277,43 @@ class PriceService:
         if not service_code:
             raise KeyError("Service code is required")
 
-        return await self.price_repo.get_countries_by_service(service_code)
+        if self.catalog:
+            snapshot = await self.catalog.get_snapshot()
+            return snapshot.countries_by_service(service_code, locale)
+        return await self._shared(
+            ("by_service", service_code),
+            lambda repo: repo.get_countries_by_service(service_code)
+        )
 
-    async def get_popular_services(self) -> List[ServicePrice]:
+    async def get_popular_services(self, locale: str = DEFAULT_LOCALE) -> List[ServicePrice]:
         """
         Получить список популярных услуг (помеченных как is_popular).
         Для главной страницы или быстрого выбора.
         """
-        return await self.price_repo.get_popular_services()
+        if self.catalog:
+            snapshot = await self.catalog.get_snapshot()
+            return snapshot.view(locale).popular_services
+        return await self._shared("popular_services", lambda repo: repo.get_popular_services())
 
-    async def get_popular_countries(self) -> List[ServicePrice]:
+    async def get_popular_countries(self, locale: str = DEFAULT_LOCALE) -> List[ServicePrice]:
         """
         Получить список популярных стран (помеченных как is_popular).
         Для главной страницы или быстрого выбора.
         """
-        return await self.price_repo.get_popular_countries()
+        if self.catalog:
+            snapshot = await self.catalog.get_snapshot()
+            return snapshot.view(locale).popular_countries
+        return await self._shared("popular_countries", lambda repo: repo.get_popular_countries())
 
     async def get_availability_stats(self) -> Dict[str, Any]:
         """
         Получить статистику по доступным услугам и странам.
         Для админ-панели или дашборда.
         """
-        return await self.price_repo.get_available_services_countries()
+        if self.catalog:
+            snapshot = await self.catalog.get_snapshot()
+            return snapshot.availability_stats
+        return await self._shared("stats", lambda repo: repo.get_available_services_countries())
 
     async def get_detailed_prices(
         self, service_code: str, country_code: str
@@ -84,6 +325,11 @@ class PriceService:
         if not service_code or not country_code:
             raise KeyError("Service code and country code are required")
 
-        return await self.price_repo.get_detailed_prices_for_service_country(
-            service_code, country_code
-        )
\ No newline at end of file
+        return await self._shared(
+            ("detailed", service_code, country_code),
+            lambda repo: repo.get_detailed_prices_for_service_country(service_code, country_code)
+        )
+
+
+def _ndjson(prices: List[ServicePrice]) -> bytes:
+    return b"".join(price.model_dump_json().encode() + b"\n" for price in prices)
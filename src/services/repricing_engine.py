@@ -0,0 +1,108 @@
+from decimal import Decimal, ROUND_CEILING
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.core.domain.entity.provider_route import MarkupRule, RouteCosts
+
+# Шаг клиентских цен; округление вверх, чтобы не опустить цену ниже минимальной маржи
+PRICE_STEP = Decimal("0.01")
+
+RuleKey = Tuple[Optional[int], Optional[str], Optional[str]]
+
+# Ключи поиска правила от самого конкретного к глобальному.
+# При равном числе полей услуга важнее страны, страна — поставщика
+_LOOKUP_ORDER = sorted(
+    [(p, s, c) for s in (True, False) for c in (True, False) for p in (True, False)],
+    key=lambda mask: (-sum(mask), not mask[1], not mask[2], not mask[0])
+)
+
+_HUNDRED = Decimal(100)
+
+
+class RoutePriceUpdate(NamedTuple):
+    id: int
+    client_price: Decimal
+    vip_client_price: Decimal
+
+
+class RepricingResult(NamedTuple):
+    updates: List[RoutePriceUpdate]
+    total: int
+    unpriced: int
+    raised_to_min_margin: int
+
+
+class RepricingEngine:
+    """
+    Расчёт клиентских и VIP-цен маршрутов из себестоимости по правилам наценки.
+    Правила разложены по словарю с подстановочными ключами, поэтому правило маршрута
+    находится за несколько обращений к словарю, а весь прайс считается одним проходом
+    по колонкам. Возвращаются только маршруты, чьи цены изменились.
+    """
+
+    def __init__(self, rules: List[MarkupRule]):
+        self._rules: Dict[RuleKey, MarkupRule] = {
+            (rule.provider_id, rule.service_code, rule.country_code): rule for rule in rules
+        }
+        # Маски, под которые вообще есть правила: остальные ключи не проверяем
+        self._masks = [
+            mask for mask in _LOOKUP_ORDER
+            if any(
+                tuple(field is not None for field in key) == mask
+                for key in self._rules
+            )
+        ]
+
+    def rule_for(self, provider_id: int, service_code: str, country_code: str) -> Optional[MarkupRule]:
+        for use_provider, use_service, use_country in self._masks:
+            rule = self._rules.get((
+                provider_id if use_provider else None,
+                service_code if use_service else None,
+                country_code if use_country else None
+            ))
+            if rule is not None:
+                return rule
+        return None
+
+    def reprice(self, routes: RouteCosts) -> RepricingResult:
+        updates = []
+        unpriced = raised = 0
+        # Одинаковые сочетания правила, себестоимости и маржи встречаются постоянно
+        computed: Dict[tuple, Tuple[Decimal, Decimal, bool]] = {}
+
+        for i, route_id in enumerate(routes.ids):
+            rule = self.rule_for(routes.provider_ids[i], routes.service_codes[i], routes.country_codes[i])
+            if rule is None:
+                unpriced += 1
+                continue
+
+            key = (id(rule), routes.cost_prices[i], routes.min_margins[i])
+            prices = computed.get(key)
+            if prices is None:
+                prices = computed[key] = self._price(rule, routes.cost_prices[i], routes.min_margins[i])
+            client_price, vip_price, floored = prices
+
+            raised += floored
+            if client_price != routes.client_prices[i] or vip_price != routes.vip_client_prices[i]:
+                updates.append(RoutePriceUpdate(route_id, client_price, vip_price))
+
+        return RepricingResult(updates, len(routes.ids), unpriced, raised)
+
+    @staticmethod
+    def _price(rule: MarkupRule, cost: Decimal, min_margin: Optional[Decimal]) -> Tuple[Decimal, Decimal, bool]:
+        vip_markup = rule.markup_percent if rule.vip_markup_percent is None else rule.vip_markup_percent
+        client_price = cost * (_HUNDRED + rule.markup_percent) / _HUNDRED
+        vip_price = cost * (_HUNDRED + vip_markup) / _HUNDRED
+
+        floored = False
+        if min_margin is not None:
+            floor = cost * (_HUNDRED + min_margin) / _HUNDRED
+            if client_price < floor or vip_price < floor:
+                floored = True
+                client_price = max(client_price, floor)
+                vip_price = max(vip_price, floor)
+
+        return (
+            client_price.quantize(PRICE_STEP, rounding=ROUND_CEILING),
+            vip_price.quantize(PRICE_STEP, rounding=ROUND_CEILING),
+            floored
+        )
@@ -0,0 +1,76 @@
+import time
+from typing import AsyncContextManager, Callable, List, Optional
+
+from src.core.domain.repository.interfaces import IProviderRouteRepository
+from src.core.domain.entity.provider_route import MarkupRule
+from src.core.domain.dto.provider_route_dto import RepriceResultDTO
+from src.services.best_route_index import BestRouteIndex
+from src.services.price_catalog import PriceCatalogCache
+from src.services.repricing_engine import RepricingEngine
+from src.core.logging_config import get_logger
+
+
+class RepricingService:
+    """
+    Переоценка маршрутов по правилам наценки из system_config.
+    Маршруты читаются одним запросом по колонкам, считаются в памяти
+    и записываются одним UPDATE только там, где цена изменилась.
+    """
+
+    def __init__(
+            self,
+            repo_scope: Callable[[], AsyncContextManager[IProviderRouteRepository]],
+            catalog: Optional[PriceCatalogCache] = None,
+            route_index: Optional[BestRouteIndex] = None
+    ):
+        self.repo_scope = repo_scope
+        self.catalog = catalog
+        self.route_index = route_index
+        self.logger = get_logger(__name__)
+
+    async def get_rules(self) -> List[MarkupRule]:
+        async with self.repo_scope() as repo:
+            return await repo.get_markup_rules()
+
+    async def save_rules(self, rules: List[MarkupRule]) -> List[MarkupRule]:
+        keys = [(rule.provider_id, rule.service_code, rule.country_code) for rule in rules]
+        if len(set(keys)) != len(keys):
+            raise ValueError("Duplicate markup rules for the same provider/service/country")
+
+        async with self.repo_scope() as repo:
+            return await repo.save_markup_rules(rules)
+
+    async def reprice(self, dry_run: bool = False) -> RepriceResultDTO:
+        started = time.perf_counter()
+        async with self.repo_scope() as repo:
+            rules = await repo.get_markup_rules()
+            routes = await repo.get_route_costs()
+            result = RepricingEngine(rules).reprice(routes)
+
+            if not dry_run:
+                await repo.apply_route_prices(result.updates)
+
+        if not dry_run and result.updates:
+            if self.catalog:
+                self.catalog.invalidate()
+            if self.route_index:
+                route_keys = dict(zip(routes.ids, zip(routes.service_codes, routes.country_codes)))
+                try:
+                    await self.route_index.refresh_keys(route_keys[update.id] for update in result.updates)
+                except Exception as e:
+                    # Цены уже записаны, индекс догонит их при синхронизации
+                    self.logger.error(f"Error refreshing best route index after repricing: {e}")
+
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        self.logger.info(
+            f"Repricing {'(dry run) ' if dry_run else ''}done: {len(result.updates)} of {result.total} "
+            f"routes changed in {duration_ms}ms"
+        )
+        return RepriceResultDTO(
+            total=result.total,
+            changed=len(result.updates),
+            unpriced=result.unpriced,
+            raised_to_min_margin=result.raised_to_min_margin,
+            dry_run=dry_run,
+            duration_ms=duration_ms
+        )
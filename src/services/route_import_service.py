@@ -0,0 +1,94 @@
+import asyncio
+import time
+from typing import AsyncContextManager, Callable, Dict, List, Optional
+
+from src.core.domain.repository.interfaces import IProviderRouteRepository
+from src.core.domain.entity.provider_route import RoutePriceRow
+from src.core.domain.dto.provider_route_dto import PriceListImportResultDTO
+from src.core.domain.dto.service_price_dto import ServiceCountryPairDTO
+from src.services.best_route_index import BestRouteIndex
+from src.services.price_catalog import PriceCatalogCache
+from src.core.logging_config import get_logger
+
+
+class RouteImportService:
+    """
+    Загрузка прайс-листов поставщиков в provider_routes.
+    Каждый прайс-лист импортируется в своей сессии и транзакции,
+    поэтому прайсы разных поставщиков загружаются параллельно.
+    В режиме only_changed переписываются только изменившиеся маршруты,
+    а кэши сбрасываются, лишь если что-то действительно изменилось.
+    """
+
+    def __init__(
+            self,
+            repo_scope: Callable[[], AsyncContextManager[IProviderRouteRepository]],
+            catalog: Optional[PriceCatalogCache] = None,
+            route_index: Optional[BestRouteIndex] = None
+    ):
+        self.repo_scope = repo_scope
+        self.catalog = catalog
+        self.route_index = route_index
+        self.logger = get_logger(__name__)
+
+    async def import_price_list(
+            self,
+            provider_id: int,
+            rows: List[RoutePriceRow],
+            only_changed: bool = False
+    ) -> PriceListImportResultDTO:
+        """Загрузить прайс-лист одного поставщика"""
+        result = await self._import(provider_id, rows, only_changed)
+        await self._invalidate([result])
+        return result
+
+    async def import_price_lists(
+            self,
+            price_lists: Dict[int, List[RoutePriceRow]],
+            only_changed: bool = False
+    ) -> List[PriceListImportResultDTO]:
+        """Загрузить прайс-листы нескольких поставщиков параллельно"""
+        results = await asyncio.gather(
+            *(self._import(provider_id, rows, only_changed) for provider_id, rows in price_lists.items()),
+            return_exceptions=True
+        )
+        # Часть прайсов могла загрузиться и при ошибке в остальных
+        await self._invalidate([r for r in results if isinstance(r, PriceListImportResultDTO)])
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return list(results)
+
+    async def _import(
+            self,
+            provider_id: int,
+            rows: List[RoutePriceRow],
+            only_changed: bool
+    ) -> PriceListImportResultDTO:
+        started = time.perf_counter()
+        async with self.repo_scope() as repo:
+            changed_keys = await repo.import_price_list(provider_id, rows, only_changed=only_changed)
+
+        return PriceListImportResultDTO(
+            provider_id=provider_id,
+            received=len(rows),
+            affected=len(changed_keys),
+            changed=[
+                ServiceCountryPairDTO(service_code=service_code, country_code=country_code)
+                for service_code, country_code in dict.fromkeys(changed_keys)
+            ],
+            duration_ms=int((time.perf_counter() - started) * 1000)
+        )
+
+    async def _invalidate(self, results: List[PriceListImportResultDTO]) -> None:
+        if self.catalog and any(result.affected for result in results):
+            self.catalog.invalidate()
+
+        if self.route_index:
+            keys = [(pair.service_code, pair.country_code) for result in results for pair in result.changed]
+            try:
+                await self.route_index.refresh_keys(keys)
+            except Exception as e:
+                # Импорт уже закоммичен, индекс догонит его при синхронизации
+                self.logger.error(f"Error refreshing best route index after import: {e}")
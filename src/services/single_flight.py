@@ -0,0 +1,39 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from src.core.logging_config import get_logger
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Объединяет конкурентные вызовы с одинаковым ключом: пока запрос выполняется,
+    остальные вызывающие ждут его результат вместо повторного обращения к БД.
+    Результат не кэшируется — следующий вызов после завершения выполнится заново.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.logger = get_logger(__name__)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            # Запрос выполняется отдельной задачей, чтобы отмена первого
+            # вызывающего (например, разрыв соединения) не обрывала остальных
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Помечаем исключение полученным, даже если все ожидающие уже отменены
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.warning(f"Shared query {key!r} failed: {task.exception()}")
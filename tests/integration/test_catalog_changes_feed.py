@@ -0,0 +1,69 @@
+# test_catalog_changes_feed.py
+# Лента изменений route_summary держится на триггерах и снимках PostgreSQL,
+# поэтому тест запускается только при заданном TEST_POSTGRES_URL
+import os
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from src.infrastructure.database.base import Base
+from src.infrastructure.database.schemas import ProviderORM, ProviderRoutesORM
+from src.infrastructure.repository.price_repository import PriceRepository
+
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+
+@pytest_asyncio.fixture
+async def pg_sessions():
+    engine = create_async_engine(TEST_POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as session:
+        provider = ProviderORM(name="feed_provider", adapter_class="TestAdapter", config={}, is_active=True)
+        session.add_all([
+            ProviderRoutesORM(
+                id=route_id, provider=provider, country_code=country, service_code="telegram",
+                provider_country_code=country, provider_service_code="tg",
+                cost_price=Decimal("4.0"), client_price=Decimal("8.0"), vip_client_price=Decimal("7.0"),
+                available_count=10, is_active=True
+            )
+            for route_id, country in ((1, "US"), (2, "RU"))
+        ])
+        await session.commit()
+
+    yield sessions
+    await engine.dispose()
+
+
+class TestCatalogChangesFeed:
+    @pytest.mark.asyncio
+    async def test_late_commit_is_not_skipped(self, pg_sessions, monkeypatch):
+        monkeypatch.setenv("TESTING", "0")
+
+        async with pg_sessions() as slow, pg_sessions() as fast, pg_sessions() as reader:
+            repo = PriceRepository(reader)
+            start = await repo.get_catalog_change_version()
+
+            # Медленная транзакция пишет первой, а коммитится последней
+            await slow.execute(update(ProviderRoutesORM).where(ProviderRoutesORM.id == 1).values(client_price=9))
+            await fast.execute(update(ProviderRoutesORM).where(ProviderRoutesORM.id == 2).values(client_price=6))
+            await fast.commit()
+
+            seen = await repo.get_catalog_change_version()
+            first = await repo.get_catalog_changes(start, seen, 100)
+            await reader.commit()
+
+            await slow.commit()
+            current = await repo.get_catalog_change_version()
+            second = await repo.get_catalog_changes(seen, current, 100)
+
+        delivered = {(c.country_code, c.price) for c in first + second}
+        assert ("US", 9.0) in delivered
+        assert ("RU", 6.0) in delivered
+        assert current > seen
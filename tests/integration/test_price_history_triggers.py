@@ -0,0 +1,81 @@
+# test_price_history_triggers.py
+# История цен пишется триггерами внутри каждой записи provider_routes,
+# поэтому тест запускается только при заданном TEST_POSTGRES_URL
+import os
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+from sqlalchemy import func, select, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from src.infrastructure.database.base import Base
+from src.infrastructure.database.schemas import ProviderORM, ProviderRoutesORM, RoutePriceRollupORM
+
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+
+@pytest_asyncio.fixture
+async def pg_sessions():
+    engine = create_async_engine(TEST_POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as session:
+        session.add_all([
+            ProviderRoutesORM(
+                id=route_id,
+                provider=ProviderORM(name=f"history-{route_id}", adapter_class="TestAdapter", config={}, is_active=True),
+                country_code="RU", service_code="telegram",
+                provider_country_code="ru", provider_service_code="tg",
+                cost_price=Decimal("4.0"), client_price=Decimal("8.0"), vip_client_price=Decimal("7.0"),
+                available_count=10, is_active=True
+            )
+            for route_id in (1, 2)
+        ])
+        await session.commit()
+
+    yield sessions
+    await engine.dispose()
+
+
+class TestPriceHistoryTriggers:
+    @pytest.mark.asyncio
+    async def test_writers_of_different_routes_do_not_wait_on_rollups(self, pg_sessions):
+        async with pg_sessions() as first, pg_sessions() as second:
+            await first.execute(update(ProviderRoutesORM).where(ProviderRoutesORM.id == 1).values(client_price=9))
+
+            # Свёртка того же ключа у другого поставщика — отдельная строка, ожидания быть не должно
+            await second.execute(text("SET LOCAL lock_timeout = '1s'"))
+            await second.execute(update(ProviderRoutesORM).where(ProviderRoutesORM.id == 2).values(client_price=6))
+            await second.commit()
+            await first.commit()
+
+        async with pg_sessions() as reader:
+            rows = (await reader.execute(
+                select(RoutePriceRollupORM.provider_id, func.sum(RoutePriceRollupORM.samples))
+                .where(RoutePriceRollupORM.resolution == "hour")
+                .group_by(RoutePriceRollupORM.provider_id)
+            )).all()
+
+        assert len(rows) == 2
+        assert all(samples == 2 for _, samples in rows)
+
+    @pytest.mark.asyncio
+    async def test_failed_history_write_rolls_back_the_route_write(self, pg_sessions):
+        async with pg_sessions() as session:
+            await session.execute(text(
+                "ALTER TABLE route_price_history ADD CONSTRAINT reject_all CHECK (false) NOT VALID"
+            ))
+            await session.commit()
+
+            with pytest.raises(DBAPIError):
+                await session.execute(update(ProviderRoutesORM).where(ProviderRoutesORM.id == 1).values(client_price=9))
+            await session.rollback()
+
+            price = await session.scalar(select(ProviderRoutesORM.client_price).where(ProviderRoutesORM.id == 1))
+
+        assert price == Decimal("8.0")
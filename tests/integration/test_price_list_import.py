@@ -0,0 +1,62 @@
+# test_price_list_import.py
+# Прайс-лист в PostgreSQL загружается через COPY во временную таблицу,
+# поэтому тест запускается только при заданном TEST_POSTGRES_URL
+import os
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from src.core.domain.entity.provider_route import RoutePriceRow
+from src.infrastructure.database.base import Base
+from src.infrastructure.database.schemas import ProviderORM, ProviderRoutesORM
+from src.infrastructure.repository.provider_route_repository import ProviderRouteRepository
+
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+
+@pytest_asyncio.fixture
+async def pg_sessions():
+    engine = create_async_engine(TEST_POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    yield sessions
+    await engine.dispose()
+
+
+def make_row(price):
+    return RoutePriceRow(
+        service_code="viber",
+        country_code="RU",
+        provider_service_code="vi",
+        provider_country_code="ru",
+        cost_price=Decimal(str(price)) - 1,
+        client_price=Decimal(str(price)),
+        available_count=10
+    )
+
+
+class TestPriceListImport:
+    @pytest.mark.asyncio
+    async def test_last_duplicate_row_wins(self, pg_sessions, monkeypatch):
+        monkeypatch.setenv("TESTING", "0")
+
+        async with pg_sessions() as session:
+            provider = ProviderORM(name="import_provider", adapter_class="TestAdapter", config={}, is_active=True)
+            session.add(provider)
+            await session.commit()
+
+            changed = await ProviderRouteRepository(session).import_price_list(
+                provider.id, [make_row(price) for price in (5.0, 6.0, 4.0, 7.0, 4.5)]
+            )
+            price = await session.scalar(
+                select(ProviderRoutesORM.client_price).where(ProviderRoutesORM.provider_id == provider.id)
+            )
+
+        assert changed == [("viber", "RU")]
+        assert price == Decimal("4.5")
@@ -0,0 +1,118 @@
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock
+from src.core.domain.dto.order_dto import OrderCreateDTO
+from src.core.domain.entity.provider_route import RouteCandidate
+from src.services.best_route_index import BestRouteIndex, _to_route_price
+from src.services.order_service import OrderService
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def make_route(route_id, price, rating=50.0, available=10, is_active=True, provider_id=None, updated_at=NOW):
+    return RouteCandidate(
+        id=route_id,
+        provider_id=provider_id or route_id,
+        provider_name=f"provider-{route_id}",
+        service_code="telegram",
+        country_code="RU",
+        client_price=Decimal(str(price)),
+        available_count=available,
+        rating_score=rating,
+        is_active=is_active,
+        updated_at=updated_at
+    )
+
+
+class TestBestRouteIndex:
+    @pytest.fixture
+    def mock_repo(self):
+        repo = AsyncMock()
+        repo.get_route_candidates.return_value = [
+            make_route(1, 10.0, rating=40.0),
+            make_route(2, 8.0, rating=30.0),
+            make_route(3, 8.0, rating=90.0),
+        ]
+        return repo
+
+    @pytest.fixture
+    def index(self, mock_repo):
+        @asynccontextmanager
+        async def repo_scope():
+            yield mock_repo
+
+        return BestRouteIndex(repo_scope=repo_scope)
+
+    @pytest.mark.asyncio
+    async def test_best_route_follows_price_then_rating(self, index):
+        await index.load()
+
+        best = index.best("telegram", "RU")
+        assert best.provider_id == 3
+        assert best.price == 8.0
+        assert index.best("telegram", "US") is None
+
+    @pytest.mark.asyncio
+    async def test_changes_are_applied_in_place(self, index, mock_repo):
+        await index.load()
+
+        mock_repo.get_route_candidates.return_value = [
+            make_route(3, 8.0, rating=90.0, is_active=False, updated_at=NOW + timedelta(seconds=5)),
+            make_route(1, 7.5, rating=40.0, updated_at=NOW + timedelta(seconds=5)),
+        ]
+        touched = await index.sync()
+
+        assert touched == 1
+        assert index.best("telegram", "RU").provider_id == 1
+        since = mock_repo.get_route_candidates.await_args.kwargs["updated_since"]
+        assert since < NOW
+
+    @pytest.mark.asyncio
+    async def test_key_disappears_when_last_route_removed(self, index):
+        await index.load()
+
+        for route_id in (1, 2, 3):
+            index.remove(route_id)
+
+        assert index.best("telegram", "RU") is None
+
+    @pytest.mark.asyncio
+    async def test_refresh_keys_replaces_routes_of_changed_keys(self, index, mock_repo):
+        await index.load()
+        watermark = index._watermark
+        mock_repo.get_route_candidates.return_value = [
+            make_route(1, 7.0, rating=40.0, updated_at=NOW + timedelta(minutes=5)),
+            make_route(2, 8.0, rating=30.0, updated_at=NOW + timedelta(minutes=5)),
+        ]
+
+        touched = await index.refresh_keys([("telegram", "RU"), ("telegram", "RU")])
+
+        assert touched == 1
+        assert index.best("telegram", "RU").provider_id == 1
+        assert mock_repo.get_route_candidates.await_args.kwargs["keys"] == [("telegram", "RU")]
+        assert index._watermark == watermark
+
+        mock_repo.get_route_candidates.return_value = []
+        await index.refresh_keys([("telegram", "RU")])
+        assert index.best("telegram", "RU") is None
+
+    @pytest.mark.asyncio
+    async def test_order_rechecks_indexed_route_before_charging(self, index, mock_repo):
+        await index.load()
+        stale = index.best("telegram", "RU")
+        current = _to_route_price(make_route(2, 9.0, rating=30.0))
+        price_repo = AsyncMock()
+        price_repo.get_route_price.return_value = stale.model_copy(update={"price": 12.0})
+        price_repo.get_price_for_service_country.return_value = current
+        order_repo = AsyncMock()
+        order_repo.create.side_effect = Exception("stop after pricing")
+        service = OrderService(order_repo=order_repo, price_repo=price_repo, user_repo=AsyncMock(), route_index=index)
+
+        with pytest.raises(Exception, match="stop after pricing"):
+            await service.create_order(OrderCreateDTO(service="telegram", country_code="RU"), 7, 100.0)
+
+        price_repo.get_route_price.assert_awaited_once_with(3, "telegram", "RU")
+        assert order_repo.create.await_args.args[0].price == 9.0
+        assert order_repo.create.await_args.args[0].provider_id == 2
@@ -0,0 +1,36 @@
+from src.core.domain.entity.services import ServicePublic
+from src.core.domain.entity.countries import CountryPublic
+from src.services.name_search import NameSearchIndex
+
+SERVICES = [
+    ServicePublic(code="wa", name="WhatsApp", is_popular=True),
+    ServicePublic(code="tg", name="Telegram", is_popular=True, sort_order=1),
+    ServicePublic(code="tw", name="Twitter"),
+]
+
+COUNTRIES = [
+    CountryPublic(code="IN", name_ru="Индия", name_en="India"),
+    CountryPublic(code="ID", name_ru="Индонезия", name_en="Indonesia", is_popular=True),
+    CountryPublic(code="US", name_ru="США", name_en="United States"),
+]
+
+
+class TestNameSearchIndex:
+    def setup_method(self):
+        self.index = NameSearchIndex(SERVICES, COUNTRIES)
+
+    def test_prefix_and_substring_matches(self):
+        assert [s.code for s in self.index.search("whats")] == ["wa"]
+        assert [s.code for s in self.index.search("app")] == ["wa"]
+        assert [s.code for s in self.index.search("STATES")] == ["US"]
+
+    def test_popular_entries_rank_first(self):
+        assert [s.code for s in self.index.search("Инд")] == ["ID", "IN"]
+        assert [s.code for s in self.index.search("t", kind="service")] == ["tg", "tw"]
+
+    def test_exact_code_ranks_above_name_matches(self):
+        assert self.index.search("in")[0].code == "IN"
+
+    def test_unknown_query_returns_nothing(self):
+        assert self.index.search("zzz") == []
+        assert self.index.search("  ") == []
@@ -0,0 +1,91 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.core.di import get_current_user, get_order_service
+from src.core.domain.entity.orders import Order, OrderStatus
+from src.core.domain.entity.user import User
+from src.infrastructure.database.schemas import OrderORM, UserORM
+from src.infrastructure.repository.order_repository import OrderRepository
+from src.infrastructure.repository.status_type_repository import invalidate_status_types
+from src.presentation.api.orders.order_router import router as order_router
+from src.services.order_service import OrderService
+
+
+@pytest.fixture(autouse=True)
+def reset_status_types():
+    invalidate_status_types()
+    yield
+    invalidate_status_types()
+
+
+async def add_orders(session, count):
+    user = UserORM(user_name="fields_user", email="fields@test.com", password_hash="hash", balance=100.0)
+    session.add(user)
+    await session.flush()
+    session.add_all([
+        OrderORM(
+            id=order_id, user_id=user.id, service="telegram", country_code="RU", number=f"+7900{order_id}",
+            price=8.0 + order_id, status_id=2, provider_id=1, created_at=datetime(2026, 1, order_id)
+        )
+        for order_id in range(1, count + 1)
+    ])
+    await session.commit()
+    return user.id
+
+
+class TestOrderColumnPushDown:
+    def test_only_requested_columns_are_selected(self):
+        query = OrderRepository._select_orders({"price", "status", "number"})
+
+        assert {c.name for c in query.selected_columns} == {"id", "created_at", "price", "status_id", "number"}
+        assert len(OrderRepository._select_orders(None).selected_columns) == len(OrderORM.__table__.columns)
+
+    @pytest.mark.asyncio
+    async def test_partial_orders_carry_only_requested_fields(self, async_db_session):
+        user_id = await add_orders(async_db_session, 2)
+
+        orders = await OrderRepository(async_db_session).get_by_user_id(user_id, fields={"price", "status"})
+
+        assert [o.id for o in orders] == [2, 1]
+        assert all(o.model_fields_set == {"id", "created_at", "price", "status"} for o in orders)
+        assert (orders[0].price, orders[0].status) == (10.0, OrderStatus.COMPLETED)
+
+
+class TestOrderFieldsEndpoint:
+    @pytest.fixture
+    def order_repo(self):
+        repo = AsyncMock()
+        repo.get_by_user_id.return_value = [
+            Order.model_construct(id=1, created_at=datetime(2026, 1, 1), price=9.0, number="+79001")
+        ]
+        repo.get_orders_count_by_user.return_value = 1
+        return repo
+
+    @pytest.fixture
+    def client(self, order_repo):
+        service = OrderService(order_repo=order_repo, price_repo=AsyncMock(), user_repo=AsyncMock())
+        app = FastAPI()
+        app.include_router(order_router)
+        app.dependency_overrides[get_order_service] = lambda: service
+        app.dependency_overrides[get_current_user] = lambda: User(
+            id=7, user_name="u", balance=100.0, created_at=datetime(2026, 1, 1)
+        )
+        return TestClient(app)
+
+    def test_response_contains_only_requested_keys(self, client, order_repo):
+        response = client.get("/orders/my", params={"fields": "price,phone_number"})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["orders"] == [{"price": 9.0, "phone_number": "+79001"}]
+        assert body["total"] == 1
+        assert order_repo.get_by_user_id.await_args.kwargs["fields"] == {"price", "number"}
+
+    def test_unknown_fields_are_rejected(self, client, order_repo):
+        response = client.get("/orders/my", params={"fields": "price,password_hash"})
+
+        assert response.status_code == 400
+        assert "password_hash" in response.json()["detail"]
+        order_repo.get_by_user_id.assert_not_called()
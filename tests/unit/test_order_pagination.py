@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from src.core.domain.entity.orders import Order, OrderStatus
+from src.infrastructure.database.schemas import OrderORM, UserORM
+from src.infrastructure.repository.order_repository import OrderRepository
+from src.infrastructure.repository.status_type_repository import invalidate_status_types
+from src.services.order_service import OrderService, decode_cursor, encode_cursor
+
+
+def make_order(order_id, created_at):
+    return Order(
+        id=order_id, user_id=7, service="telegram", country_code="RU", price=8.0,
+        status=OrderStatus.COMPLETED, created_at=created_at
+    )
+
+
+class TestOrderPagination:
+    def test_cursor_round_trip(self):
+        created_at = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+    def test_invalid_cursor(self):
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    @pytest.mark.asyncio
+    async def test_full_page_returns_cursor_of_last_order(self):
+        orders = [make_order(i, datetime(2026, 1, 10 - i)) for i in (3, 2)]
+        order_repo = AsyncMock()
+        order_repo.get_by_user_id.return_value = orders
+        order_repo.get_orders_count_by_user.return_value = 10
+        price_repo = AsyncMock()
+        price_repo.get_reference_names.return_value = ({}, {}, {})
+        service = OrderService(order_repo=order_repo, price_repo=price_repo, user_repo=AsyncMock())
+
+        first = await service.get_orders_by_user_id(7, limit=2)
+        await service.get_orders_by_user_id(7, limit=2, cursor=first.next_cursor)
+
+        assert decode_cursor(first.next_cursor) == (datetime(2026, 1, 8), 2)
+        assert order_repo.get_by_user_id.await_args_list[0].kwargs["after"] is None
+        assert order_repo.get_by_user_id.await_args_list[1].kwargs["after"] == (datetime(2026, 1, 8), 2)
+
+    @pytest.mark.asyncio
+    async def test_short_page_is_last(self):
+        order_repo = AsyncMock()
+        order_repo.get_all.return_value = [make_order(1, datetime(2026, 1, 1))]
+        price_repo = AsyncMock()
+        price_repo.get_reference_names.return_value = ({}, {}, {})
+        service = OrderService(order_repo=order_repo, price_repo=price_repo, user_repo=AsyncMock())
+
+        orders = await service.get_all_orders(limit=2, fields={"id"})
+
+        assert [o.id for o in orders] == [1]
+        price_repo.get_reference_names.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_keyset_pages_over_shared_timestamps(self, async_db_session):
+        invalidate_status_types()
+        user = UserORM(user_name="pager", email="pager@test.com", password_hash="hash", balance=0.0)
+        async_db_session.add(user)
+        await async_db_session.flush()
+        days = [1, 1, 1, 2, 2, 3, 3, 3]
+        async_db_session.add_all([
+            OrderORM(id=order_id, user_id=user.id, service="telegram", country_code="RU", price=8.0,
+                     status_id=2, created_at=datetime(2026, 1, day))
+            for order_id, day in enumerate(days, start=1)
+        ])
+        await async_db_session.commit()
+        price_repo = AsyncMock()
+        price_repo.get_reference_names.return_value = ({}, {}, {})
+        service = OrderService(order_repo=OrderRepository(async_db_session), price_repo=price_repo, user_repo=AsyncMock())
+
+        seen, cursor = [], None
+        for _ in range(len(days)):
+            page = await service.get_orders_by_user_id(user.id, limit=3, cursor=cursor)
+            seen.extend(order.id for order in page.orders)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+
+        assert seen == [8, 7, 6, 5, 4, 3, 2, 1]
+        invalidate_status_types()
@@ -0,0 +1,95 @@
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest.mock import AsyncMock
+from src.core.domain.entity.countries import CountryPublic
+from src.core.domain.entity.orders import Order, OrderStatus
+from src.core.domain.dto.order_dto import OrderCreateDTO
+from src.core.domain.entity.service_price import ServicePrice, ServiceRoutePrice
+from src.services.order_service import OrderService
+from src.services.price_catalog import CatalogSnapshot, PriceCatalogCache, discount_tier
+
+TELEGRAM_RU = ServicePrice(
+    service_code="telegram", country_code="RU", price=8.0, vip_price=None,
+    available=True, service_name="Telegram", country_name="RU"
+)
+
+
+class TestOrderService:
+    @pytest.fixture
+    def catalog_repo(self):
+        repo = AsyncMock()
+        repo.get_service_catalog.return_value = [TELEGRAM_RU]
+        repo.get_popular_services.return_value = []
+        repo.get_popular_countries.return_value = []
+        repo.get_catalog_change_version.return_value = 1
+        repo.get_service_references.return_value = []
+        repo.get_country_references.return_value = [CountryPublic(code="RU", name_ru="Россия")]
+        return repo
+
+    @pytest.fixture
+    def catalog(self, catalog_repo):
+        @asynccontextmanager
+        async def repo_scope():
+            yield catalog_repo
+
+        return PriceCatalogCache(repo_scope=repo_scope)
+
+    @pytest.fixture
+    def user_repo(self):
+        return AsyncMock()
+
+    @pytest.fixture
+    def charging_service(self, user_repo):
+        price_repo = AsyncMock()
+        price_repo.get_price_for_service_country.return_value = ServiceRoutePrice(
+            **TELEGRAM_RU.model_dump(), provider_id=1, provider_name="p"
+        )
+        order_repo = AsyncMock()
+        order_repo.create.side_effect = lambda entity: Order(
+            id=1, status=list(OrderStatus)[0], created_at=datetime(2026, 1, 1), **entity.model_dump()
+        )
+        return OrderService(order_repo=order_repo, price_repo=price_repo, user_repo=user_repo)
+
+    @pytest.mark.asyncio
+    async def test_order_is_charged_discounted_catalog_price(self, charging_service, user_repo):
+        order = await charging_service.create_order(
+            OrderCreateDTO(service="telegram", country_code="RU"), user_id=7, user_balance=100.0, discount_rate=0.15
+        )
+
+        catalog_price = CatalogSnapshot([TELEGRAM_RU], [], []).view("ru", discount_tier(0.15)).catalog[0].price
+        assert order.price == catalog_price == 6.8
+        user_repo.update_balance.assert_awaited_once_with(7, -6.8)
+
+    @pytest.mark.asyncio
+    async def test_out_of_range_discount_is_not_applied(self, charging_service, user_repo):
+        # Проценты вместо доли: 10 — это не бесплатный заказ
+        order = await charging_service.create_order(
+            OrderCreateDTO(service="telegram", country_code="RU"), user_id=7, user_balance=100.0, discount_rate=10
+        )
+
+        assert order.price == 8.0
+        user_repo.update_balance.assert_awaited_once_with(7, -8.0)
+
+    @pytest.mark.asyncio
+    async def test_order_names_are_resolved_once_per_page(self, catalog):
+        await catalog.get_snapshot()
+        orders = [
+            Order(id=i, user_id=7, service="telegram", country_code=code, price=8.0, provider_id=1,
+                  status=OrderStatus.COMPLETED, created_at=datetime(2026, 1, 1))
+            for i, code in enumerate(["RU", "US"] * 50)
+        ]
+        order_repo = AsyncMock()
+        order_repo.get_by_user_id.return_value = orders
+        order_repo.get_orders_count_by_user.return_value = len(orders)
+        price_repo = AsyncMock()
+        price_repo.get_reference_names.return_value = ({"telegram": "Telegram"}, {"US": "США"}, {1: "p"})
+        service = OrderService(order_repo=order_repo, price_repo=price_repo, user_repo=AsyncMock(), catalog=catalog)
+
+        result = await service.get_orders_by_user_id(7, 0, 100)
+
+        assert [(o.service_name, o.country_name, o.provider_name) for o in result.orders[:2]] == [
+            ("Telegram", "Россия", "p"), ("Telegram", "США", "p")
+        ]
+        price_repo.get_reference_names.assert_awaited_once_with({"telegram"}, {"US"}, {1})
+        price_repo.get_price_for_service_country.assert_not_called()
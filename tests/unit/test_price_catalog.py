@@ -0,0 +1,414 @@
+import asyncio
+import gzip
+import json
+import pytest
+from decimal import Decimal
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.core.di import get_price_service
+from src.presentation.api.price.price_router import price_router
+from src.core.domain.entity.service_price import ServicePrice, CatalogChange
+from src.core.domain.entity.countries import CountryPublic
+from src.services.price_catalog import (
+    STREAM_QUEUE_SIZE, CatalogEvent, CatalogSnapshot, PriceCatalogCache, discount_tier, negotiate_locale
+)
+from src.services import price_service as price_service_module
+from src.services.price_service import PriceService
+
+
+def make_price(service_code, country_code, price, available=True):
+    return ServicePrice(
+        service_code=service_code,
+        country_code=country_code,
+        price=price,
+        vip_price=None,
+        available=available,
+        service_name=service_code.capitalize(),
+        country_name=country_code
+    )
+
+
+CATALOG = [
+    make_price("telegram", "RU", 8.0),
+    make_price("telegram", "US", 10.0),
+    make_price("whatsapp", "US", 12.0, available=False),
+]
+
+
+class TestPriceCatalog:
+    @pytest.fixture
+    def mock_repo(self):
+        repo = AsyncMock()
+        repo.get_service_catalog.return_value = CATALOG
+        repo.get_popular_services.return_value = CATALOG[:2]
+        repo.get_popular_countries.return_value = []
+        repo.get_catalog_change_version.return_value = 42
+        repo.get_service_references.return_value = []
+        repo.get_country_references.return_value = []
+        return repo
+
+    @pytest.fixture
+    def catalog(self, mock_repo):
+        @asynccontextmanager
+        async def repo_scope():
+            yield mock_repo
+
+        return PriceCatalogCache(repo_scope=repo_scope)
+
+    def test_snapshot_groups_by_country_and_service(self):
+        snapshot = CatalogSnapshot(CATALOG, [], [])
+
+        assert [p.service_code for p in snapshot.services_by_country("US")] == ["telegram", "whatsapp"]
+        assert [p.country_code for p in snapshot.countries_by_service("telegram")] == ["RU", "US"]
+        assert snapshot.services_by_country("XX") == []
+
+    def test_snapshot_stores_rows_once(self):
+        extra = make_price("viber", "DE", 5.0)
+        snapshot = CatalogSnapshot(CATALOG, [CATALOG[1], extra], [])
+
+        assert len(snapshot.columns) == len(CATALOG) + 1
+        assert snapshot.columns.service_codes == ["telegram", "whatsapp", "viber"]
+        assert snapshot.popular_services == [CATALOG[1], extra]
+        assert snapshot.catalog == CATALOG
+
+    @pytest.mark.asyncio
+    async def test_payload_is_compressed_off_the_event_loop(self):
+        snapshot = CatalogSnapshot(CATALOG, [], [])
+        await snapshot.precompress()
+
+        catalog, catalog_encoding = snapshot.payload("catalog", "gzip")
+        plain, encoding = snapshot.payload("grouped_by_service", "gzip")
+        await asyncio.gather(*snapshot.view()._compressing.values())
+        compressed, compressed_encoding = snapshot.payload("grouped_by_service", "gzip")
+
+        assert catalog_encoding == "gzip"
+        assert encoding == "identity"
+        assert compressed_encoding == "gzip"
+        assert gzip.decompress(compressed) == plain
+
+    def test_snapshot_version_depends_on_content(self):
+        first = CatalogSnapshot(CATALOG, [], [])
+        same = CatalogSnapshot(list(CATALOG), [], [])
+        changed = CatalogSnapshot([make_price("telegram", "RU", 9.0)] + CATALOG[1:], [], [])
+
+        assert first.version == same.version
+        assert first.version != changed.version
+
+    def test_snapshot_precomputes_localized_views(self):
+        catalog = [
+            make_price("telegram", "US", 10.0).model_copy(update={"country_name": "США"}),
+            make_price("telegram", "JP", 11.0).model_copy(update={"country_name": "Япония"}),
+        ]
+        countries = [
+            CountryPublic(code="US", name_ru="США", name_en="United States"),
+            CountryPublic(code="JP", name_ru="Япония", name_en="Japan"),
+        ]
+        snapshot = CatalogSnapshot(catalog, [], catalog, countries=countries)
+
+        english = snapshot.view("en")
+        assert [p.country_name for p in english.catalog] == ["Japan", "United States"]
+        assert [p.country_name for p in english.popular_countries] == ["Japan", "United States"]
+        assert [p.country_name for p in snapshot.countries_by_service("telegram", "en")] == ["Japan", "United States"]
+        assert snapshot.catalog == catalog
+        assert snapshot.view("de") is snapshot.view("ru")
+
+    @pytest.mark.asyncio
+    async def test_availability_stats_come_from_snapshot(self, catalog, mock_repo):
+        service = PriceService(mock_repo, catalog=catalog)
+
+        stats = await service.get_availability_stats()
+
+        assert stats["total_combinations"] == 2
+        assert stats["services"] == ["telegram"]
+        assert stats["countries"] == ["RU", "US"]
+        mock_repo.get_available_services_countries.assert_not_called()
+
+    def test_discounted_view_is_cached_per_tier(self):
+        snapshot = CatalogSnapshot(CATALOG, CATALOG[:1], [])
+
+        view = snapshot.view("ru", discount_tier(0.15))
+
+        assert [p.price for p in view.catalog] == [6.8, 8.5, 10.2]
+        assert view.popular_services[0].price == 6.8
+        assert snapshot.view("ru", discount_tier(0.150001)) is view
+        assert snapshot.view("ru", discount_tier(0)) is snapshot.view("ru")
+        assert CATALOG[0].price == 8.0
+
+    def test_out_of_range_discount_rate_is_not_applied(self):
+        assert discount_tier(1) == Decimal(1)
+        assert discount_tier(10) == discount_tier(-0.2) == 0
+
+    def test_negotiate_locale(self):
+        assert negotiate_locale("de-DE, en-US;q=0.8, ru;q=0.5") == "en"
+        assert negotiate_locale("ru-RU;q=0.9, en;q=0.7") == "ru"
+        assert negotiate_locale("en;q=0, fr") is None
+        assert negotiate_locale(None) is None
+
+    @pytest.mark.asyncio
+    async def test_cold_start_builds_once_for_concurrent_readers(self, catalog, mock_repo):
+        snapshots = await asyncio.gather(*(catalog.get_snapshot() for _ in range(10)))
+
+        assert mock_repo.get_service_catalog.await_count == 1
+        assert all(s is snapshots[0] for s in snapshots)
+
+    @pytest.mark.asyncio
+    async def test_refresh_keeps_snapshot_when_unchanged(self, catalog):
+        first = await catalog.get_snapshot()
+        second = await catalog.refresh()
+
+        assert first is second
+
+    @pytest.mark.asyncio
+    async def test_unchanged_rebuild_catches_up_with_the_feed(self, catalog, mock_repo):
+        snapshot = await catalog.get_snapshot()
+        mock_repo.get_catalog_change_version.return_value = 43
+
+        assert await catalog._feed_advanced()
+        await catalog.refresh()
+
+        assert catalog.snapshot is snapshot
+        assert snapshot.change_version == 43
+        assert not await catalog._feed_advanced()
+        assert mock_repo.get_service_catalog.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_price_service_reads_from_snapshot(self, catalog, mock_repo):
+        service = PriceService(mock_repo, catalog=catalog)
+
+        services = await service.list_services_by_country("RU")
+        popular = await service.get_popular_services()
+
+        assert [p.service_code for p in services] == ["telegram"]
+        assert len(popular) == 2
+        mock_repo.get_services_by_country.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_changes_since_known_version_returns_delta(self, catalog, mock_repo):
+        mock_repo.get_catalog_changes.return_value = [
+            CatalogChange(service_code="telegram", country_code="RU", removed=True, version=41)
+        ]
+        service = PriceService(mock_repo, catalog=catalog)
+
+        result = await service.get_catalog_changes(since=40)
+
+        assert not result.full_resync
+        assert result.version == 42
+        assert result.changes[0].removed
+        mock_repo.get_catalog_changes.assert_awaited_once()
+        assert mock_repo.get_catalog_changes.await_args.args[:2] == (40, 42)
+
+    @pytest.mark.asyncio
+    async def test_changes_delta_uses_client_locale(self, catalog, mock_repo):
+        mock_repo.get_country_references.return_value = [
+            CountryPublic(code="RU", name_ru="Россия", name_en="Russia")
+        ]
+        mock_repo.get_catalog_changes.return_value = [
+            CatalogChange(service_code="telegram", country_code="RU", price=9.0, available=True,
+                          country_name="Россия", version=42)
+        ]
+        service = PriceService(mock_repo, catalog=catalog)
+
+        english = await service.get_catalog_changes(since=40, locale="en")
+        russian = await service.get_catalog_changes(since=40)
+
+        assert not english.full_resync
+        assert english.changes[0].country_name == "Russia"
+        assert russian.changes[0].country_name == "Россия"
+
+    @pytest.mark.asyncio
+    async def test_changes_fall_back_to_full_resync(self, catalog, mock_repo):
+        service = PriceService(mock_repo, catalog=catalog)
+
+        unknown = await service.get_catalog_changes(since=100)
+        initial = await service.get_catalog_changes(since=None)
+
+        assert unknown.full_resync and initial.full_resync
+        assert unknown.version == 42
+        assert len(unknown.catalog) == len(CATALOG)
+        mock_repo.get_catalog_changes.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rebuild_publishes_diff_to_all_subscribers(self, catalog, mock_repo):
+        await catalog.get_snapshot()
+        first, second = catalog.subscribe(), catalog.subscribe()
+        mock_repo.get_service_catalog.return_value = [make_price("telegram", "RU", 9.0), CATALOG[1]]
+        mock_repo.get_catalog_change_version.return_value = 43
+
+        await catalog.refresh()
+
+        event = first.get_nowait()
+        assert second.get_nowait() is event
+        assert [(c.service_code, c.country_code, c.price, c.removed) for c in event.changes] == [
+            ("telegram", "RU", 9.0, False), ("whatsapp", "US", None, True)
+        ]
+        assert event.frame().startswith(b"id: 43\nevent: changes\ndata: [")
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_gets_resync(self, catalog):
+        queue = catalog.subscribe()
+        for version in range(STREAM_QUEUE_SIZE + 1):
+            catalog._publish(CatalogEvent("changes", version))
+
+        assert queue.qsize() == 1
+        assert queue.get_nowait().kind == "resync"
+
+    @pytest.mark.asyncio
+    async def test_stream_replays_changes_after_last_event_id(self, catalog, mock_repo):
+        mock_repo.get_catalog_changes.return_value = [
+            CatalogChange(service_code="telegram", country_code="RU", price=9.0, available=True, version=42)
+        ]
+        service = PriceService(mock_repo, catalog=catalog)
+
+        stream = service.stream_changes(since=40)
+        frame = await stream.__anext__()
+        await stream.aclose()
+
+        assert frame.startswith(b"id: 42\nevent: changes\n")
+        assert catalog.subscribers == 0
+
+    @pytest.mark.asyncio
+    async def test_batch_prices_keep_request_order(self, mock_repo):
+        mock_repo.get_prices_for_pairs.return_value = {
+            ("telegram", "US"): CATALOG[1],
+            ("telegram", "RU"): CATALOG[0],
+        }
+        service = PriceService(mock_repo)
+
+        pairs = [("telegram", "US"), ("viber", "RU"), ("telegram", "RU")]
+        prices = await service.get_batch_prices(pairs)
+
+        assert prices == [CATALOG[1], None, CATALOG[0]]
+        mock_repo.get_prices_for_pairs.assert_awaited_once_with(pairs)
+
+
+    @pytest.mark.asyncio
+    async def test_stream_from_snapshot_builds_one_batch_at_a_time(self, catalog, mock_repo, monkeypatch):
+        snapshot = await catalog.get_snapshot()
+        view = snapshot.view("ru")
+        built = []
+        rows = view._rows
+        monkeypatch.setattr(view, "_rows", lambda order: built.append(len(order)) or rows(order))
+        monkeypatch.setattr(price_service_module, "CATALOG_STREAM_BATCH", 2)
+        service = PriceService(mock_repo, catalog=catalog)
+
+        chunks = [chunk async for chunk in service.stream_catalog()]
+
+        assert built == [2, 1]
+        lines = b"".join(chunks).splitlines()
+        assert [json.loads(line)["price"] for line in lines] == [8.0, 10.0, 12.0]
+        mock_repo.stream_service_catalog.assert_not_called()
+
+
+class TestCatalogConditionalRequests:
+    @pytest.fixture
+    def client(self):
+        repo = AsyncMock()
+        repo.get_service_catalog.return_value = CATALOG
+        repo.get_popular_services.return_value = []
+        repo.get_popular_countries.return_value = []
+        repo.get_service_references.return_value = []
+        repo.get_country_references.return_value = [
+            CountryPublic(code="RU", name_ru="Россия", name_en="Russia"),
+        ]
+
+        async def stream_catalog(batch_size):
+            yield CATALOG[:2]
+            yield CATALOG[2:]
+
+        repo.stream_service_catalog = MagicMock(side_effect=stream_catalog)
+
+        @asynccontextmanager
+        async def repo_scope():
+            yield repo
+
+        catalog = PriceCatalogCache(repo_scope=repo_scope)
+        app = FastAPI()
+        app.include_router(price_router)
+        app.dependency_overrides[get_price_service] = lambda: PriceService(repo, catalog=catalog)
+        return TestClient(app)
+
+    def test_catalog_returns_etag_and_304_on_match(self, client):
+        response = client.get("/prices/catalog")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        cached = client.get("/prices/catalog", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        stale = client.get("/prices/catalog", headers={"If-None-Match": '"outdated"'})
+        assert stale.status_code == 200
+
+    def test_catalog_is_served_precompressed(self, client):
+        plain = client.get("/prices/catalog", headers={"Accept-Encoding": "identity"})
+        compressed = client.get("/prices/catalog", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in plain.headers
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["etag"] != plain.headers["etag"]
+        assert compressed.json() == plain.json()
+        assert [p["service_code"] for p in plain.json()] == ["telegram", "telegram", "whatsapp"]
+
+    def test_uncompressed_body_is_served_until_compression_is_ready(self, client):
+        plain = client.get("/prices/catalog/grouped", headers={"Accept-Encoding": "identity"})
+        pending = client.get("/prices/catalog/grouped", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in pending.headers
+        assert pending.headers["etag"] == plain.headers["etag"]
+        assert pending.content == plain.content
+
+    def test_catalog_is_localized_by_accept_language(self, client):
+        default = client.get("/prices/catalog")
+        english = client.get("/prices/catalog", headers={"Accept-Language": "en-US,en;q=0.9"})
+        explicit = client.get("/prices/catalog?lang=en", headers={"Accept-Language": "ru"})
+
+        assert default.json()[0]["country_name"] == "RU"
+        assert english.json()[0]["country_name"] == "Russia"
+        assert explicit.json() == english.json()
+        assert english.headers["etag"] != default.headers["etag"]
+        assert "Accept-Language" in english.headers["vary"]
+
+    def test_grouped_catalog(self, client):
+        by_service = client.get("/prices/catalog/grouped", headers={"Accept-Encoding": "identity"})
+        by_country = client.get("/prices/catalog/grouped?by=country", headers={"Accept-Encoding": "gzip"})
+
+        assert [(s["service_code"], len(s["countries"])) for s in by_service.json()] == [
+            ("telegram", 2), ("whatsapp", 1)
+        ]
+        assert [c["country_code"] for c in by_country.json()] == ["RU", "US"]
+        assert [s["service_code"] for s in by_country.json()[1]["services"]] == ["telegram", "whatsapp"]
+        assert by_country.headers["etag"] != by_service.headers["etag"]
+
+        cached = client.get(
+            "/prices/catalog/grouped",
+            headers={"If-None-Match": by_service.headers["etag"], "Accept-Encoding": "identity"}
+        )
+        assert cached.status_code == 304
+
+    def test_catalog_streams_ndjson(self, client):
+        cold = client.get("/prices/catalog", headers={"Accept": "application/x-ndjson"})
+        client.get("/prices/catalog")
+        warm = client.get("/prices/catalog?stream=1")
+
+        assert cold.headers["content-type"].startswith("application/x-ndjson")
+        lines = [line for line in cold.text.splitlines() if line]
+        assert [json.loads(line)["country_code"] for line in lines] == ["RU", "US", "US"]
+        assert warm.text == cold.text
+
+    def test_catalog_sparse_fieldset(self, client):
+        full = client.get("/prices/catalog")
+        plain = {"Accept-Encoding": "identity"}
+        sparse = client.get("/prices/catalog?fields=price,service_code,country_code", headers=plain)
+        reordered = client.get("/prices/catalog?fields=country_code,service_code,price", headers=plain)
+        by_country = client.get("/prices/country/US?fields=service_code,price")
+        unknown = client.get("/prices/catalog?fields=price,provider_name")
+
+        assert sparse.json() == [
+            {"service_code": p.service_code, "country_code": p.country_code, "price": p.price} for p in CATALOG
+        ]
+        assert sparse.headers["etag"] != full.headers["etag"]
+        assert reordered.headers["etag"] == sparse.headers["etag"]
+        assert by_country.json() == [{"service_code": "telegram", "price": 10.0}, {"service_code": "whatsapp", "price": 12.0}]
+        assert unknown.status_code == 400
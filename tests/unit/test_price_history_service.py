@@ -0,0 +1,53 @@
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+from src.services.price_history_service import PriceHistoryService
+
+
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+
+class TestPriceHistoryService:
+    @pytest.fixture
+    def repo(self):
+        repo = AsyncMock()
+        repo.get_price_history.return_value = []
+        repo.prune_price_history.return_value = (0, 0)
+        return repo
+
+    @pytest.fixture
+    def service(self, repo):
+        @asynccontextmanager
+        async def repo_scope():
+            yield repo
+
+        return PriceHistoryService(
+            repo_scope=repo_scope,
+            raw_retention=timedelta(days=30),
+            hourly_retention=timedelta(days=365)
+        )
+
+    def test_resolution_follows_window_and_retention(self, service):
+        assert service.choose_resolution(NOW - timedelta(hours=6), NOW, now=NOW) == "raw"
+        assert service.choose_resolution(NOW - timedelta(days=14), NOW, now=NOW) == "hour"
+        assert service.choose_resolution(NOW - timedelta(days=400), NOW, now=NOW) == "day"
+        # Короткое окно за пределами хранения сырых точек читается из свёрток
+        old = NOW - timedelta(days=45)
+        assert service.choose_resolution(old, old + timedelta(hours=6), now=NOW) == "hour"
+
+    @pytest.mark.asyncio
+    async def test_get_history_passes_window_to_repository(self, service, repo):
+        since = datetime.now(timezone.utc) - timedelta(days=7)
+
+        result = await service.get_history("telegram", "US", 1, since.replace(tzinfo=None))
+
+        assert result.resolution == "hour"
+        args = repo.get_price_history.await_args.args
+        assert args[:3] == ("telegram", "US", 1)
+        assert args[3] == since and args[5] == "hour"
+
+    @pytest.mark.asyncio
+    async def test_get_history_rejects_empty_window(self, service):
+        with pytest.raises(ValueError):
+            await service.get_history("telegram", "US", 1, NOW, NOW - timedelta(hours=1))
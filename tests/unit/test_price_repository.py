@@ -0,0 +1,78 @@
+import pytest
+from decimal import Decimal
+from src.infrastructure.database.schemas import ProviderORM, ProviderRoutesORM
+from src.infrastructure.repository.price_repository import PriceRepository
+
+
+async def add_route(session, route_id, service, country, price, vip_price, available, is_active=True):
+    provider = ProviderORM(name=f"provider-{route_id}", adapter_class="TestAdapter", config={}, is_active=True)
+    session.add(ProviderRoutesORM(
+        id=route_id, provider=provider, country_code=country, service_code=service,
+        provider_country_code=country, provider_service_code=service,
+        cost_price=Decimal(str(price)) / 2, client_price=Decimal(str(price)),
+        vip_client_price=Decimal(str(vip_price)), available_count=available, is_active=is_active
+    ))
+    await session.commit()
+
+
+def by_key(prices):
+    return {(p.service_code, p.country_code): p for p in prices}
+
+
+class TestRouteSummary:
+    @pytest.mark.asyncio
+    async def test_summary_aggregates_active_routes_per_key(self, async_db_session):
+        await add_route(async_db_session, 3, "telegram", "US", 7.5, 9.5, 0)
+        await add_route(async_db_session, 4, "telegram", "US", 1.0, 1.0, 500, is_active=False)
+        await add_route(async_db_session, 5, "whatsapp", "RU", 6.0, 5.0, 0)
+
+        catalog = by_key(await PriceRepository(async_db_session).get_service_catalog())
+
+        assert set(catalog) == {("telegram", "US"), ("telegram", "RU"), ("whatsapp", "RU")}
+        telegram_us = catalog["telegram", "US"]
+        assert (telegram_us.price, telegram_us.vip_price, telegram_us.available) == (7.5, 9.0, True)
+        assert (telegram_us.service_name, telegram_us.country_name) == ("Telegram", "США")
+        assert catalog["whatsapp", "RU"].available is False
+
+    @pytest.mark.asyncio
+    async def test_keys_without_active_routes_are_not_listed(self, async_db_session):
+        await add_route(async_db_session, 3, "whatsapp", "US", 5.0, 4.0, 10, is_active=False)
+
+        repo = PriceRepository(async_db_session)
+        catalog = by_key(await repo.get_service_catalog())
+        stats = await repo.get_available_services_countries()
+
+        assert ("whatsapp", "US") not in catalog
+        assert stats["services"] == ["telegram"]
+
+
+class TestSummaryFilters:
+    @pytest.mark.asyncio
+    async def test_sql_filters_match_filtering_the_catalog(self, async_db_session):
+        await add_route(async_db_session, 3, "whatsapp", "US", 12.0, 11.0, 0)
+        await add_route(async_db_session, 4, "whatsapp", "RU", 6.0, 5.0, 3)
+        await add_route(async_db_session, 5, "viber", "RU", 4.0, 4.0, 1, is_active=False)
+
+        repo = PriceRepository(async_db_session)
+        catalog = await repo.get_service_catalog()
+
+        for country in ("US", "RU", "KZ"):
+            expected = by_key(p for p in catalog if p.country_code == country)
+            assert by_key(await repo.get_services_by_country(country)) == expected
+        for service in ("telegram", "whatsapp", "viber"):
+            expected = by_key(p for p in catalog if p.service_code == service)
+            assert by_key(await repo.get_countries_by_service(service)) == expected
+        assert len(catalog) == 4
+
+
+class TestRouteCandidates:
+    @pytest.mark.asyncio
+    async def test_keys_limit_candidates_to_requested_pairs(self, async_db_session):
+        await add_route(async_db_session, 3, "whatsapp", "US", 5.0, 4.0, 10)
+        await add_route(async_db_session, 4, "whatsapp", "RU", 6.0, 5.0, 3)
+
+        repo = PriceRepository(async_db_session)
+        candidates = await repo.get_route_candidates(keys=[("telegram", "RU"), ("whatsapp", "US")])
+
+        assert sorted(c.id for c in candidates) == [2, 3]
+        assert await repo.get_route_candidates(keys=[]) == []
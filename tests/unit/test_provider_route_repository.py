@@ -0,0 +1,40 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import select
+from src.core.domain.entity.provider_route import RoutePriceRow
+from src.infrastructure.database.schemas import ProviderORM, ProviderRoutesORM
+from src.infrastructure.repository.provider_route_repository import ProviderRouteRepository
+
+
+def make_row(service_code, country_code, price):
+    return RoutePriceRow(
+        service_code=service_code,
+        country_code=country_code,
+        provider_service_code=service_code[:2],
+        provider_country_code=country_code.lower(),
+        cost_price=Decimal(str(price)) - 1,
+        client_price=Decimal(str(price)),
+        available_count=10
+    )
+
+
+class TestPriceListImport:
+    @pytest.mark.asyncio
+    async def test_last_duplicate_row_wins(self, async_db_session):
+        provider_id = await async_db_session.scalar(select(ProviderORM.id).where(ProviderORM.name == "test_provider"))
+
+        changed = await ProviderRouteRepository(async_db_session).import_price_list(provider_id, [
+            make_row("viber", "RU", 5.0),
+            make_row("viber", "RU", 6.0),
+            make_row("viber", "RU", 4.0),
+        ])
+
+        price = await async_db_session.scalar(
+            select(ProviderRoutesORM.client_price).where(
+                ProviderRoutesORM.provider_id == provider_id,
+                ProviderRoutesORM.service_code == "viber",
+                ProviderRoutesORM.country_code == "RU"
+            )
+        )
+        assert changed == [("viber", "RU")]
+        assert price == Decimal("4.0")
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from src.core.domain.entity.provider_route import MarkupRule, RouteCosts
+from src.services.repricing_engine import RepricingEngine
+
+
+def make_routes(*routes):
+    """routes: (id, provider_id, service, country, cost, min_margin, client, vip)"""
+    return RouteCosts(*(list(column) for column in zip(*routes)))
+
+
+RULES = [
+    MarkupRule(markup_percent=Decimal("50")),
+    MarkupRule(provider_id=2, markup_percent=Decimal("40")),
+    MarkupRule(country_code="US", markup_percent=Decimal("30")),
+    MarkupRule(service_code="telegram", markup_percent=Decimal("25"), vip_markup_percent=Decimal("20")),
+    MarkupRule(provider_id=2, service_code="telegram", country_code="US", markup_percent=Decimal("10")),
+]
+
+
+class TestRepricingEngine:
+    def test_most_specific_rule_wins(self):
+        engine = RepricingEngine(RULES)
+
+        assert engine.rule_for(2, "telegram", "US").markup_percent == Decimal("10")
+        assert engine.rule_for(1, "telegram", "US").markup_percent == Decimal("25")
+        assert engine.rule_for(1, "viber", "US").markup_percent == Decimal("30")
+        assert engine.rule_for(2, "viber", "RU").markup_percent == Decimal("40")
+        assert engine.rule_for(1, "viber", "RU").markup_percent == Decimal("50")
+        assert RepricingEngine([]).rule_for(1, "viber", "RU") is None
+
+    def test_reprice_enforces_min_margin_and_skips_unchanged(self):
+        engine = RepricingEngine(RULES)
+        routes = make_routes(
+            (1, 1, "telegram", "RU", Decimal("8"), Decimal("20"), Decimal("0"), Decimal("0")),
+            (2, 2, "telegram", "US", Decimal("8"), Decimal("20"), Decimal("0"), Decimal("0")),
+            (3, 1, "viber", "RU", Decimal("8"), Decimal("20"), Decimal("12.0000"), Decimal("12.0000")),
+        )
+
+        result = engine.reprice(routes)
+
+        assert result.total == 3
+        assert result.raised_to_min_margin == 1
+        assert [(u.id, u.client_price, u.vip_client_price) for u in result.updates] == [
+            (1, Decimal("10.00"), Decimal("9.60")),
+            (2, Decimal("9.60"), Decimal("9.60")),
+        ]
+
+    def test_routes_without_rule_keep_prices(self):
+        routes = make_routes((1, 1, "telegram", "RU", Decimal("8"), None, Decimal("9"), Decimal("9")))
+
+        result = RepricingEngine([MarkupRule(provider_id=5, markup_percent=Decimal("10"))]).reprice(routes)
+
+        assert result.updates == []
+        assert result.unpriced == 1
@@ -0,0 +1,101 @@
+import pytest
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+from src.core.domain.entity.provider_route import RoutePriceRow
+from src.services.route_import_service import RouteImportService
+
+
+def make_row(service_code, country_code, price):
+    return RoutePriceRow(
+        service_code=service_code,
+        country_code=country_code,
+        provider_service_code=service_code[:2],
+        provider_country_code=country_code.lower(),
+        cost_price=Decimal(str(price)) - 1,
+        client_price=Decimal(str(price)),
+        available_count=10
+    )
+
+
+class TestRouteImportService:
+    @pytest.fixture
+    def mock_repo(self):
+        repo = AsyncMock()
+        repo.import_price_list.side_effect = lambda provider_id, rows, only_changed: [
+            (row.service_code, row.country_code) for row in rows
+        ]
+        return repo
+
+    @pytest.fixture
+    def catalog(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def service(self, mock_repo, catalog):
+        @asynccontextmanager
+        async def repo_scope():
+            yield mock_repo
+
+        return RouteImportService(repo_scope=repo_scope, catalog=catalog)
+
+    @pytest.mark.asyncio
+    async def test_import_price_list_reports_result_and_invalidates_catalog(self, service, mock_repo, catalog):
+        rows = [make_row("telegram", "RU", 8.0), make_row("viber", "RU", 5.0)]
+
+        result = await service.import_price_list(1, rows)
+
+        assert result.provider_id == 1
+        assert result.received == result.affected == 2
+        mock_repo.import_price_list.assert_awaited_once_with(1, rows, only_changed=False)
+        catalog.invalidate.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_import_price_lists_runs_every_provider(self, service, mock_repo, catalog):
+        results = await service.import_price_lists({
+            1: [make_row("telegram", "RU", 8.0)],
+            2: [make_row("telegram", "RU", 7.5), make_row("telegram", "US", 9.0)],
+        })
+
+        assert [(r.provider_id, r.affected) for r in results] == [(1, 1), (2, 2)]
+        assert mock_repo.import_price_list.await_count == 2
+        catalog.invalidate.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_price_list_keeps_caches(self, service, mock_repo, catalog):
+        mock_repo.import_price_list.side_effect = None
+        mock_repo.import_price_list.return_value = []
+
+        result = await service.import_price_list(1, [make_row("telegram", "RU", 8.0)], only_changed=True)
+
+        assert result.affected == 0
+        assert result.changed == []
+        catalog.invalidate.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_changed_keys_are_reported(self, service, mock_repo):
+        mock_repo.import_price_list.side_effect = None
+        mock_repo.import_price_list.return_value = [("viber", "RU")]
+
+        result = await service.import_price_list(
+            1, [make_row("telegram", "RU", 8.0), make_row("viber", "RU", 5.0)], only_changed=True
+        )
+
+        assert [(c.service_code, c.country_code) for c in result.changed] == [("viber", "RU")]
+        assert mock_repo.import_price_list.await_args.kwargs["only_changed"] is True
+
+    @pytest.mark.asyncio
+    async def test_import_refreshes_changed_keys_in_route_index(self, mock_repo, catalog):
+        @asynccontextmanager
+        async def repo_scope():
+            yield mock_repo
+
+        route_index = AsyncMock()
+        service = RouteImportService(repo_scope=repo_scope, catalog=catalog, route_index=route_index)
+
+        await service.import_price_lists({
+            1: [make_row("telegram", "RU", 8.0)],
+            2: [make_row("telegram", "US", 9.0)],
+        })
+
+        route_index.refresh_keys.assert_awaited_once_with([("telegram", "RU"), ("telegram", "US")])
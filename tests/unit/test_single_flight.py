@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from src.services.single_flight import SingleFlight
+from src.services.price_service import PriceService
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def query():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flights.do("key", query) for _ in range(10)))
+
+        assert calls == 1
+        assert results == [1] * 10
+        assert flights.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        flights = SingleFlight()
+
+        async def query(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            flights.do("a", lambda: query("a")),
+            flights.do("b", lambda: query("b")),
+        )
+
+        assert results == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_error_is_shared_and_key_released(self):
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("db down")
+
+        results = await asyncio.gather(
+            *(flights.do("key", failing) for _ in range(3)), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flights.in_flight() == 0
+        assert await flights.do("key", AsyncMock(return_value="ok")) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_price_service_coalesces_price_lookups(self):
+        repo = AsyncMock()
+
+        async def slow_price(service_code, country_code):
+            await asyncio.sleep(0.01)
+            return 10.0
+
+        repo.get_price_for_service_country.side_effect = slow_price
+        service = PriceService(repo, flights=SingleFlight())
+
+        prices = await asyncio.gather(*(service.get_service_price("telegram", "RU") for _ in range(5)))
+
+        assert prices == [10.0] * 5
+        assert repo.get_price_for_service_country.await_count == 1
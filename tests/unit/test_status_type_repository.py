@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.infrastructure.database.schemas import StatusTypeORM
+from src.infrastructure.repository import status_type_repository
+from src.infrastructure.repository.status_type_repository import StatusTypeRepository, invalidate_status_types
+
+
+def make_session(*statuses):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = list(statuses)
+    session = AsyncMock()
+    session.execute.return_value = result
+    return session
+
+
+class TestStatusTypeCache:
+    @pytest.fixture(autouse=True)
+    def reset_cache(self):
+        invalidate_status_types()
+        yield
+        invalidate_status_types()
+
+    @pytest.mark.asyncio
+    async def test_table_is_loaded_once_per_process(self):
+        session = make_session(
+            StatusTypeORM(id=1, code="WAITING_CODE", name_en="Waiting", is_final=False, is_error=False),
+            StatusTypeORM(id=2, code="COMPLETED", name_en="Completed", is_final=True, is_error=False),
+        )
+
+        first = await StatusTypeRepository(session).id_of("COMPLETED")
+        second = await StatusTypeRepository(AsyncMock()).code_of(1)
+        table = await StatusTypeRepository(AsyncMock()).get_table()
+
+        assert (first, second) == (2, "WAITING_CODE")
+        assert table.non_final_ids == (1,)
+        assert session.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_code_reloads_table(self):
+        waiting = StatusTypeORM(id=1, code="WAITING_CODE", name_en="Waiting", is_final=False, is_error=False)
+        session = make_session(waiting)
+        repo = StatusTypeRepository(session)
+        await repo.get_table()
+
+        session.execute.return_value = make_session(
+            waiting, StatusTypeORM(id=3, code="PENDING_ORDER", name_en="Pending", is_final=False, is_error=False)
+        ).execute.return_value
+
+        assert await repo.id_of("PENDING_ORDER") == 3
+        assert session.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_misses_refresh_at_most_once_per_cooldown(self, monkeypatch):
+        session = make_session(
+            StatusTypeORM(id=1, code="WAITING_CODE", name_en="Waiting", is_final=False, is_error=False)
+        )
+        repo = StatusTypeRepository(session)
+
+        assert await repo.id_of("MISSING") is None
+        assert await repo.code_of(99) is None
+        assert (await repo.get_table_covering([1, 99])).code_of(99) is None
+        assert session.execute.await_count == 2
+
+        monkeypatch.setattr(status_type_repository, "MISS_REFRESH_COOLDOWN", 0)
+        assert await repo.id_of("MISSING") is None
+        assert session.execute.await_count == 3